@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+组件级微基准测试。
+
+对不同规模（默认 10 ~ 10^6 个晶体管）的合成BSD（见 generate_bsd.py）分别测量:
+  - parse_ms:               BSD文本解析（bsd_io.parse_bsd_file）
+  - build_ms:               由层级结构构建晶体管和网络（BDD.construct_from_layers）
+  - nets_ms:                其中网络构建的部分（BDD._build_nets）
+  - single_row_cost_per_s:  SingleRowLayout.get_cost 的吞吐量
+  - layout_cost_per_s:      Layout.get_cost（2D半周线长）的吞吐量
+  - standard_cell_neighbor_per_s: StandardCellLayout.generate_neighbor 的吞吐量
+  - kernel_build_ms:        单行退火内核的构建（SingleRowKernel.from_layout）
+  - single_row_moves_per_s: 单行退火内核每秒尝试的交换次数
+  - layout_moves_per_s:     SimulatedAnnealing（2D）每秒尝试的移动次数
+  - peak_rss_mb:            该规模的峰值常驻内存
+每个规模在独立的子进程中运行，峰值内存互不影响。
+吞吐量指标在时间预算内重复执行（至少一次）；超出 --max-transistors-2d 的规模跳过2D指标。
+
+结果以JSON输出；指定 --baseline 时与历史结果比较，超过阈值则返回非零退出码。
+
+用法:
+    python benchmarks/bench_components.py [--sizes 10,100,1000] [--seed 1]
+        [--budget-ms 500] [--output bench_components.json] [--baseline old.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_bsd import (
+    DEFAULT_SHARING,
+    DEFAULT_TERMINAL_RATIO,
+    shape_for_transistors,
+    write_bsd,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+
+# 2D布局的逐晶体管初始化较慢，超过此规模默认跳过2D指标
+DEFAULT_MAX_TRANSISTORS_2D = 100000
+
+# 时间类指标越小越好，吞吐量指标越大越好
+TIME_METRICS = ("parse_ms", "build_ms", "nets_ms", "kernel_build_ms", "peak_rss_mb")
+RATE_METRICS = (
+    "single_row_cost_per_s",
+    "layout_cost_per_s",
+    "standard_cell_neighbor_per_s",
+    "single_row_moves_per_s",
+    "layout_moves_per_s",
+)
+
+
+def throughput(func, budget_s):
+    """在时间预算内重复调用 func（至少一次），返回每秒调用次数"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget_s:
+            return calls / elapsed
+
+
+def peak_rss_mb():
+    """本进程的峰值常驻内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以KB为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(bsd_path, budget_s, include_2d):
+    """在当前进程中测量一个BSD文件的各项指标"""
+    sys.path.insert(0, SRC_DIR)
+    from bdd import BDD
+    from bsd_io import parse_bsd_file
+    from cooling import AdaptiveCooling
+    from layout import SingleRowLayout
+    from single_row_kernel import SingleRowKernel
+
+    result = {}
+
+    start = time.perf_counter()
+    layers, var_sequence = parse_bsd_file(bsd_path)
+    result["parse_ms"] = (time.perf_counter() - start) * 1000
+
+    bdd = BDD()
+    start = time.perf_counter()
+    bdd.construct_from_layers(layers, var_sequence)
+    result["build_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    bdd._build_nets()
+    result["nets_ms"] = (time.perf_counter() - start) * 1000
+
+    result["transistors"] = bdd.get_transistor_count()
+    result["nets"] = len(bdd.get_nets())
+
+    layout = SingleRowLayout(bdd)
+    result["single_row_cost_per_s"] = throughput(layout.get_cost, budget_s)
+
+    # 内核构建单独计时；退火按时间预算运行，cost_history 每次尝试追加一项
+    start = time.perf_counter()
+    kernel = SingleRowKernel.from_layout(layout)
+    result["kernel_build_ms"] = (time.perf_counter() - start) * 1000
+    cost_history = []
+    start = time.perf_counter()
+    kernel.anneal(
+        None,
+        1000,
+        0.95,
+        1,
+        cost_history=cost_history,
+        schedule=AdaptiveCooling(),
+        deadline=time.monotonic() + budget_s,
+    )
+    result["single_row_moves_per_s"] = len(cost_history) / (time.perf_counter() - start)
+
+    if include_2d:
+        from layout import Layout
+        from simulated_annealing import SimulatedAnnealing
+        from standard_cell_layout import StandardCellLayout
+
+        layout_2d = Layout(bdd)
+        result["layout_cost_per_s"] = throughput(layout_2d.get_cost, budget_s)
+
+        cell_layout = StandardCellLayout(bdd)
+        result["standard_cell_neighbor_per_s"] = throughput(
+            cell_layout.generate_neighbor, budget_s
+        )
+
+        # SimulatedAnnealing 每100次迭代打印进度，计时时丢弃输出
+        iterations = 1000
+        annealer_2d = SimulatedAnnealing(layout_2d, schedule=AdaptiveCooling())
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            annealer_2d.optimize(iterations=iterations)
+        result["layout_moves_per_s"] = iterations / (time.perf_counter() - start)
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def measure_size(transistors, args, workdir):
+    """生成指定规模的BSD，在子进程中测量，返回结果字典"""
+    layers, width = shape_for_transistors(transistors)
+    bsd_path = os.path.join(workdir, f"synthetic_{transistors}.bsd")
+    write_bsd(
+        bsd_path,
+        layers,
+        width,
+        terminal_ratio=args.terminal_ratio,
+        sharing=args.sharing,
+        seed=args.seed,
+    )
+
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        bsd_path,
+        "--budget-ms",
+        str(args.budget_ms),
+    ]
+    if transistors > args.max_transistors_2d:
+        command.append("--skip-2d")
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    result = {"size": transistors, "layers": layers, "width": width}
+    result.update(json.loads(output.strip().splitlines()[-1]))
+    return result
+
+
+def compare_with_baseline(result, baseline, tolerance):
+    """按规模与历史结果比较，返回退化项列表"""
+    old_by_size = {entry["size"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in result["results"]:
+        old = old_by_size.get(entry["size"])
+        if old is None:
+            continue
+        for metric in TIME_METRICS + RATE_METRICS:
+            before, after = old.get(metric), entry.get(metric)
+            if not before or after is None:
+                continue
+            if metric in TIME_METRICS:
+                worse = after > before * (1 + tolerance)
+            else:
+                worse = after < before / (1 + tolerance)
+            if worse:
+                regressions.append(
+                    f"size={entry['size']} {metric}: {before:.4g} -> {after:.4g}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="组件级微基准测试")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="逗号分隔的目标晶体管数",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--terminal-ratio", type=float, default=DEFAULT_TERMINAL_RATIO)
+    parser.add_argument("--sharing", type=float, default=DEFAULT_SHARING)
+    parser.add_argument(
+        "--budget-ms", type=float, default=500, help="每项吞吐量指标的时间预算"
+    )
+    parser.add_argument(
+        "--max-transistors-2d", type=int, default=DEFAULT_MAX_TRANSISTORS_2D
+    )
+    parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    parser.add_argument("--baseline", help="历史结果JSON，用于检测退化")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    # 内部使用：在子进程中测量单个文件
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--skip-2d", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_size(args.child, args.budget_ms / 1000, not args.skip_2d)
+        print(json.dumps(result))
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    workdir = tempfile.mkdtemp(prefix="bench_components_")
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "terminal_ratio": args.terminal_ratio,
+        "sharing": args.sharing,
+        "budget_ms": args.budget_ms,
+        "results": [],
+    }
+    for size in sizes:
+        entry = measure_size(size, args, workdir)
+        result["results"].append(entry)
+        print(
+            f"size={size}: parse {entry['parse_ms']:.1f} ms, "
+            f"build {entry['build_ms']:.1f} ms, "
+            f"{entry['single_row_moves_per_s']:.0f} moves/s",
+            file=sys.stderr,
+        )
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"性能退化: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+启动开销基准测试。
+
+记录两项指标:
+  - import_time: 在全新解释器中导入 main_enhanced 所需时间
+  - time_to_first_cost: 运行可执行文件（默认 dist/main_enhanced，
+    不存在时退回 python src/main_enhanced.py）直到标准输出第一行成本的时间
+
+结果以JSON输出；指定 --baseline 时与历史结果比较，超过阈值则返回非零退出码。
+
+用法:
+    python benchmarks/bench_startup.py [--exe dist/main_enhanced] [--bsd sample.bsd]
+        [--repeat 10] [--output bench_startup.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main_enhanced; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import_time(repeat):
+    """在新解释器中测量 main_enhanced 的导入时间（秒）"""
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def measure_time_to_first_cost(command, repeat):
+    """测量从启动进程到读到第一行成本的时间（秒）"""
+    samples = []
+    # 在临时目录中运行，避免覆盖仓库中的结果文件
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            command,
+            cwd=workdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        first_line = proc.stdout.readline()
+        elapsed = time.perf_counter() - start
+        proc.wait()
+
+        float(first_line)  # 输出不是成本时直接报错，避免记录无效样本
+        samples.append(elapsed)
+    return samples
+
+
+def summarize(samples):
+    """汇总样本（毫秒）"""
+    return {
+        "min_ms": min(samples) * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+        "samples": len(samples),
+    }
+
+
+def compare_with_baseline(result, baseline, tolerance):
+    """与历史结果比较中位数，返回退化项列表"""
+    regressions = []
+    for metric in ("import_time", "time_to_first_cost"):
+        old = baseline.get(metric, {}).get("median_ms")
+        new = result[metric]["median_ms"]
+        if old and new > old * (1 + tolerance):
+            regressions.append(
+                f"{metric}: {old:.1f} ms -> {new:.1f} ms (+{(new / old - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main_enhanced 启动开销基准测试")
+    parser.add_argument("--exe", default=os.path.join("dist", "main_enhanced"))
+    parser.add_argument("--bsd", default="sample.bsd")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    parser.add_argument("--baseline", help="历史结果JSON，用于检测退化")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    exe = os.path.join(REPO_ROOT, args.exe)
+    bsd = os.path.join(REPO_ROOT, args.bsd)
+    if os.path.exists(exe):
+        command = [exe, bsd]
+    else:
+        command = [sys.executable, os.path.join(SRC_DIR, "main_enhanced.py"), bsd]
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "command": command,
+        "import_time": summarize(measure_import_time(args.repeat)),
+        "time_to_first_cost": summarize(
+            measure_time_to_first_cost(command, args.repeat)
+        ),
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"启动退化: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+合成BSD生成器。
+
+按层数、每层节点数、终端比例和共享密度生成合法的BSD文本，用于基准测试和压力测试:
+  - 每个节点是 (左目标, 右目标) 的分支节点，最后一层为 [(a,b)] 形式的叶子节点；
+  - 每个分支以 terminal_ratio 的概率直接连到终端 (-1 / -2)，否则连到下一层的节点；
+  - 连到下一层时以 sharing 的概率复用本层已经指向过的节点（扇入变大、网络变大），
+    否则优先指向尚未被指向的节点，使下一层尽量全部可达；
+  - 最后一行为变量序列 [0, 1, ..., 层数-1]。
+同一组参数和种子总是生成相同的文本。
+
+用法:
+    python benchmarks/generate_bsd.py out.bsd --transistors 10000 [--seed 1]
+    python benchmarks/generate_bsd.py out.bsd --layers 20 --width 8 --terminal-ratio 0.1 --sharing 0.3
+"""
+
+import argparse
+import math
+import random
+
+DEFAULT_TERMINAL_RATIO = 0.15
+DEFAULT_SHARING = 0.3
+
+
+def shape_for_transistors(transistors):
+    """给定目标晶体管数，返回近似方形的 (层数, 每层节点数)；每个节点2个晶体管"""
+    nodes = max(1, round(transistors / 2))
+    width = max(1, math.isqrt(nodes))
+    layers = max(1, round(nodes / width))
+    return layers, width
+
+
+def generate_bsd(
+    layers,
+    width,
+    terminal_ratio=DEFAULT_TERMINAL_RATIO,
+    sharing=DEFAULT_SHARING,
+    seed=None,
+):
+    """
+    生成BSD文本。
+    :param layers: 层数。
+    :param width: 每层节点数。
+    :param terminal_ratio: 分支直接连到终端的概率 (0~1)。
+    :param sharing: 连到下一层时复用已被指向节点的概率 (0~1)。
+    :param seed: 随机种子。
+    """
+    if layers < 1 or width < 1:
+        raise ValueError("层数和每层节点数必须为正")
+    rng = random.Random(seed)
+    lines = []
+    for layer_idx in range(layers):
+        last = layer_idx == layers - 1
+        used = []
+        unused = list(range(width))
+        rng.shuffle(unused)
+
+        def target():
+            if last or rng.random() < terminal_ratio:
+                return rng.choice((-1, -2))
+            if used and (not unused or rng.random() < sharing):
+                return rng.choice(used)
+            node = unused.pop()
+            used.append(node)
+            return node
+
+        nodes = [(target(), target()) for _ in range(width)]
+        if last:
+            lines.append(",".join(f"[({a},{b})]" for a, b in nodes))
+        else:
+            lines.append("[" + ",".join(f"({a},{b})" for a, b in nodes) + "]")
+
+    lines.append("[" + ",".join(str(k) for k in range(layers)) + "]")
+    return "\n".join(lines) + "\n"
+
+
+def write_bsd(path, layers, width, **options):
+    """生成BSD并写入文件"""
+    with open(path, "w") as f:
+        f.write(generate_bsd(layers, width, **options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成BSD生成器")
+    parser.add_argument("output", help="输出的BSD文件路径")
+    parser.add_argument(
+        "--transistors", type=int, help="目标晶体管数（自动确定层数和宽度）"
+    )
+    parser.add_argument("--layers", type=int)
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--terminal-ratio", type=float, default=DEFAULT_TERMINAL_RATIO)
+    parser.add_argument("--sharing", type=float, default=DEFAULT_SHARING)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.transistors is not None:
+        layers, width = shape_for_transistors(args.transistors)
+    elif args.layers is not None and args.width is not None:
+        layers, width = args.layers, args.width
+    else:
+        parser.error("需要 --transistors 或同时给出 --layers 和 --width")
+
+    write_bsd(
+        args.output,
+        layers,
+        width,
+        terminal_ratio=args.terminal_ratio,
+        sharing=args.sharing,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- mode: python ; coding: utf-8 -*-
+# 精简构建: 单行布局入口只依赖标准库，不打包 numpy/scipy/torch，
+# onefile 启动时无需解压和导入这些大型依赖。
+# 用法: pyinstaller main_enhanced_lean.spec
+
+excludes = [
+    'numpy',
+    'scipy',
+    'torch',
+    'pandas',
+    'matplotlib',
+    'tkinter',
+]
+
+
+a = Analysis(
+    ['src/main_enhanced.py'],
+    pathex=['src'],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=excludes,
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name='main_enhanced_lean',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=True,
+    upx=False,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
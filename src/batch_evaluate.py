@@ -0,0 +1,370 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import sys
+import time
+
+import instrumentation
+from bdd import BDD
+from bsd_io import parse_bsd_file
+from bsd_simulation import check_candidate
+from canonical_bsd import canonicalize_bsd
+from cooling import resolve_deadline
+from layout import SingleRowLayout
+from lower_bound import optimality_gap, single_row_lower_bound
+from main_enhanced import (
+    BSD_CACHE_DIR,
+    DEFAULT_ITERATIONS,
+    DEFAULT_W_AREA,
+    DEFAULT_W_WIRE,
+    ENGINES,
+    INITIAL_PLACEMENTS,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+    optimize_bdd,
+)
+from result_cache import ResultCache
+
+# 每个工作进程同时排队的任务数，保证结果可以边算边输出
+TASKS_PER_WORKER = 4
+
+# 每个进程的优化结果缓存，首次评估时创建
+_result_cache = None
+
+
+def _get_result_cache():
+    """本进程的结果缓存：进程内LRU，设置 RESULT_CACHE_DIR 时各进程共享磁盘缓存"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            RESULT_CACHE_DIR, max_disk_bytes=RESULT_CACHE_MAX_BYTES
+        )
+    return _result_cache
+
+
+def collect_bsd_files(inputs, manifest=None):
+    """
+    收集待评估的BSD文件。
+    inputs 中每项可以是目录（取其中所有 *.bsd）、通配符或文件路径；
+    manifest 为清单文件，每行一个路径，# 开头为注释。
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.bsd"))))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+
+    if manifest is not None:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(os.path.join(base_dir, line))
+
+    return paths
+
+
+def group_duplicates(paths):
+    """
+    按规范指纹（见 canonical_bsd.py）把结构相同的BSD文件分组，
+    返回 [(代表路径, 指纹, [重复路径...])]，按代表首次出现的顺序。
+    含不可达节点的文件单独成组：不可达节点在实际布局中仍产生晶体管，
+    与规范形式相同的其他文件成本不同。无法解析或规范化的文件单独成组，指纹为 None。
+    """
+    groups = []
+    group_of = {}
+    for path in paths:
+        try:
+            layers, var_sequence = parse_bsd_file(path)
+            canonical_bsd = canonicalize_bsd(layers, var_sequence)
+        except (OSError, ValueError):
+            groups.append((path, None, []))
+            continue
+        fingerprint = canonical_bsd.fingerprint
+        if canonical_bsd.pruned_nodes:
+            groups.append((path, fingerprint, []))
+            continue
+        group = group_of.get(fingerprint)
+        if group is None:
+            group_of[fingerprint] = group = (path, fingerprint, [])
+            groups.append(group)
+        else:
+            group[2].append(path)
+    return groups
+
+
+def _init_worker():
+    """预热工作进程：提前完成模块导入，避免第一个任务承担导入开销"""
+    import single_row_kernel  # noqa: F401
+
+
+def evaluate_bsd_file(
+    path,
+    w_wire,
+    w_area,
+    iterations,
+    seed,
+    time_budget_ms=None,
+    engine="auto",
+    initial="constructive",
+    profile=False,
+    validate=False,
+    reference=None,
+    reject_redundant=False,
+    keep_placement=False,
+):
+    """
+    评估单个BSD文件，返回一条结果记录；时间预算从任务开始执行时算起。
+    结构相同的文件在同一设置下复用缓存的结果，记录中 cached 表示结果来自缓存。
+    profile 为 True 时记录中含 profile（各阶段耗时和计数器，见 instrumentation.py）。
+    validate 为 True、给出 reference（参考BSD的 (层级结构, 变量序列)）或 reject_redundant 为 True 时，
+    优化前位并行模拟候选（见 bsd_simulation.check_candidate），不通过的文件不做布局，记录中含 error。
+    keep_placement 为 True 时记录中含 placement（最优晶体管顺序）。
+    """
+    stats = instrumentation.enable() if profile else None
+    start = time.perf_counter()
+    deadline = resolve_deadline(None, time_budget_ms)
+    result = {"path": path}
+    try:
+        bdd = BDD()
+        bdd.construct_from_bsd(path, cache_dir=BSD_CACHE_DIR)
+        if validate or reference is not None or reject_redundant:
+            with instrumentation.phase("simulate"):
+                check_candidate(
+                    bdd.layers, bdd.var_sequence, reference, reject_redundant
+                )
+        cache = _get_result_cache()
+        hits = cache.hits
+        _, optimized_layout = optimize_bdd(
+            bdd,
+            w_wire,
+            w_area,
+            iterations,
+            seed,
+            deadline=deadline,
+            engine=engine,
+            initial=initial,
+            time_budget_ms=time_budget_ms,
+            cache=cache,
+        )
+        result["cached"] = cache.hits > hits
+        result["cost"] = optimized_layout.get_cost()
+        result["wire_cost"] = optimized_layout.calculate_wire_length()
+        result["area_cost"] = optimized_layout.calculate_area_cost()
+        result["lower_bound"] = single_row_lower_bound(bdd, w_wire, w_area)
+        result["optimality_gap"] = optimality_gap(result["cost"], result["lower_bound"])
+        if keep_placement:
+            result["placement"] = list(optimized_layout.placement)
+    except Exception as e:
+        result["cost"] = None
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["runtime"] = time.perf_counter() - start
+    if stats is not None:
+        instrumentation.disable()
+        result["profile"] = stats.to_dict()
+    return result
+
+
+def _evaluate_duplicate(path, source, canonical_placement, w_wire, w_area):
+    """
+    重复文件的记录：规范形式中的最优顺序翻译为本文件的晶体管id，在本文件的BDD上计算成本。
+    代表文件评估失败（canonical_placement 为 None）时复制其记录。
+    """
+    start = time.perf_counter()
+    result = dict(source, path=path, duplicate_of=source["path"])
+    result.pop("profile", None)
+    if canonical_placement is not None:
+        try:
+            bdd = BDD()
+            bdd.construct_from_bsd(path, cache_dir=BSD_CACHE_DIR)
+            canonical_bsd = canonicalize_bsd(bdd.layers, bdd.var_sequence)
+            layout = SingleRowLayout(
+                bdd,
+                w_wire,
+                w_area,
+                placement=canonical_bsd.to_original(canonical_placement),
+            )
+            result["cost"] = layout.get_cost()
+            result["wire_cost"] = layout.calculate_wire_length()
+            result["area_cost"] = layout.calculate_area_cost()
+            result["lower_bound"] = single_row_lower_bound(bdd, w_wire, w_area)
+            result["optimality_gap"] = optimality_gap(
+                result["cost"], result["lower_bound"]
+            )
+        except Exception as e:
+            for field in ("wire_cost", "area_cost", "lower_bound", "optimality_gap"):
+                result.pop(field, None)
+            result["cost"] = None
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["runtime"] = time.perf_counter() - start
+    return result
+
+
+def evaluate_group(path, fingerprint=None, duplicates=(), **options):
+    """
+    评估一组结构相同的文件（见 group_duplicates）：代表文件按自身的BDD优化，结果与不去重时相同；
+    其余文件复用代表的最优顺序（经规范形式翻译晶体管id），在各自的BDD上计算成本。
+    :param options: 传给 evaluate_bsd_file 的参数，须含 w_wire、w_area。
+    :return: [代表文件的记录, 各重复文件的记录...]，重复文件的记录以 duplicate_of 标明代表文件。
+    """
+    result = evaluate_bsd_file(path, keep_placement=bool(duplicates), **options)
+    placement = result.pop("placement", None)
+    if fingerprint is not None:
+        result["fingerprint"] = fingerprint
+    canonical_placement = None
+    if placement is not None:
+        canonical_placement = canonicalize_bsd(*parse_bsd_file(path)).to_canonical(
+            placement
+        )
+    records = [result]
+    for duplicate in duplicates:
+        records.append(
+            _evaluate_duplicate(
+                duplicate,
+                result,
+                canonical_placement,
+                options["w_wire"],
+                options["w_area"],
+            )
+        )
+    return records
+
+
+def run_batch(paths, output, workers=None, dedup=False, **options):
+    """
+    使用进程池并行评估多个BSD文件，按完成顺序逐行输出JSON结果。
+    :param dedup: 优化前按规范指纹合并结构相同的文件，每组只优化代表文件，
+        其余文件复用其最优顺序并以 duplicate_of 标明代表文件（见 evaluate_group）。
+    :param options: 传给 evaluate_bsd_file 的 w_wire, w_area, iterations, seed, time_budget_ms, engine, initial, profile,
+        validate, reference, reject_redundant。
+    :return: 成功评估的文件数
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * TASKS_PER_WORKER
+    succeeded = 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker
+    ) as pool:
+        if dedup:
+            remaining = iter(group_duplicates(paths))
+        else:
+            remaining = ((path, None, []) for path in paths)
+        pending = set()
+        while True:
+            # 限制排队任务数，清单很长时也能尽早开始输出
+            for path, fingerprint, duplicates in remaining:
+                future = pool.submit(
+                    evaluate_group, path, fingerprint, duplicates, **options
+                )
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                for record in future.result():
+                    succeeded += record["cost"] is not None
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+    return succeeded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main_enhanced --batch",
+        description="并行评估多个BSD文件的单行布局成本，按完成顺序输出JSON Lines",
+    )
+    parser.add_argument("inputs", nargs="*", help="BSD文件、目录或通配符")
+    parser.add_argument("--manifest", help="清单文件，每行一个BSD路径")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认CPU核数")
+    parser.add_argument("--w-wire", type=float, default=DEFAULT_W_WIRE)
+    parser.add_argument("--w-area", type=float, default=DEFAULT_W_AREA)
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=None,
+        help=f"迭代次数，默认 {DEFAULT_ITERATIONS}；给出时间预算时默认不限",
+    )
+    parser.add_argument(
+        "--time-budget-ms", type=float, default=None, help="每个文件的时间预算（毫秒）"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    parser.add_argument("--initial", choices=INITIAL_PLACEMENTS, default="constructive")
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="按规范指纹合并结构相同的文件，每组只优化一次，其余文件复用最优顺序",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="在每条记录中附带各阶段耗时和退火统计"
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="优化前模拟每个候选，结构无效的文件不做布局",
+    )
+    parser.add_argument(
+        "--reference", help="参考BSD文件，与之计算的函数不同的候选不做布局"
+    )
+    parser.add_argument(
+        "--reject-redundant",
+        action="store_true",
+        help="含可合并节点（同层两个节点计算相同函数）的候选不做布局",
+    )
+    parser.add_argument("--output", help="结果文件路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    iterations = args.iterations
+    if iterations is None and args.time_budget_ms is None:
+        iterations = DEFAULT_ITERATIONS
+
+    reference = None
+    if args.reference is not None:
+        try:
+            reference = parse_bsd_file(args.reference)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法读取参考BSD {args.reference}: {e}")
+
+    paths = collect_bsd_files(args.inputs, args.manifest)
+    if not paths:
+        parser.error("没有找到BSD文件")
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        run_batch(
+            paths,
+            output,
+            workers=args.workers,
+            dedup=args.dedup,
+            w_wire=args.w_wire,
+            w_area=args.w_area,
+            iterations=iterations,
+            seed=args.seed,
+            time_budget_ms=args.time_budget_ms,
+            engine=args.engine,
+            initial=args.initial,
+            profile=args.profile,
+            validate=args.validate,
+            reference=reference,
+            reject_redundant=args.reject_redundant,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,163 @@
-import ast
+from array import array
+from collections.abc import Sequence
+
+import instrumentation
+from bsd_io import BSDBinaryCache, content_hash, parse_bsd_file, parse_bsd_lines
+
+# 晶体管类型编码，下标即类型码
+TRANSISTOR_TYPES = ("switch", "leaf_switch", "leaf")
+TYPE_SWITCH = 0
+TYPE_LEAF_SWITCH = 1
+TYPE_LEAF = 2
+
+# 无分支（单值叶子）或无控制变量时在数组中的占位值
+NO_VALUE = -1
+
+
+class TransistorView(Sequence):
+    """
+    晶体管信息的兼容视图。
+    按id访问时才由BDD的并行数组生成对应的字典（包括描述字符串），
+    因此只在需要时付出格式化的开销。
+    """
+
+    def __init__(self, bdd):
+        self._bdd = bdd
+
+    def __len__(self):
+        return self._bdd.get_transistor_count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            return [self._bdd.get_transistor(i) for i in indices]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"晶体管id超出范围: {index}")
+        return self._bdd.get_transistor(index)
 
 
 class BDD:
     def __init__(self):
         self.layers = []
         self.var_sequence = []
-        self.transistors = []
         self.nets = []
+        self._transistor_nets = None
+        self._net_csr = None
+        self._reset_transistor_arrays()
+
+    def _reset_transistor_arrays(self):
+        """晶体管以并行数组（结构数组）形式保存，下标即晶体管id"""
+        self.t_layer = array("l")
+        self.t_node = array("l")
+        self.t_branch = array("b")  # 0 左分支, 1 右分支, NO_VALUE 无分支
+        self.t_type = array("b")  # TRANSISTOR_TYPES 中的类型码
+        self.t_target = array("l")  # BSD中的原始目标值: >=0 为下一层节点, 负数为终端
+        self.t_control = array("l")  # 控制变量, NO_VALUE 表示无
+
+    @property
+    def transistors(self):
+        """晶体管信息的兼容视图（按id索引的字典序列）"""
+        return TransistorView(self)
+
+    def construct_from_bsd(self, bsd_file, cache_dir=None):
+        """
+        从BSD文件构建BDD。
+        指定 cache_dir 时使用以文件内容哈希为键的二进制缓存，
+        命中则直接载入解析结果和网络，跳过解析与构建。
+        """
+        if cache_dir is None:
+            with instrumentation.phase("parse"):
+                self.layers, self.var_sequence = self._parse_bsd_file(bsd_file)
+            with instrumentation.phase("net_build"):
+                self._build_transistor_network()
+            return
 
-    def construct_from_bsd(self, bsd_file):
-        """从BSD文件构建BDD"""
-        self.layers, self.var_sequence = self._parse_bsd_file(bsd_file)
+        # 命中缓存时载入的耗时计入 parse 阶段
+        with instrumentation.phase("parse"):
+            with open(bsd_file, "rb") as file:
+                data = file.read()
+            cache = BSDBinaryCache(cache_dir)
+            key = content_hash(data)
+            cached = cache.load(key)
+        instrumentation.count("bsd_cache_hits" if cached else "bsd_cache_misses")
+        if cached is not None:
+            self.layers = cached["layers"]
+            self.var_sequence = cached["var_sequence"]
+            self.t_layer = cached["t_layer"]
+            self.t_node = cached["t_node"]
+            self.t_branch = cached["t_branch"]
+            self.t_type = cached["t_type"]
+            self.t_target = cached["t_target"]
+            self.t_control = cached["t_control"]
+            self.nets = cached["nets"]
+            self._transistor_nets = None
+            self._net_csr = None
+            return
+
+        self.construct_from_bsd_text(data.decode())
+        cache.store(key, self)
+
+    def construct_from_bsd_text(self, bsd_text):
+        """从BSD文本内容构建BDD（常驻进程模式下无需落盘）"""
+        with instrumentation.phase("parse"):
+            self.layers, self.var_sequence = self._parse_bsd_lines(
+                bsd_text.splitlines()
+            )
+        with instrumentation.phase("net_build"):
+            self._build_transistor_network()
+
+    def construct_from_layers(self, layers, var_sequence):
+        """由已解析的层级结构和变量序列构建BDD（如 canonical_bsd 的规范形式）"""
+        self.layers, self.var_sequence = layers, var_sequence
         self._build_transistor_network()
 
     def _parse_bsd_file(self, filepath):
         """解析BSD文件，返回层级结构和变量序列"""
-        with open(filepath, "r") as file:
-            lines = file.readlines()
-
-        layers = []
-        for line in lines[:-1]:  # 除了最后一行
-            line = line.strip()
-            if line:
-                # 解析如 [(0,1),(-1,2)] 的格式
-                layer_data = ast.literal_eval(line)
-                layers.append(layer_data)
+        return parse_bsd_file(filepath)
 
-        # 最后一行是变量序列
-        var_sequence = ast.literal_eval(lines[-1].strip())
+    def _parse_bsd_lines(self, lines):
+        """解析BSD文本行，返回层级结构和变量序列"""
+        return parse_bsd_lines(lines)
 
-        return layers, var_sequence
+    def _add_transistor(self, layer_idx, node_idx, branch, type_code, target, control):
+        """追加一个晶体管到并行数组"""
+        self.t_layer.append(layer_idx)
+        self.t_node.append(node_idx)
+        self.t_branch.append(branch)
+        self.t_type.append(type_code)
+        self.t_target.append(target)
+        self.t_control.append(control)
 
     def _build_transistor_network(self):
-        """根据BSD结构构建晶体管网络"""
-        transistor_id = 0
+        """
+        根据BSD结构构建晶体管网络。
+        :raises ValueError: 节点格式无法识别（如三元组）。
+        """
+        self._reset_transistor_arrays()
 
         for layer_idx, layer in enumerate(self.layers):
+            # 获取控制变量
+            control_var = (
+                self.var_sequence[layer_idx]
+                if layer_idx < len(self.var_sequence)
+                else NO_VALUE
+            )
+
             # 每个layer中的每个元素代表一个BDD节点
             for node_idx, node_data in enumerate(layer):
                 # 处理不同类型的节点数据
                 if isinstance(node_data, tuple) and len(node_data) == 2:
-                    # 标准的分支节点 (left_target, right_target)
+                    # 标准的分支节点 (left_target, right_target)：
+                    # 左分支在控制变量=0时导通，右分支在控制变量=1时导通
                     left_target, right_target = node_data
-
-                    # 获取控制变量
-                    control_var = (
-                        self.var_sequence[layer_idx]
-                        if layer_idx < len(self.var_sequence)
-                        else None
+                    self._add_transistor(
+                        layer_idx, node_idx, 0, TYPE_SWITCH, left_target, control_var
+                    )
+                    self._add_transistor(
+                        layer_idx, node_idx, 1, TYPE_SWITCH, right_target, control_var
                     )
-
-                    # 创建左分支晶体管 (当控制变量=0时导通)
-                    left_transistor = {
-                        "id": transistor_id,
-                        "layer": layer_idx,
-                        "node": node_idx,
-                        "branch": 0,  # 左分支
-                        "type": "switch",
-                        "source": (layer_idx, node_idx),
-                        "target": self._format_target(left_target, layer_idx),
-                        "control": control_var,
-                        "activation_condition": f"var_{control_var} == 0",
-                        "description": f"Switch T{transistor_id}: ({layer_idx},{node_idx}) → {self._format_target(left_target, layer_idx)} when var_{control_var}=0",
-                    }
-                    self.transistors.append(left_transistor)
-                    transistor_id += 1
-
-                    # 创建右分支晶体管 (当控制变量=1时导通)
-                    right_transistor = {
-                        "id": transistor_id,
-                        "layer": layer_idx,
-                        "node": node_idx,
-                        "branch": 1,  # 右分支
-                        "type": "switch",
-                        "source": (layer_idx, node_idx),
-                        "target": self._format_target(right_target, layer_idx),
-                        "control": control_var,
-                        "activation_condition": f"var_{control_var} == 1",
-                        "description": f"Switch T{transistor_id}: ({layer_idx},{node_idx}) → {self._format_target(right_target, layer_idx)} when var_{control_var}=1",
-                    }
-                    self.transistors.append(right_transistor)
-                    transistor_id += 1
 
                 elif isinstance(node_data, list) and len(node_data) == 1:
                     # 叶子节点 [value] 或 [(-2,-1)]
@@ -89,67 +166,34 @@ class BDD:
                     if isinstance(value, tuple) and len(value) == 2:
                         # 叶子节点 [(-2,-1)] - 仍然是左右两个晶体管
                         left_output, right_output = value
-
-                        # 获取控制变量
-                        control_var = (
-                            self.var_sequence[layer_idx]
-                            if layer_idx < len(self.var_sequence)
-                            else None
+                        self._add_transistor(
+                            layer_idx,
+                            node_idx,
+                            0,
+                            TYPE_LEAF_SWITCH,
+                            left_output,
+                            control_var,
+                        )
+                        self._add_transistor(
+                            layer_idx,
+                            node_idx,
+                            1,
+                            TYPE_LEAF_SWITCH,
+                            right_output,
+                            control_var,
                         )
-
-                        # 创建左分支晶体管
-                        left_transistor = {
-                            "id": transistor_id,
-                            "layer": layer_idx,
-                            "node": node_idx,
-                            "branch": 0,
-                            "type": "leaf_switch",
-                            "source": (layer_idx, node_idx),
-                            "target": self._format_target(left_output, layer_idx),
-                            "control": control_var,
-                            "activation_condition": f"var_{control_var} == 0",
-                            "description": f"LeafSwitch T{transistor_id}: ({layer_idx},{node_idx}) → {self._format_target(left_output, layer_idx)} when var_{control_var}=0",
-                        }
-                        self.transistors.append(left_transistor)
-                        transistor_id += 1
-
-                        # 创建右分支晶体管
-                        right_transistor = {
-                            "id": transistor_id,
-                            "layer": layer_idx,
-                            "node": node_idx,
-                            "branch": 1,
-                            "type": "leaf_switch",
-                            "source": (layer_idx, node_idx),
-                            "target": self._format_target(right_output, layer_idx),
-                            "control": control_var,
-                            "activation_condition": f"var_{control_var} == 1",
-                            "description": f"LeafSwitch T{transistor_id}: ({layer_idx},{node_idx}) → {self._format_target(right_output, layer_idx)} when var_{control_var}=1",
-                        }
-                        self.transistors.append(right_transistor)
-                        transistor_id += 1
                     else:
-                        # 单值叶子节点 [value] - 只有一个晶体管
-                        transistor = {
-                            "id": transistor_id,
-                            "layer": layer_idx,
-                            "node": node_idx,
-                            "branch": None,
-                            "type": "leaf",
-                            "source": (layer_idx, node_idx),
-                            "target": self._format_target(value, layer_idx),
-                            "control": None,
-                            "activation_condition": "always",
-                            "description": f"Leaf T{transistor_id}: ({layer_idx},{node_idx}) → {self._format_target(value, layer_idx)}",
-                        }
-                        self.transistors.append(transistor)
-                        transistor_id += 1
+                        # 单值叶子节点 [value] - 只有一个晶体管，始终导通
+                        self._add_transistor(
+                            layer_idx, node_idx, NO_VALUE, TYPE_LEAF, value, NO_VALUE
+                        )
 
                 else:
-                    print(
-                        f"警告: 无法识别的节点数据格式: {node_data} (类型: {type(node_data)})"
+                    # 丢弃节点会让布局少算晶体管，常驻进程模式下打印还会打乱一问一答的输出
+                    raise ValueError(
+                        f"无法识别的节点数据格式: {node_data} (类型: {type(node_data).__name__})，"
+                        f"位置: Layer{layer_idx}, Node{node_idx}"
                     )
-                    print(f"  位置: Layer{layer_idx}, Node{node_idx}")
 
         self._build_nets()
 
@@ -166,23 +210,39 @@ class BDD:
 
     def _build_nets(self):
         """构建网络连接"""
-        # 网络连接基于节点位置
-        node_connections = {}
+        # 网络连接基于节点位置。节点按层偏移编号为整数以加快哈希；
+        # 指向不存在的层或节点的目标仍以 (layer, node) 元组为键。
+        layer_widths = [len(layer) for layer in self.layers]
+        layer_offsets = [0]
+        for width in layer_widths:
+            layer_offsets.append(layer_offsets[-1] + width)
+        num_layers = len(self.layers)
 
-        for transistor in self.transistors:
-            source = transistor["source"]
+        node_connections = {}
+        for tid in range(len(self.t_layer)):
+            layer_idx = self.t_layer[tid]
 
             # 处理源节点连接
-            if source not in node_connections:
-                node_connections[source] = []
-            node_connections[source].append(transistor["id"])
-
-            # 处理目标节点连接
-            target = transistor["target"]
-            if isinstance(target, tuple):  # 非终端节点
-                if target not in node_connections:
-                    node_connections[target] = []
-                node_connections[target].append(transistor["id"])
+            source = layer_offsets[layer_idx] + self.t_node[tid]
+            connections = node_connections.get(source)
+            if connections is None:
+                node_connections[source] = [tid]
+            else:
+                connections.append(tid)
+
+            # 处理目标节点连接（终端输出不构成网络）
+            target = self.t_target[tid]
+            if target >= 0:
+                target_layer = layer_idx + 1
+                if target_layer < num_layers and target < layer_widths[target_layer]:
+                    target = layer_offsets[target_layer] + target
+                else:
+                    target = (target_layer, target)
+                connections = node_connections.get(target)
+                if connections is None:
+                    node_connections[target] = [tid]
+                else:
+                    connections.append(tid)
 
         # 只保留有多个连接的节点作为网络
         self.nets = [
@@ -190,19 +250,107 @@ class BDD:
             for connections in node_connections.values()
             if len(connections) > 1
         ]
+        self._transistor_nets = None
+        self._net_csr = None
 
     def get_transistor_count(self):
         """获取晶体管数量"""
-        return len(self.transistors)
+        return len(self.t_layer)
 
     def get_nets(self):
         """获取网络连接"""
         return self.nets
 
+    def get_transistor_nets(self):
+        """
+        获取网络共享索引：按晶体管id索引，每项为该晶体管所属网络编号的元组。
+        每个晶体管只连接源、目标两个节点，因此至多属于两个网络，
+        "两个晶体管是否共享网络" 只需比较两个短元组，为 O(1)。
+        索引在首次调用时由 get_nets() 构建一次并缓存。
+        """
+        if self._transistor_nets is None:
+            transistor_nets = [[] for _ in range(self.get_transistor_count())]
+            for net_idx, net in enumerate(self.get_nets()):
+                for pin in net:
+                    transistor_nets[pin].append(net_idx)
+            self._transistor_nets = [tuple(net_ids) for net_ids in transistor_nets]
+        return self._transistor_nets
+
+    def get_net_csr(self):
+        """
+        获取网络的CSR表示 (net_ptr, net_pins)：
+        net_pins[net_ptr[k]:net_ptr[k + 1]] 为第 k 个网络的晶体管id。
+        首次调用时由 get_nets() 构建一次并缓存。
+        """
+        if self._net_csr is None:
+            net_ptr = array("l", [0])
+            net_pins = array("l")
+            for net in self.get_nets():
+                net_pins.extend(net)
+                net_ptr.append(len(net_pins))
+            self._net_csr = (net_ptr, net_pins)
+        return self._net_csr
+
+    def share_net(self, tid1, tid2):
+        """判断两个晶体管是否属于同一个网络（可共享扩散区）"""
+        transistor_nets = self.get_transistor_nets()
+        nets2 = transistor_nets[tid2]
+        return any(net_idx in nets2 for net_idx in transistor_nets[tid1])
+
     def get_transistors(self):
-        """获取晶体管信息"""
+        """获取晶体管信息（兼容视图，按需生成字典）"""
         return self.transistors
 
+    def get_transistor_type(self, tid):
+        """获取晶体管类型名称"""
+        return TRANSISTOR_TYPES[self.t_type[tid]]
+
+    def get_transistor_target(self, tid):
+        """获取晶体管格式化后的目标节点"""
+        return self._format_target(self.t_target[tid], self.t_layer[tid])
+
+    def get_transistor(self, tid):
+        """生成单个晶体管的信息字典（与旧版字典格式一致）"""
+        layer_idx = self.t_layer[tid]
+        branch = self.t_branch[tid]
+        control = self.t_control[tid]
+        return {
+            "id": tid,
+            "layer": layer_idx,
+            "node": self.t_node[tid],
+            "branch": None if branch == NO_VALUE else branch,
+            "type": self.get_transistor_type(tid),
+            "source": (layer_idx, self.t_node[tid]),
+            "target": self.get_transistor_target(tid),
+            "control": None if control == NO_VALUE else control,
+            "activation_condition": self.get_activation_condition(tid),
+            "description": self.describe_transistor(tid),
+        }
+
+    def get_activation_condition(self, tid):
+        """按需生成晶体管的导通条件"""
+        if self.t_type[tid] == TYPE_LEAF:
+            return "always"
+        control = self.t_control[tid]
+        control = None if control == NO_VALUE else control
+        return f"var_{control} == {self.t_branch[tid]}"
+
+    def describe_transistor(self, tid):
+        """按需生成晶体管的描述字符串"""
+        type_code = self.t_type[tid]
+        source = f"({self.t_layer[tid]},{self.t_node[tid]})"
+        target = self.get_transistor_target(tid)
+        if type_code == TYPE_LEAF:
+            return f"Leaf T{tid}: {source} → {target}"
+
+        control = self.t_control[tid]
+        control = None if control == NO_VALUE else control
+        name = "Switch" if type_code == TYPE_SWITCH else "LeafSwitch"
+        return (
+            f"{name} T{tid}: {source} → {target} "
+            f"when var_{control}={self.t_branch[tid]}"
+        )
+
     def print_transistor_info(self):
         """打印晶体管信息（调试用）"""
         print("晶体管信息:")
@@ -241,8 +389,8 @@ class BDD:
             # 显示网络中晶体管的详细信息
             transistor_info = []
             for tid in net:
-                if tid < len(self.transistors):
-                    transistor = self.transistors[tid]
+                if tid < self.get_transistor_count():
+                    transistor = self.get_transistor(tid)
                     branch_info = (
                         f"L{transistor['branch']}"
                         if transistor["branch"] is not None
@@ -269,28 +417,27 @@ class BDD:
 
         # 按层和类型统计晶体管
         layer_stats = {}
-        for t in self.transistors:
-            layer = t["layer"]
+        for layer, type_code in zip(self.t_layer, self.t_type):
             if layer not in layer_stats:
                 layer_stats[layer] = {"switch": 0, "leaf_switch": 0, "leaf": 0}
-            layer_stats[layer][t["type"]] += 1
+            layer_stats[layer][TRANSISTOR_TYPES[type_code]] += 1
 
         # print("  各层晶体管统计:")
         for layer, stats in layer_stats.items():
             total = sum(stats.values())
-            #print(
+            # print(
             #    f"    Layer{layer}: {total}个晶体管 "
             #    f"({stats['switch']}个开关, {stats['leaf_switch']}个叶子开关, {stats['leaf']}个叶子)"
-            #)
+            # )
 
         # 显示每层的具体结构
-        #print("\n  各层详细结构:")
+        # print("\n  各层详细结构:")
         for layer_idx, layer in enumerate(self.layers):
-            #print(f"    Layer{layer_idx}: {layer}")
+            # print(f"    Layer{layer_idx}: {layer}")
             if layer_idx < len(self.var_sequence):
                 pass
-                #print(f"      控制变量: var_{self.var_sequence[layer_idx]}")
-                #print(f"      每个节点产生2个晶体管")
+                # print(f"      控制变量: var_{self.var_sequence[layer_idx]}")
+                # print(f"      每个节点产生2个晶体管")
 
     def validate_structure(self):
         """验证BDD结构的正确性"""
@@ -303,9 +450,12 @@ class BDD:
             )
 
         # 检查每层的晶体管数量
+        layer_counts = [0] * len(self.layers)
+        for layer_idx in self.t_layer:
+            layer_counts[layer_idx] += 1
         for layer_idx, layer in enumerate(self.layers):
             expected_count = len(layer) * 2  # 每个节点产生2个晶体管
-            actual_count = sum(1 for t in self.transistors if t["layer"] == layer_idx)
+            actual_count = layer_counts[layer_idx]
             if expected_count != actual_count:
                 print(
                     f"  错误: Layer{layer_idx}期望{expected_count}个晶体管，实际{actual_count}个"
@@ -314,23 +464,21 @@ class BDD:
                 print(f"  ✓ Layer{layer_idx}: {actual_count}个晶体管")
 
         # 检查目标节点的有效性
-        for t in self.transistors:
-            target = t["target"]
-            if isinstance(target, tuple):
-                target_layer, target_node = target
+        for tid in range(self.get_transistor_count()):
+            target_node = self.t_target[tid]
+            if target_node >= 0:
+                target_layer = self.t_layer[tid] + 1
                 # 检查目标层是否存在
                 if target_layer < len(self.layers):
                     if target_node >= len(self.layers[target_layer]):
                         print(
-                            f"  错误: T{t['id']}的目标({target_node})超出Layer{target_layer}范围"
+                            f"  错误: T{tid}的目标({target_node})超出Layer{target_layer}范围"
                         )
                 else:
-                    print(f"  错误: T{t['id']}的目标层({target_layer})不存在")
+                    print(f"  错误: T{tid}的目标层({target_layer})不存在")
 
         # 检查叶子节点
-        leaf_count = sum(
-            1 for t in self.transistors if t["type"] in ["leaf", "leaf_switch"]
-        )
+        leaf_count = sum(1 for type_code in self.t_type if type_code != TYPE_SWITCH)
         if leaf_count > 0:
             print(f"  ✓ 发现{leaf_count}个叶子节点晶体管")
 
@@ -338,11 +486,15 @@ class BDD:
 
     def get_leaf_transistors(self):
         """获取所有叶子节点晶体管"""
-        return [t for t in self.transistors if t["type"] in ["leaf", "leaf_switch"]]
+        return [
+            self.get_transistor(tid)
+            for tid, type_code in enumerate(self.t_type)
+            if type_code != TYPE_SWITCH
+        ]
 
     def get_connection_matrix(self):
         """获取晶体管连接矩阵（用于布局优化）"""
-        n = len(self.transistors)
+        n = self.get_transistor_count()
         connection_matrix = [[0] * n for _ in range(n)]
 
         for net in self.nets:
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import re
+import struct
+from array import array
+
+# 标准层格式 [(a,b),(c,d),...]，可以直接按整数成对读取
+_STANDARD_LAYER = re.compile(r"\[\s*(?:\(\s*-?\d+\s*,\s*-?\d+\s*\)\s*,?\s*)*\]")
+_INTEGER = re.compile(r"-?\d+")
+_TOKEN = re.compile(r"\s*(?:(-?\d+)|([\[\]\(\),]))")
+
+# 二进制缓存文件格式
+CACHE_MAGIC = b"BSDC"
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".bsdc"
+
+# 缓存中保存的晶体管并行数组（BDD属性名）
+_TRANSISTOR_FIELDS = (
+    "t_layer",
+    "t_node",
+    "t_branch",
+    "t_type",
+    "t_target",
+    "t_control",
+)
+
+# 缓存中层节点的编码：(a,b) / [(a,b)] / [v]
+NODE_PAIR = 0
+NODE_LEAF_PAIR = 1
+NODE_LEAF_VALUE = 2
+
+
+def parse_literal(line):
+    """
+    解析一行由整数、列表、元组组成的字面量，结果与 ast.literal_eval 一致。
+    顶层以逗号分隔的多个元素（如 [(-2,-1)],[(-2,-1)]）解析为元组。
+    """
+    if _STANDARD_LAYER.fullmatch(line):
+        values = iter([int(v) for v in _INTEGER.findall(line)])
+        return list(zip(values, values))
+
+    stack = [[]]  # 每个元素为正在构建的容器，栈底为顶层
+    closers = []  # 与 stack[1:] 对应的结束符
+    top_level_comma = False
+    pos = 0
+    end = len(line.rstrip())
+    while pos < end:
+        match = _TOKEN.match(line, pos)
+        if match is None:
+            raise ValueError(f"无法解析BSD行 (位置 {pos}): {line.strip()}")
+        pos = match.end()
+        number, symbol = match.groups()
+
+        if number is not None:
+            stack[-1].append(int(number))
+        elif symbol == "[":
+            stack.append([])
+            closers.append("]")
+        elif symbol == "(":
+            stack.append([])
+            closers.append(")")
+        elif symbol in "])":
+            if not closers or closers.pop() != symbol:
+                raise ValueError(f"括号不匹配 (位置 {pos}): {line.strip()}")
+            items = stack.pop()
+            stack[-1].append(items if symbol == "]" else tuple(items))
+        elif len(stack) == 1:
+            top_level_comma = True
+
+    if closers:
+        raise ValueError(f"括号未闭合: {line.strip()}")
+    items = stack[0]
+    if top_level_comma:
+        return tuple(items)
+    if len(items) != 1:
+        raise ValueError(f"无法解析BSD行: {line.strip()}")
+    return items[0]
+
+
+def parse_bsd_lines(lines):
+    """
+    流式解析BSD文本行，返回 (层级结构, 变量序列)。
+    空行被跳过，最后一个非空行为变量序列。
+    """
+    layers = []
+    pending = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if pending is not None:
+            # 解析如 [(0,1),(-1,2)] 的格式
+            layers.append(parse_literal(pending))
+        pending = line
+
+    if pending is None:
+        raise ValueError("BSD内容为空")
+
+    # 最后一行是变量序列
+    var_sequence = parse_literal(pending)
+    return layers, var_sequence
+
+
+def parse_bsd_file(filepath):
+    """逐行流式解析BSD文件，返回 (层级结构, 变量序列)"""
+    with open(filepath, "r") as file:
+        return parse_bsd_lines(file)
+
+
+def _format_node(node):
+    if isinstance(node, tuple):
+        return "(" + ",".join(str(v) for v in node) + ")"
+    if isinstance(node, list):
+        return "[" + ",".join(_format_node(v) for v in node) + "]"
+    return str(node)
+
+
+def format_bsd(layers, var_sequence):
+    """层级结构和变量序列格式化为BSD文本，parse_bsd_lines 的逆操作"""
+    lines = [_format_node(list(layer)) for layer in layers]
+    lines.append(_format_node(list(var_sequence)))
+    return "\n".join(lines) + "\n"
+
+
+def content_hash(data):
+    """BSD文件内容的哈希，作为二进制缓存的键"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _encode_layers(layers):
+    """把层级结构编码为数组，遇到无法编码的结构返回 None"""
+    layer_ptr = array("l", [0])
+    layer_is_tuple = array("b")
+    kinds = array("b")
+    first = array("l")
+    second = array("l")
+    for layer in layers:
+        if not isinstance(layer, (list, tuple)):
+            return None
+        for node in layer:
+            if isinstance(node, tuple) and len(node) == 2:
+                kind, a, b = NODE_PAIR, node[0], node[1]
+            elif isinstance(node, list) and len(node) == 1:
+                value = node[0]
+                if isinstance(value, tuple) and len(value) == 2:
+                    kind, a, b = NODE_LEAF_PAIR, value[0], value[1]
+                else:
+                    kind, a, b = NODE_LEAF_VALUE, value, 0
+            else:
+                return None
+            if not (type(a) is int and type(b) is int):
+                return None
+            kinds.append(kind)
+            first.append(a)
+            second.append(b)
+        layer_ptr.append(len(kinds))
+        # 顶层以逗号分隔的行（如 [(-2,-1)],[(-2,-1)]）解析结果是元组
+        layer_is_tuple.append(isinstance(layer, tuple))
+    return layer_ptr, layer_is_tuple, kinds, first, second
+
+
+def _decode_layers(layer_ptr, layer_is_tuple, kinds, first, second):
+    """由数组还原层级结构"""
+    layers = []
+    for k in range(len(layer_ptr) - 1):
+        start, end = layer_ptr[k], layer_ptr[k + 1]
+        if not layer_is_tuple[k] and kinds[start:end].count(NODE_PAIR) == end - start:
+            layers.append(list(zip(first[start:end], second[start:end])))
+            continue
+
+        layer = []
+        for i in range(start, end):
+            if kinds[i] == NODE_PAIR:
+                layer.append((first[i], second[i]))
+            elif kinds[i] == NODE_LEAF_PAIR:
+                layer.append([(first[i], second[i])])
+            else:
+                layer.append([first[i]])
+        layers.append(tuple(layer) if layer_is_tuple[k] else layer)
+    return layers
+
+
+def _write_arrays(file, arrays):
+    """依次写出数组：类型码、元素大小、长度、原始字节"""
+    file.write(CACHE_MAGIC + struct.pack("<HH", CACHE_VERSION, len(arrays)))
+    for arr in arrays:
+        file.write(struct.pack("<cBq", arr.typecode.encode(), arr.itemsize, len(arr)))
+        arr.tofile(file)
+
+
+def _read_arrays(file):
+    """读取 _write_arrays 写出的数组，格式不符时返回 None"""
+    header = file.read(8)
+    if len(header) != 8 or header[:4] != CACHE_MAGIC:
+        return None
+    version, count = struct.unpack("<HH", header[4:])
+    if version != CACHE_VERSION:
+        return None
+
+    arrays = []
+    for _ in range(count):
+        typecode, itemsize, length = struct.unpack("<cBq", file.read(10))
+        arr = array(typecode.decode())
+        if arr.itemsize != itemsize:
+            return None  # 不同平台写出的缓存
+        arr.fromfile(file, length)
+        arrays.append(arr)
+    return arrays
+
+
+class BSDBinaryCache:
+    """
+    BSD解析结果的二进制磁盘缓存，以文件内容哈希为键。
+    缓存中直接保存层级结构、晶体管并行数组和网络(CSR)，
+    命中时整块读入数组，跳过文本解析和网络构建。
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def load(self, key):
+        """
+        读取缓存。命中时返回字典，包含 layers、var_sequence、nets
+        以及晶体管并行数组 t_layer/t_node/t_branch/t_type/t_target/t_control；
+        未命中或缓存无效时返回 None。
+        """
+        try:
+            with open(self._path(key), "rb") as file:
+                arrays = _read_arrays(file)
+        except (OSError, EOFError, struct.error, ValueError):
+            return None
+        if arrays is None or len(arrays) != len(_TRANSISTOR_FIELDS) + 7:
+            return None
+
+        layer_arrays = arrays[:5]
+        var_sequence = arrays[5]
+        transistor_arrays = arrays[6:-1]
+        net_data = arrays[-1]
+
+        # net_data 依次为: 网络数, 网络偏移 (网络数 + 1 项), 各网络的晶体管id
+        num_nets = net_data[0]
+        net_ptr = net_data[1 : num_nets + 2]
+        net_pins = net_data[num_nets + 2 :]
+
+        result = dict(zip(_TRANSISTOR_FIELDS, transistor_arrays))
+        result["layers"] = _decode_layers(*layer_arrays)
+        result["var_sequence"] = var_sequence.tolist()
+        result["nets"] = [
+            net_pins[net_ptr[k] : net_ptr[k + 1]].tolist() for k in range(num_nets)
+        ]
+        return result
+
+    def store(self, key, bdd):
+        """把已构建的bdd写入缓存；结构无法编码时不缓存，返回False"""
+        encoded = _encode_layers(bdd.layers)
+        var_sequence = bdd.var_sequence
+        if encoded is None or not isinstance(var_sequence, list):
+            return False
+        if not all(type(v) is int for v in var_sequence):
+            return False
+
+        net_data = array("l", [len(bdd.nets), 0])
+        for net in bdd.nets:
+            net_data.append(net_data[-1] + len(net))
+        for net in bdd.nets:
+            net_data.extend(net)
+
+        arrays = list(encoded)
+        arrays.append(array("l", var_sequence))
+        arrays.extend(getattr(bdd, field) for field in _TRANSISTOR_FIELDS)
+        arrays.append(net_data)
+
+        # 先写临时文件再替换，避免并发读到半个文件
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            _write_arrays(file, arrays)
+        os.replace(tmp_path, path)
+        return True
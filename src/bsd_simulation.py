@@ -0,0 +1,255 @@
+import random
+
+from cell_compiler import variable_masks
+
+# 不超过该变量数时枚举全部 2^n 个输入组合，每个节点的真值表为 2^n 位的整数
+MAX_EXHAUSTIVE_INPUTS = 16
+
+# 变量更多时随机抽取的输入组合数；只能发现不等价，不能证明等价
+SAMPLED_PATTERNS = 4096
+
+
+def _is_switch(node):
+    """(a,b) 或 [(a,b)]：需要控制变量的节点"""
+    if isinstance(node, list) and len(node) == 1:
+        node = node[0]
+    return isinstance(node, tuple)
+
+
+def _sequence_inputs(layers, var_sequence):
+    """
+    控制变量的个数：各层变量编号的最大值加 1。
+    :raises ValueError: 变量编号无效，或变量序列短于含 (a,b) 节点的层数。
+    """
+    last_switch = max(
+        (k for k, layer in enumerate(layers) if any(map(_is_switch, layer))),
+        default=-1,
+    )
+    if last_switch >= len(var_sequence):
+        raise ValueError(
+            f"变量序列只有 {len(var_sequence)} 个变量，第{last_switch}层的节点缺少控制变量"
+        )
+    used = list(var_sequence)[: len(layers)]
+    for var in used:
+        if type(var) is not int or var < 0:
+            raise ValueError(f"变量序列中的变量编号无效: {var}")
+    return max(used, default=-1) + 1
+
+
+class InputPatterns:
+    """
+    一组输入组合及各变量的位集：位集的第 j 位为第 j 个组合中该变量的值。
+    patterns 为 None 时是全部 2^n 个组合（第 p 位即组合 p，变量 i 取 p 的第 i 位）。
+    """
+
+    def __init__(self, num_inputs, patterns=None):
+        self.num_inputs = num_inputs
+        self.patterns = None if patterns is None else list(patterns)
+        if patterns is None:
+            self.size = 1 << num_inputs
+            self.masks = variable_masks(num_inputs)
+        else:
+            self.size = len(self.patterns)
+            # 第 j 个组合在位集的第 j 位，即二进制串的倒数第 j 个字符
+            bits = [format(p, f"0{num_inputs}b") for p in reversed(self.patterns)]
+            self.masks = [
+                int("".join(b[num_inputs - 1 - var] for b in bits) or "0", 2)
+                for var in range(num_inputs)
+            ]
+        self.full = (1 << self.size) - 1
+
+    @property
+    def exhaustive(self):
+        return self.patterns is None
+
+    def pattern(self, bit):
+        """第 bit 位对应的输入组合（第 i 位为变量 i 的值）"""
+        return bit if self.patterns is None else self.patterns[bit]
+
+    @classmethod
+    def for_inputs(cls, num_inputs, seed=0):
+        """变量不多时枚举全部组合，否则按 seed 抽取 SAMPLED_PATTERNS 个组合"""
+        if num_inputs <= MAX_EXHAUSTIVE_INPUTS:
+            return cls(num_inputs)
+        rng = random.Random(seed)
+        return cls(
+            num_inputs, [rng.getrandbits(num_inputs) for _ in range(SAMPLED_PATTERNS)]
+        )
+
+
+def _simulate_layers(layers, var_sequence, inputs):
+    """
+    自底向上逐层计算节点的真值表，依次产生 (层下标, [各节点的位集])。
+    (a,b) 与 [(a,b)] 在控制变量为 0/1 时取左/右目标，[v] 始终取目标 v；
+    目标 -1/-2 为常数 0/1，非负目标为下一层的节点。
+    :raises ValueError: 节点格式无法识别、目标不存在或缺少控制变量。
+    """
+    full = inputs.full
+    below = []
+    for layer_idx in range(len(layers) - 1, -1, -1):
+        width = len(below)
+        mask = None
+        if layer_idx < len(var_sequence):
+            var = var_sequence[layer_idx]
+            if var >= inputs.num_inputs:
+                raise ValueError(f"第{layer_idx}层的变量 {var} 超出输入个数")
+            mask = inputs.masks[var]
+
+        def table(target):
+            if target == -1:
+                return 0
+            if target == -2:
+                return full
+            if type(target) is not int or not 0 <= target < width:
+                raise ValueError(
+                    f"第{layer_idx}层的目标节点 {target} 不存在（下一层有{width}个节点）"
+                )
+            return below[target]
+
+        current = []
+        for node in layers[layer_idx]:
+            if isinstance(node, list) and len(node) == 1:
+                node = node[0]
+                if not isinstance(node, tuple):
+                    current.append(table(node))
+                    continue
+            if not (isinstance(node, tuple) and len(node) == 2):
+                raise ValueError(f"第{layer_idx}层无法识别的节点: {node}")
+            if mask is None:
+                raise ValueError(f"第{layer_idx}层缺少控制变量")
+            low, high = table(node[0]), table(node[1])
+            current.append(low ^ ((low ^ high) & mask))
+        yield layer_idx, current
+        below = current
+
+
+class BSDFunction:
+    """
+    BSD计算的布尔函数：outputs[i] 为第 0 层第 i 个节点（一个输出）在 inputs 各输入组合上的值，
+    按位保存（第 j 位对应 inputs.pattern(j)）。
+    """
+
+    def __init__(self, inputs, outputs):
+        self.inputs = inputs
+        self.outputs = outputs
+
+    @property
+    def num_inputs(self):
+        return self.inputs.num_inputs
+
+    @property
+    def exhaustive(self):
+        return self.inputs.exhaustive
+
+    def value(self, root, bit):
+        return (self.outputs[root] >> bit) & 1
+
+    def constant_outputs(self):
+        """值为常数的输出：{根节点下标: 0|1}"""
+        full = self.inputs.full
+        return {
+            root: int(table == full)
+            for root, table in enumerate(self.outputs)
+            if table == 0 or table == full
+        }
+
+
+def simulate_bsd(layers, var_sequence, inputs=None, seed=0):
+    """
+    位并行地模拟BSD：每个节点的真值表为一个整数，一次按位运算处理全部输入组合。
+    :param inputs: InputPatterns；默认由变量序列确定，变量不超过 MAX_EXHAUSTIVE_INPUTS 时枚举全部组合。
+    :return: BSDFunction。
+    :raises ValueError: 结构无效（见 _simulate_layers）。
+    """
+    num_inputs = _sequence_inputs(layers, var_sequence)
+    if inputs is None:
+        inputs = InputPatterns.for_inputs(num_inputs, seed)
+    outputs = []
+    for _, outputs in _simulate_layers(layers, var_sequence, inputs):
+        pass
+    return BSDFunction(inputs, outputs)
+
+
+def redundant_nodes(layers, var_sequence):
+    """
+    与同层前面的节点计算相同函数的节点（可以合并，去掉其晶体管），返回 [(层, 节点, 相同的节点)]。
+    第 0 层的节点是不同的输出，不计入。只在能枚举全部输入组合时判断。
+    :raises ValueError: 结构无效，或变量超过 MAX_EXHAUSTIVE_INPUTS。
+    """
+    num_inputs = _sequence_inputs(layers, var_sequence)
+    if num_inputs > MAX_EXHAUSTIVE_INPUTS:
+        raise ValueError(
+            f"变量过多 ({num_inputs} > {MAX_EXHAUSTIVE_INPUTS})，无法枚举全部输入组合"
+        )
+    redundant = []
+    for layer_idx, tables in _simulate_layers(
+        layers, var_sequence, InputPatterns(num_inputs)
+    ):
+        if layer_idx == 0:
+            break
+        first = {}
+        for node_idx, table in enumerate(tables):
+            same = first.setdefault(table, node_idx)
+            if same != node_idx:
+                redundant.append((layer_idx, node_idx, same))
+    redundant.reverse()
+    return redundant
+
+
+def find_counterexample(first, second, seed=0):
+    """
+    比较两个BSD（各为 (层级结构, 变量序列)）计算的函数，第 i 个输出与第 i 个输出比较。
+    变量多于 MAX_EXHAUSTIVE_INPUTS 时只比较抽样的输入组合。
+    :return: 等价时返回 None，否则返回 (输出下标, 输入组合)；输出个数不同时输入组合为 None。
+    :raises ValueError: 任一BSD结构无效。
+    """
+    num_inputs = max(_sequence_inputs(*first), _sequence_inputs(*second))
+    inputs = InputPatterns.for_inputs(num_inputs, seed)
+    a = simulate_bsd(*first, inputs=inputs).outputs
+    b = simulate_bsd(*second, inputs=inputs).outputs
+    for root, (x, y) in enumerate(zip(a, b)):
+        diff = x ^ y
+        if diff:
+            return root, inputs.pattern((diff & -diff).bit_length() - 1)
+    if len(a) != len(b):
+        return min(len(a), len(b)), None
+    return None
+
+
+def equivalent_bsds(first, second, seed=0):
+    """两个BSD是否计算相同的函数（见 find_counterexample）"""
+    return find_counterexample(first, second, seed) is None
+
+
+def check_candidate(
+    layers, var_sequence, reference=None, reject_redundant=False, seed=0
+):
+    """
+    布局之前检查候选BSD：结构能否模拟、是否与参考BSD等价、是否含可合并的冗余节点。
+    变量多于 MAX_EXHAUSTIVE_INPUTS 时等价性只在抽样的输入组合上比较，且不检查冗余节点。
+    :param reference: 参考BSD (层级结构, 变量序列)，None 时不比较函数。
+    :raises ValueError: 检查不通过，包括没有层或第 0 层没有节点（没有输出）的BSD。
+    """
+    if not layers:
+        raise ValueError("BSD没有层（只有变量序列）")
+    if not layers[0]:
+        raise ValueError("BSD第0层没有节点，没有输出")
+    candidate = (layers, var_sequence)
+    if reference is None:
+        simulate_bsd(layers, var_sequence, seed=seed)
+    else:
+        counterexample = find_counterexample(candidate, reference, seed)
+        if counterexample is not None:
+            root, pattern = counterexample
+            if pattern is None:
+                raise ValueError(f"输出个数与参考BSD不同（输出 {root} 起只在一方存在）")
+            raise ValueError(
+                f"与参考BSD不等价: 输出 {root} 在输入组合 {pattern:#b} 处不同"
+            )
+    if reject_redundant and _sequence_inputs(*candidate) <= MAX_EXHAUSTIVE_INPUTS:
+        redundant = redundant_nodes(layers, var_sequence)
+        if redundant:
+            layer_idx, node_idx, same = redundant[0]
+            raise ValueError(
+                f"含 {len(redundant)} 个冗余节点，如第{layer_idx}层节点 {node_idx} 与节点 {same} 相同"
+            )
@@ -0,0 +1,247 @@
+import hashlib
+import math
+from itertools import groupby, product
+
+from bsd_io import NODE_LEAF_PAIR, NODE_LEAF_VALUE, NODE_PAIR
+
+# 子图同构的根节点之间枚举排列的上限，超过时按原顺序取一种排列（只会漏判重复）
+MAX_ROOT_PERMUTATIONS = 720
+
+
+def _decompose(node):
+    """把层中的一个节点拆成 (类型码, 目标列表)，类型码见 bsd_io.NODE_*"""
+    if isinstance(node, tuple) and len(node) == 2:
+        kind, targets = NODE_PAIR, list(node)
+    elif isinstance(node, list) and len(node) == 1:
+        value = node[0]
+        if isinstance(value, tuple) and len(value) == 2:
+            kind, targets = NODE_LEAF_PAIR, list(value)
+        else:
+            kind, targets = NODE_LEAF_VALUE, [value]
+    else:
+        raise ValueError(f"无法规范化的节点: {node}")
+    if not all(type(target) is int for target in targets):
+        raise ValueError(f"无法规范化的节点: {node}")
+    return kind, targets
+
+
+def _compose(kind, targets):
+    """_decompose 的逆操作"""
+    if kind == NODE_PAIR:
+        return tuple(targets)
+    if kind == NODE_LEAF_PAIR:
+        return [tuple(targets)]
+    return [targets[0]]
+
+
+def _transistor_count(kind):
+    """节点对应的晶体管数，与 BDD._build_transistor_network 一致"""
+    return 1 if kind == NODE_LEAF_VALUE else 2
+
+
+def _bottom_up_ranks(nodes):
+    """
+    自底向上给第 0 层节点排名：节点签名为 (类型, 目标的排名)，终端保持负数。
+    签名相同的节点以下的子图同构，排名用于确定根节点的顺序。
+    """
+    ranks = []
+    for layer in reversed(nodes):
+        signatures = [
+            (kind, tuple(ranks[t] if t >= 0 else t for t in targets))
+            for kind, targets in layer
+        ]
+        rank_of = {sig: k for k, sig in enumerate(sorted(set(signatures)))}
+        ranks = [rank_of[sig] for sig in signatures]
+    return ranks
+
+
+def _distinct_permutations(items):
+    """多重集 items 的所有不同排列（相同元素互换不重复生成）"""
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    keys = sorted(counts)
+    current = []
+
+    def extend():
+        if len(current) == len(items):
+            yield tuple(current)
+            return
+        for key in keys:
+            if counts[key]:
+                counts[key] -= 1
+                current.append(key)
+                yield from extend()
+                current.pop()
+                counts[key] += 1
+
+    return extend()
+
+
+def _permutation_count(items):
+    """多重集 items 的不同排列数"""
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    total = math.factorial(len(items))
+    for count in counts.values():
+        total //= math.factorial(count)
+    return total
+
+
+def _number_from_roots(nodes, root_order):
+    """
+    按给定的根节点顺序逐层编号：依次处理本层节点的各个目标，
+    首次出现的下一层节点得到下一个编号，未被访问的节点不可达。
+    返回 (规范层级结构, 每层规范顺序对应的原节点下标)。
+    """
+    canonical_layers = []
+    orders = []
+    order = list(root_order)
+    for layer in nodes:
+        next_order = []
+        next_index = {}
+        canonical_layer = []
+        for original in order:
+            kind, targets = layer[original]
+            canonical_targets = []
+            for target in targets:
+                if target >= 0:
+                    k = next_index.get(target)
+                    if k is None:
+                        k = next_index[target] = len(next_order)
+                        next_order.append(target)
+                    target = k
+                canonical_targets.append(target)
+            canonical_layer.append(_compose(kind, canonical_targets))
+        canonical_layers.append(canonical_layer)
+        orders.append(order)
+        order = next_order
+    return canonical_layers, orders
+
+
+class CanonicalBSD:
+    """
+    BSD的规范形式：去掉不可达节点、各层节点按规范顺序重新编号后的层级结构。
+    结构相同（只是层内节点编号不同、或不可达节点不同）的BSD得到相同的 fingerprint。
+    transistor_map[k] 为规范形式中第 k 个晶体管在原BSD中的id。
+    """
+
+    def __init__(self, layers, var_sequence, transistor_map, pruned_nodes):
+        self.layers = layers
+        self.var_sequence = var_sequence
+        self.transistor_map = transistor_map
+        self.pruned_nodes = pruned_nodes
+        self.fingerprint = hashlib.sha256(
+            repr((layers, var_sequence)).encode()
+        ).hexdigest()
+
+    def to_original(self, placement):
+        """把规范形式中的晶体管顺序翻译为原BSD的晶体管id"""
+        return [self.transistor_map[tid] for tid in placement]
+
+    def to_canonical(self, placement):
+        """把原BSD的晶体管顺序翻译为规范形式的id，不可达的晶体管被去掉"""
+        canonical_of = {tid: k for k, tid in enumerate(self.transistor_map)}
+        return [canonical_of[tid] for tid in placement if tid in canonical_of]
+
+    def build_bdd(self):
+        """由规范形式构建BDD"""
+        from bdd import BDD
+
+        bdd = BDD()
+        bdd.construct_from_layers(self.layers, self.var_sequence)
+        return bdd
+
+
+def canonicalize_bsd(layers, var_sequence):
+    """
+    计算BSD的规范形式。
+
+    第 0 层的节点都是根，其余节点只有被上一层可达节点指向时才可达。
+    根节点按自底向上的子图排名排序，然后逐层按访问顺序编号：
+    依次处理本层（已编号的）节点的左、右目标，首次出现的下一层节点得到下一个编号。
+    目标节点的顺序由左右分支决定，与原编号无关，因此规范形式只取决于BDD结构。
+    相同的 fingerprint 保证结构相同；子图同构的根节点过多（排列数超过
+    MAX_ROOT_PERMUTATIONS）时，同一结构可能得到不同的 fingerprint（只会漏判重复）。
+    :raises ValueError: 节点格式无法识别，或目标指向不存在的节点。
+    """
+    nodes = [[_decompose(node) for node in layer] for layer in layers]
+    for layer_idx, layer in enumerate(nodes):
+        width = len(nodes[layer_idx + 1]) if layer_idx + 1 < len(nodes) else 0
+        for kind, targets in layer:
+            for target in targets:
+                if target >= width:
+                    raise ValueError(
+                        f"第{layer_idx}层的目标节点 {target} 不存在（下一层有{width}个节点）"
+                    )
+
+    # 原BSD中各节点第一个晶体管的id
+    first_tid = []
+    tid = 0
+    for layer in nodes:
+        starts = []
+        for kind, _ in layer:
+            starts.append(tid)
+            tid += _transistor_count(kind)
+        first_tid.append(starts)
+
+    if not nodes:
+        return CanonicalBSD([], list(var_sequence), [], 0)
+
+    # 根节点按排名排序；排名相同的根子图同构，但下层节点可能被不同的根共享，
+    # 这些根之间的顺序会影响编号，枚举其排列并取规范形式最小的一种。
+    # 目标完全相同的根互换是自同构，不影响结果，只枚举目标不同的根之间的排列
+    first_layer = nodes[0]
+    ranks = _bottom_up_ranks(nodes)
+    roots = sorted(
+        range(len(first_layer)),
+        key=lambda k: (ranks[k], first_layer[k][1], k),
+    )
+    groups = []
+    for _, group in groupby(roots, key=ranks.__getitem__):
+        group = list(group)
+        # 每组用目标列表作为多重集元素，同一目标列表的根按原顺序依次取用
+        by_targets = {}
+        for root in group:
+            by_targets.setdefault(tuple(first_layer[root][1]), []).append(root)
+        items = [tuple(first_layer[root][1]) for root in group]
+        groups.append((items, by_targets))
+
+    def expand(choice):
+        order = []
+        for perm, (_, by_targets) in zip(choice, groups):
+            taken = {targets: iter(members) for targets, members in by_targets.items()}
+            order.extend(next(taken[targets]) for targets in perm)
+        return order
+
+    choices = math.prod(_permutation_count(items) for items, _ in groups)
+    if choices > MAX_ROOT_PERMUTATIONS:
+        candidates = [roots]
+    else:
+        candidates = (
+            expand(choice)
+            for choice in product(
+                *(list(_distinct_permutations(items)) for items, _ in groups)
+            )
+        )
+
+    best = None
+    for root_order in candidates:
+        canonical_layers, orders = _number_from_roots(nodes, root_order)
+        key = repr(canonical_layers)
+        if best is None or key < best[0]:
+            best = (key, canonical_layers, orders)
+    _, canonical_layers, orders = best
+
+    transistor_map = []
+    for layer_idx, order in enumerate(orders):
+        for original in order:
+            kind, _ = nodes[layer_idx][original]
+            start = first_tid[layer_idx][original]
+            transistor_map.extend(range(start, start + _transistor_count(kind)))
+    pruned_nodes = sum(len(layer) for layer in nodes) - sum(map(len, orders))
+
+    return CanonicalBSD(
+        canonical_layers, list(var_sequence), transistor_map, pruned_nodes
+    )
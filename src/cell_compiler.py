@@ -0,0 +1,316 @@
+import re
+from itertools import permutations
+
+# 变量序列的搜索上限：支撑变量不超过该数目时枚举全部顺序，取晶体管最少的一种
+MAX_ORDER_SEARCH_INPUTS = 6
+
+# 真值表按 2^n 位的整数保存，输入过多时拒绝编译
+MAX_INPUTS = 16
+
+# Liberty function 表达式的记号：标识符、常量、运算符和括号
+_FUNCTION_TOKEN = re.compile(r"\s*(?:([A-Za-z_][\w\[\].]*)|([01])|([!'&*|+^()]))")
+
+
+def parse_function(text):
+    """
+    解析 Liberty 的 function 表达式，返回语法树:
+      ("var", 名称) / ("const", 0|1) / ("not", 子树) / ("and"|"or"|"xor", 左, 右)
+    运算符优先级从高到低: ' 与 !、^、& 与 * 与空格（相邻的操作数）、| 与 +。
+    :raises ValueError: 表达式不完整或含无法识别的字符。
+    """
+    tokens = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = _FUNCTION_TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"无法解析的 function (位置 {pos}): {text}")
+        pos = match.end()
+        name, const, op = match.groups()
+        if name is not None:
+            tokens.append(("var", name))
+        elif const is not None:
+            tokens.append(("const", int(const)))
+        else:
+            tokens.append((op, None))
+    tokens.append(("end", None))
+    index = 0
+
+    def peek():
+        return tokens[index][0]
+
+    def take():
+        nonlocal index
+        token = tokens[index]
+        index += 1
+        return token
+
+    def expect(kind):
+        if peek() != kind:
+            raise ValueError(f"function 中缺少 {kind}: {text}")
+        take()
+
+    def parse_or():
+        node = parse_and()
+        while peek() in ("|", "+"):
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_xor()
+        # 相邻的操作数之间省略了 &
+        while peek() in ("&", "*", "var", "const", "(", "!"):
+            if peek() in ("&", "*"):
+                take()
+            node = ("and", node, parse_xor())
+        return node
+
+    def parse_xor():
+        node = parse_unary()
+        while peek() == "^":
+            take()
+            node = ("xor", node, parse_unary())
+        return node
+
+    def parse_unary():
+        if peek() == "!":
+            take()
+            return ("not", parse_unary())
+        kind, value = take()
+        if kind == "var" or kind == "const":
+            node = (kind, value)
+        elif kind == "(":
+            node = parse_or()
+            expect(")")
+        else:
+            raise ValueError(f"function 中意外的 {kind}: {text}")
+        while peek() == "'":
+            take()
+            node = ("not", node)
+        return node
+
+    tree = parse_or()
+    if peek() != "end":
+        raise ValueError(f"function 中意外的 {peek()}: {text}")
+    return tree
+
+
+def function_support(tree):
+    """语法树中出现的变量名"""
+    if tree[0] == "var":
+        return {tree[1]}
+    if tree[0] == "const":
+        return set()
+    return set().union(*(function_support(child) for child in tree[1:]))
+
+
+def variable_masks(num_inputs):
+    """
+    各输入变量的位集：真值表的第 p 位对应输入组合 p（第 i 个输入取 p 的第 i 位），
+    变量 i 的位集为所有第 i 位为 1 的 p。
+    """
+    size = 1 << num_inputs
+    masks = []
+    for i in range(num_inputs):
+        block = (1 << (1 << i)) - 1  # 连续 2^i 个 1
+        pattern = block << (1 << i)  # 一个周期 2^(i+1) 内高半部分为 1
+        period = 1 << (i + 1)
+        mask = 0
+        for start in range(0, size, period):
+            mask |= pattern << start
+        masks.append(mask)
+    return masks
+
+
+def evaluate_function(tree, variables, full):
+    """
+    对全部输入组合同时求值（位并行）。
+    :param variables: {变量名: 位集}。
+    :param full: 全 1 位集 (2^(2^n) - 1)。
+    """
+    kind = tree[0]
+    if kind == "var":
+        if tree[1] not in variables:
+            raise ValueError(f"function 引用了未知的引脚 {tree[1]}")
+        return variables[tree[1]]
+    if kind == "const":
+        return full if tree[1] else 0
+    if kind == "not":
+        return full ^ evaluate_function(tree[1], variables, full)
+    left = evaluate_function(tree[1], variables, full)
+    right = evaluate_function(tree[2], variables, full)
+    if kind == "and":
+        return left & right
+    if kind == "or":
+        return left | right
+    return left ^ right
+
+
+def cofactors(table, mask, var):
+    """
+    真值表对变量 var 的两个余因子（仍以全部变量的真值表表示）。
+    :param mask: 变量 var 的位集（见 variable_masks）。
+    """
+    shift = 1 << var
+    low = table & ~mask
+    high = table & mask
+    return low | (low << shift), high | (high >> shift)
+
+
+def build_layers(tables, order, masks, full):
+    """
+    按变量顺序把若干输出函数编译为分层结构（准约简的有序决策图）。
+    第 k 层的节点是固定前 k 个变量后仍非常数的互不相同的子函数，
+    节点的左/右分支为该层变量取 0/1 时的余因子：常数 0/1 指向终端 -1/-2，否则指向下一层的节点。
+    与该层变量无关的子函数（两个余因子相同）编译为单晶体管的直通节点 [x]，而不是两个分支相同的 (x,x)。
+    :param tables: 第 0 层的根函数（互不相同且非常数）。
+    :return: (layers, var_sequence)；所有函数提前变为常数时层数少于 len(order)。
+    """
+    layers = []
+    var_sequence = []
+    current = list(tables)
+    for var in order:
+        if not current:
+            break
+        next_index = {}
+        layer = []
+        for table in current:
+            low, high = cofactors(table, masks[var], var)
+            if low == high:
+                # 非常数的子函数与本层变量无关时余因子即自身，只能指向下一层的节点
+                layer.append([next_index.setdefault(low, len(next_index))])
+                continue
+            targets = []
+            for cofactor in (low, high):
+                if cofactor == 0:
+                    targets.append(-1)
+                elif cofactor == full:
+                    targets.append(-2)
+                else:
+                    targets.append(next_index.setdefault(cofactor, len(next_index)))
+            layer.append(tuple(targets))
+        layers.append(layer)
+        var_sequence.append(var)
+        current = list(next_index)
+    return layers, var_sequence
+
+
+def layers_transistor_count(layers):
+    """晶体管数：(a,b) 节点2个，直通节点 [x] 1个（与 BDD._build_transistor_network 一致）"""
+    return sum(1 if isinstance(node, list) else 2 for layer in layers for node in layer)
+
+
+class CompiledCell:
+    """
+    由单元的 function 编译得到的BSD。
+    inputs[i] 为变量 i 对应的输入引脚；outputs 为 {输出引脚: 第 0 层根节点下标}，
+    常数输出不在其中（见 constant_outputs）；truth_tables 为 {输出引脚: 真值表位集}。
+    """
+
+    def __init__(
+        self,
+        name,
+        inputs,
+        outputs,
+        constant_outputs,
+        truth_tables,
+        layers,
+        var_sequence,
+    ):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.constant_outputs = constant_outputs
+        self.truth_tables = truth_tables
+        self.layers = layers
+        self.var_sequence = var_sequence
+
+    @property
+    def transistor_count(self):
+        return layers_transistor_count(self.layers)
+
+    def bsd_text(self):
+        """BSD文本（每层一行，最后一行为变量序列）"""
+        from bsd_io import format_bsd
+
+        return format_bsd(self.layers, self.var_sequence)
+
+    def build_bdd(self):
+        from bdd import BDD
+
+        bdd = BDD()
+        bdd.construct_from_layers(self.layers, self.var_sequence)
+        return bdd
+
+
+def compile_cell(cell, max_order_search=MAX_ORDER_SEARCH_INPUTS):
+    """
+    把组合单元各输出引脚的 function 编译为一个BSD，输出之间共享子函数。
+    变量为 function 实际用到的输入引脚；不超过 max_order_search 个时枚举变量顺序，取晶体管最少的一种。
+    :param cell: liberty.Cell。
+    :raises ValueError: 时序单元、没有 function、引用了非输入引脚、输入过多或所有输出都是常数。
+    """
+    if cell.is_sequential:
+        raise ValueError(f"{cell.name} 是时序单元")
+    functions = cell.functions
+    outputs = [name for name in cell.output_pins() if name in functions]
+    if not outputs:
+        raise ValueError(f"{cell.name} 没有带 function 的输出引脚")
+
+    trees = {name: parse_function(functions[name]) for name in outputs}
+    support = set().union(*(function_support(tree) for tree in trees.values()))
+    inputs = [name for name in cell.input_pins() if name in support]
+    unknown = support - set(inputs)
+    if unknown:
+        raise ValueError(f"{cell.name} 的 function 引用了非输入引脚 {sorted(unknown)}")
+    if len(inputs) > MAX_INPUTS:
+        raise ValueError(f"{cell.name} 的输入过多 ({len(inputs)} > {MAX_INPUTS})")
+
+    masks = variable_masks(len(inputs))
+    full = (1 << (1 << len(inputs))) - 1
+    variables = dict(zip(inputs, masks))
+    truth_tables = {
+        name: evaluate_function(tree, variables, full) for name, tree in trees.items()
+    }
+
+    roots = []
+    root_of = {}
+    constant_outputs = {}
+    for name in outputs:
+        table = truth_tables[name]
+        if table == 0 or table == full:
+            constant_outputs[name] = int(table == full)
+            continue
+        if table not in root_of:
+            root_of[table] = len(roots)
+            roots.append(table)
+    if not roots:
+        raise ValueError(f"{cell.name} 的输出都是常数")
+
+    identity = list(range(len(inputs)))
+    if len(inputs) <= max_order_search:
+        orders = permutations(identity)
+    else:
+        orders = [identity]
+    best = None
+    for order in orders:
+        layers, var_sequence = build_layers(roots, order, masks, full)
+        transistors = layers_transistor_count(layers)
+        if best is None or transistors < best[0]:
+            best = (transistors, layers, var_sequence)
+    _, layers, var_sequence = best
+
+    return CompiledCell(
+        cell.name,
+        inputs,
+        {
+            name: root_of[truth_tables[name]]
+            for name in outputs
+            if name not in constant_outputs
+        },
+        constant_outputs,
+        truth_tables,
+        layers,
+        var_sequence,
+    )
@@ -0,0 +1,232 @@
+import argparse
+import json
+import sys
+import time
+
+from bsd_io import parse_bsd_lines
+from canonical_bsd import canonicalize_bsd
+from cell_compiler import MAX_ORDER_SEARCH_INPUTS, compile_cell
+from liberty import read_liberty
+from lower_bound import single_row_lower_bound
+from main_enhanced import (
+    DEFAULT_ITERATIONS,
+    DEFAULT_W_AREA,
+    DEFAULT_W_WIRE,
+    ENGINES,
+    optimize_bdd,
+)
+
+# 成本表文件格式版本；字段含义变化时递增
+TABLE_VERSION = 1
+
+
+def structure_fingerprint(layers):
+    """
+    只取决于层级结构的指纹：单行布局成本与变量标号无关，
+    变量序列不同而结构相同的BSD得到相同的指纹（见 canonical_bsd.py）。
+    """
+    return canonicalize_bsd(layers, []).fingerprint
+
+
+def _parse_layers(bsd_text):
+    layers, _ = parse_bsd_lines(bsd_text.splitlines())
+    return layers
+
+
+class CellCostTable:
+    """
+    单元库中各组合单元的最优单行布局成本。
+    entries 为 {单元名: 记录}，记录含 cost、wire_cost、area_cost、placement、lower_bound、
+    inputs、outputs、constant_outputs、transistors、bsd（BSD文本）和 fingerprint；
+    skipped 为 {单元名: 未编译的原因}（时序单元、没有 function 等）。
+    """
+
+    def __init__(self, w_wire, w_area, entries=None, skipped=None, library=None):
+        self.w_wire = w_wire
+        self.w_area = w_area
+        self.entries = entries if entries is not None else {}
+        self.skipped = skipped if skipped is not None else {}
+        self.library = library
+        self._by_fingerprint = {}
+        for name, entry in self.entries.items():
+            self._by_fingerprint.setdefault(entry["fingerprint"], name)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def add(self, name, entry):
+        self.entries[name] = entry
+        self._by_fingerprint.setdefault(entry["fingerprint"], name)
+
+    def cost(self, name):
+        """单元的最优布局成本；不在表中（被跳过或不存在）时返回 None"""
+        entry = self.entries.get(name)
+        return None if entry is None else entry["cost"]
+
+    def match(self, layers):
+        """与给定BSD结构相同的单元名（第一个），没有时返回 None"""
+        return self._by_fingerprint.get(structure_fingerprint(layers))
+
+    def cost_of_bsd(self, layers):
+        """结构与某个单元相同的BSD直接取该单元的成本，否则返回 None"""
+        name = self.match(layers)
+        return None if name is None else self.entries[name]["cost"]
+
+    def to_dict(self):
+        return {
+            "version": TABLE_VERSION,
+            "library": self.library,
+            "w_wire": self.w_wire,
+            "w_area": self.w_area,
+            "cells": self.entries,
+            "skipped": self.skipped,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取 save() 保存的成本表。
+        :raises ValueError: 文件不是成本表或版本不符。
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("version") != TABLE_VERSION:
+            raise ValueError(f"{path} 不是版本 {TABLE_VERSION} 的单元成本表")
+        return cls(
+            data["w_wire"],
+            data["w_area"],
+            data["cells"],
+            data.get("skipped", {}),
+            data.get("library"),
+        )
+
+
+def evaluate_cell(
+    compiled,
+    w_wire=DEFAULT_W_WIRE,
+    w_area=DEFAULT_W_AREA,
+    iterations=DEFAULT_ITERATIONS,
+    seed=None,
+    engine="auto",
+):
+    """对编译得到的单元BSD做单行布局优化，返回成本表中的一条记录"""
+    start = time.perf_counter()
+    bdd = compiled.build_bdd()
+    _, optimized_layout = optimize_bdd(
+        bdd, w_wire, w_area, iterations, seed, engine=engine
+    )
+    return {
+        "cost": optimized_layout.get_cost(),
+        "wire_cost": optimized_layout.calculate_wire_length(),
+        "area_cost": optimized_layout.calculate_area_cost(),
+        "placement": list(optimized_layout.placement),
+        "lower_bound": single_row_lower_bound(bdd, w_wire, w_area),
+        "inputs": compiled.inputs,
+        "outputs": compiled.outputs,
+        "constant_outputs": compiled.constant_outputs,
+        "transistors": compiled.transistor_count,
+        "bsd": compiled.bsd_text(),
+        "fingerprint": structure_fingerprint(compiled.layers),
+        "runtime": time.perf_counter() - start,
+    }
+
+
+def build_cost_table(
+    library,
+    cell_names=None,
+    w_wire=DEFAULT_W_WIRE,
+    w_area=DEFAULT_W_AREA,
+    iterations=DEFAULT_ITERATIONS,
+    seed=None,
+    engine="auto",
+    max_order_search=MAX_ORDER_SEARCH_INPUTS,
+):
+    """
+    把库中每个组合单元的 function 编译为BSD（见 cell_compiler.py），各做一次单行布局优化。
+    结构相同的单元（如不同驱动强度的 X1/X2）只优化一次。
+    :param library: liberty.Library 或 liberty_index.LazyLibrary。
+    :param cell_names: 只处理这些单元，None 表示全部；库中没有的单元记入 skipped。
+    :return: CellCostTable。
+    """
+    table = CellCostTable(w_wire, w_area, library=library.name)
+    names = library.cells if cell_names is None else cell_names
+    for name in names:
+        if name not in library.cells:
+            table.skipped[name] = f"库中没有单元 {name}"
+            continue
+        try:
+            compiled = compile_cell(library.cells[name], max_order_search)
+        except ValueError as e:
+            table.skipped[name] = str(e)
+            continue
+        same = table.match(compiled.layers)
+        if same is not None:
+            # 结构相同时经规范形式把已有的最优顺序翻译为本单元的晶体管id
+            entry = dict(table.entries[same])
+            source = canonicalize_bsd(
+                [list(layer) for layer in _parse_layers(entry["bsd"])], []
+            )
+            target = canonicalize_bsd(compiled.layers, [])
+            entry.update(
+                placement=target.to_original(source.to_canonical(entry["placement"])),
+                inputs=compiled.inputs,
+                outputs=compiled.outputs,
+                constant_outputs=compiled.constant_outputs,
+                bsd=compiled.bsd_text(),
+                runtime=0.0,
+            )
+        else:
+            entry = evaluate_cell(compiled, w_wire, w_area, iterations, seed, engine)
+        table.add(name, entry)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="把 Liberty 单元的 function 编译为BSD，计算各单元的最优单行布局成本表"
+    )
+    parser.add_argument("library", help="Liberty 文件路径")
+    parser.add_argument("--cells", help="逗号分隔的单元名，默认全部")
+    parser.add_argument("--w-wire", type=float, default=DEFAULT_W_WIRE)
+    parser.add_argument("--w-area", type=float, default=DEFAULT_W_AREA)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    parser.add_argument("--output", help="成本表JSON路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    cell_names = args.cells.split(",") if args.cells else None
+    if cell_names is None:
+        library = read_liberty(args.library)
+    else:
+        from liberty_index import open_liberty
+
+        library = open_liberty(args.library)
+        unknown = [name for name in cell_names if name not in library.cells]
+        if unknown:
+            parser.error(f"库中没有单元: {', '.join(unknown)}")
+    table = build_cost_table(
+        library,
+        cell_names,
+        w_wire=args.w_wire,
+        w_area=args.w_area,
+        iterations=args.iterations,
+        seed=args.seed,
+        engine=args.engine,
+    )
+    if args.output:
+        table.save(args.output)
+    else:
+        json.dump(table.to_dict(), sys.stdout, ensure_ascii=False, indent=1)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+def _sibling(bdd, tid):
+    """同一BDD节点的另一个分支晶体管（两者共享源节点网络），没有时返回 None"""
+    for other in (tid - 1, tid + 1):
+        if (
+            0 <= other < len(bdd.t_layer)
+            and bdd.t_layer[other] == bdd.t_layer[tid]
+            and bdd.t_node[other] == bdd.t_node[tid]
+        ):
+            return other
+    return None
+
+
+def constructive_placement(bdd):
+    """
+    按BDD结构构造单行布局的初始顺序，返回晶体管id列表。
+
+    晶体管id按 (层, 节点, 分支) 顺序分配，因此id顺序即 BDD.layers 的层序。
+    仿照 Euler 路径的链式排列，沿共享扩散区的网络逐个延伸：
+      - 同一节点的两个分支晶体管总是共享源节点网络，进入节点后紧接着放置另一分支；
+      - 否则从当前晶体管所在网络中取id最小（层最浅）的未放置晶体管继续延伸；
+      - 进入一个节点时，让剩余连接较少的分支先放，另一分支作为出口继续延伸；
+      - 链断开时从id最小的未放置晶体管重新开始。
+    相邻晶体管尽量共享网络（面积），网络的引脚也尽量集中（线长）。
+    """
+    n = bdd.get_transistor_count()
+    nets = bdd.get_nets()
+    transistor_nets = bdd.get_transistor_nets()
+
+    placed = bytearray(n)
+    # 每个网络中未放置的引脚数，以及按id递增扫描的游标（网络引脚按id有序）
+    remaining = [len(net) for net in nets]
+    cursor = [0] * len(nets)
+
+    def lowest_unplaced(net_idx):
+        net = nets[net_idx]
+        k = cursor[net_idx]
+        while k < len(net) and placed[net[k]]:
+            k += 1
+        cursor[net_idx] = k
+        return net[k] if k < len(net) else None
+
+    def continuation(tid, shared_net):
+        """tid 放置后经 shared_net 以外的网络还能延伸的晶体管数"""
+        return sum(
+            remaining[net_idx] - 1
+            for net_idx in transistor_nets[tid]
+            if net_idx != shared_net
+        )
+
+    def enter(tid, shared_net):
+        """进入 tid 所在节点：两个分支都未放置且都在 shared_net 中时，剩余连接少的先放"""
+        sibling = _sibling(bdd, tid)
+        if (
+            sibling is None
+            or placed[sibling]
+            or (shared_net is not None and shared_net not in transistor_nets[sibling])
+        ):
+            return tid
+        if continuation(sibling, shared_net) < continuation(tid, shared_net):
+            return sibling
+        return tid
+
+    order = []
+    start = 0
+    current = None
+    while len(order) < n:
+        if current is None:
+            while placed[start]:
+                start += 1
+            current = enter(start, None)
+
+        placed[current] = 1
+        order.append(current)
+        for net_idx in transistor_nets[current]:
+            remaining[net_idx] -= 1
+
+        sibling = _sibling(bdd, current)
+        if sibling is not None and not placed[sibling]:
+            current = sibling
+            continue
+
+        # 沿当前晶体管所在网络延伸，取层最浅的候选
+        best = None
+        best_net = None
+        for net_idx in transistor_nets[current]:
+            candidate = lowest_unplaced(net_idx)
+            if candidate is not None and (best is None or candidate < best):
+                best = candidate
+                best_net = net_idx
+        current = None if best is None else enter(best, best_net)
+
+    return order
@@ -0,0 +1,218 @@
+import math
+import time
+
+# 自动初始温度：使采样得到的平均上坡移动以该概率被接受
+DEFAULT_INITIAL_ACCEPTANCE = 0.5
+
+# 默认目标曲线：上坡移动接受率按指数从 0.5 降到 0.001
+TARGET_START_ACCEPTANCE = 0.5
+TARGET_END_ACCEPTANCE = 0.001
+
+# 从较好的初始布局（如构造式布局）出发时的起始接受率：低温起步只做局部改进，
+# 按默认的 0.5 起步会把初始布局的结构打乱，退火预算内无法恢复
+SEEDED_START_ACCEPTANCE = 0.03
+
+# 估计初始温度时采样的移动次数
+DEFAULT_SAMPLE_MOVES = 200
+
+# 每隔多少比例的迭代预算调整一次温度
+DEFAULT_UPDATE_FRACTION = 0.002
+
+# 每次调整温度的增益和单次调整幅度上限
+DEFAULT_GAIN = 2.0
+MAX_STEP_FACTOR = 2.0
+
+# 只有时间预算（不限迭代次数）时，每个调整窗口的移动次数
+DEFAULT_TIMED_WINDOW = 100
+
+# 温度下限，避免温度为0时接受判定退化
+MIN_TEMPERATURE = 1e-9
+
+
+def exponential_target_acceptance(progress):
+    """
+    默认的目标接受率曲线，progress 为已用迭代预算的比例 (0~1)。
+    上坡移动接受率从 TARGET_START_ACCEPTANCE 按指数降到 TARGET_END_ACCEPTANCE。
+    """
+    return (
+        TARGET_START_ACCEPTANCE
+        * (TARGET_END_ACCEPTANCE / TARGET_START_ACCEPTANCE) ** progress
+    )
+
+
+def seeded_target_acceptance(progress):
+    """
+    从较好的初始布局出发时的目标接受率曲线：
+    上坡移动接受率从 SEEDED_START_ACCEPTANCE 按指数降到 TARGET_END_ACCEPTANCE。
+    与 AdaptiveCooling(initial_acceptance=SEEDED_START_ACCEPTANCE) 一起使用。
+    """
+    return (
+        SEEDED_START_ACCEPTANCE
+        * (TARGET_END_ACCEPTANCE / SEEDED_START_ACCEPTANCE) ** progress
+    )
+
+
+def lam_target_acceptance(progress):
+    """
+    Lam 退火的目标接受率曲线，progress 为已用迭代预算的比例 (0~1)。
+    前15%从1降到0.44，中间保持0.44，最后35%按指数降到接近0。
+    单行布局的随机交换中大部分上坡移动代价很大，按此曲线在高温段停留过久，
+    实测不如 exponential_target_acceptance，保留作为可选曲线。
+    """
+    if progress < 0.15:
+        return 0.44 + 0.56 * 560 ** (-progress / 0.15)
+    if progress < 0.65:
+        return 0.44
+    return 0.44 * 440 ** (-(progress - 0.65) / 0.35)
+
+
+def sample_move_deltas(trial_move, count=DEFAULT_SAMPLE_MOVES):
+    """
+    采样随机移动的成本变化量。
+    :param trial_move: 无参函数，执行一次随机移动并撤销，返回成本变化量。
+    """
+    return [trial_move() for _ in range(count)]
+
+
+def initial_temperature_from_deltas(
+    deltas, initial_acceptance=DEFAULT_INITIAL_ACCEPTANCE
+):
+    """
+    由采样的成本变化量估计初始温度：平均上坡变化量以 initial_acceptance 的概率被接受，
+    即 T0 = -mean(delta > 0) / ln(initial_acceptance)。
+    """
+    uphill = [delta for delta in deltas if delta > 0]
+    if not uphill:
+        # 采样中没有上坡移动（例如布局已经很好），退回到平均变化幅度
+        uphill = [abs(delta) for delta in deltas if delta != 0] or [1.0]
+    mean_uphill = sum(uphill) / len(uphill)
+    return max(mean_uphill / -math.log(initial_acceptance), MIN_TEMPERATURE)
+
+
+class AdaptiveCooling:
+    """
+    自适应退火温度调度（Lam 式接受率反馈）。
+    初始温度由采样的移动成本变化量确定；退火过程中按窗口统计上坡移动的接受率，
+    与随预算进度变化的目标接受率比较后调整温度，使整个调度恰好铺满给定的迭代预算。
+    只统计上坡移动，因为成本不变的交换总被接受，会掩盖温度的实际效果。
+    """
+
+    def __init__(
+        self,
+        initial_acceptance=DEFAULT_INITIAL_ACCEPTANCE,
+        sample_moves=DEFAULT_SAMPLE_MOVES,
+        update_fraction=DEFAULT_UPDATE_FRACTION,
+        gain=DEFAULT_GAIN,
+        target_acceptance=exponential_target_acceptance,
+    ):
+        """
+        :param initial_acceptance: 初始温度下平均上坡移动的接受概率。
+        :param sample_moves: 估计初始温度时采样的移动次数。
+        :param update_fraction: 每个调整窗口占迭代预算的比例。
+        :param gain: 接受率偏差到温度调整量的增益。
+        :param target_acceptance: 目标接受率函数，参数为已用预算比例。
+        """
+        self.initial_acceptance = initial_acceptance
+        self.sample_moves = sample_moves
+        self.update_fraction = update_fraction
+        self.gain = gain
+        self.target_acceptance = target_acceptance
+
+        self.iterations = 0
+        self.window = 1
+        self.temperature = 1.0
+        self.initial_temperature = 1.0
+        # 每个窗口的 (已用预算比例, 实际接受率, 目标接受率)
+        self.acceptance_history = []
+
+    def start(self, iterations, trial_move):
+        """
+        开始一次退火：采样移动估计初始温度。
+        :param iterations: 迭代预算；为 None 时只有时间预算，使用固定大小的调整窗口。
+        :param trial_move: 无参函数，执行一次随机移动并撤销，返回成本变化量。
+        :return: 初始温度
+        """
+        if iterations is None:
+            self.window = DEFAULT_TIMED_WINDOW
+            sample_moves = self.sample_moves
+        else:
+            self.window = max(1, int(iterations * self.update_fraction))
+            sample_moves = min(self.sample_moves, iterations)
+        deltas = sample_move_deltas(trial_move, sample_moves)
+        self.initial_temperature = initial_temperature_from_deltas(
+            deltas, self.initial_acceptance
+        )
+        self.temperature = self.initial_temperature
+        self.acceptance_history = []
+        return self.temperature
+
+    def update(self, progress, accepted, attempted):
+        """
+        一个窗口结束后调整温度。
+        :param progress: 已用预算比例 (0~1)，见 Budget.progress()。
+        :param accepted: 本窗口内被接受的上坡移动数。
+        :param attempted: 本窗口内尝试的上坡移动数。
+        :return: 新温度
+        """
+        target = self.target_acceptance(min(progress, 1.0))
+        if attempted == 0:
+            return self.temperature
+        rate = accepted / attempted
+        self.acceptance_history.append((progress, rate, target))
+
+        # 接受率高于目标时降温，低于目标时升温
+        factor = math.exp(self.gain * (target - rate))
+        factor = min(max(factor, 1.0 / MAX_STEP_FACTOR), MAX_STEP_FACTOR)
+        self.temperature = max(self.temperature * factor, MIN_TEMPERATURE)
+        return self.temperature
+
+
+def resolve_deadline(deadline=None, time_budget_ms=None, now=None):
+    """合并截止时间和毫秒预算，返回较早的截止时间（time.monotonic() 时钟），都未给出时为 None"""
+    if time_budget_ms is None:
+        return deadline
+    if now is None:
+        now = time.monotonic()
+    budget_deadline = now + time_budget_ms / 1000.0
+    return budget_deadline if deadline is None else min(deadline, budget_deadline)
+
+
+class Budget:
+    """
+    退火的预算：迭代次数、墙钟截止时间和取消信号，三者任一耗尽即停止。
+    进度取迭代进度和时间进度中较大者，温度调度按进度铺满预算。
+    """
+
+    def __init__(
+        self, iterations=None, deadline=None, time_budget_ms=None, cancel=None
+    ):
+        """
+        :param iterations: 迭代次数上限，None 表示不限。
+        :param deadline: time.monotonic() 时钟下的截止时间。
+        :param time_budget_ms: 从现在起的时间预算（毫秒），与 deadline 同时给出时取较早者。
+        :param cancel: 取消信号，任何带 is_set() 方法的对象（如 threading.Event）。
+        """
+        self.start = time.monotonic()
+        deadline = resolve_deadline(deadline, time_budget_ms, self.start)
+        if iterations is None and deadline is None and cancel is None:
+            raise ValueError("必须指定迭代次数、时间预算或取消信号")
+
+        self.iterations = iterations
+        self.deadline = deadline
+        self.cancel = cancel
+
+    @property
+    def timed(self):
+        return self.deadline is not None
+
+    def progress(self, step):
+        """已用预算比例；达到 1 表示预算耗尽"""
+        progress = step / self.iterations if self.iterations else 0.0
+        if self.deadline is not None:
+            span = self.deadline - self.start
+            elapsed = time.monotonic() - self.start
+            progress = max(progress, elapsed / span if span > 0 else 1.0)
+        return progress
+
+    def cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
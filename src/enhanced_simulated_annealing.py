@@ -1,55 +1,76 @@
-import copy
-import math
-import random
-
-from standard_cell_layout import StandardCellLayout
+from cooling import resolve_deadline
+from lower_bound import optimality_gap, single_row_lower_bound
+from single_row_kernel import SingleRowKernel
 
 
 class EnhancedSimulatedAnnealing:
     def __init__(
-        self, initial_layout, initial_temperature, cooling_rate, min_temperature
+        self,
+        initial_layout,
+        initial_temperature,
+        cooling_rate,
+        min_temperature,
+        schedule=None,
+        stop_at_lower_bound=True,
     ):
+        """
+        :param schedule: 自适应温度调度（cooling.AdaptiveCooling）。提供时初始温度由采样确定，
+            温度按接受率调整并用满全部迭代次数，忽略三个固定温度参数。
+        :param stop_at_lower_bound: 最优成本达到可证明的下界（见 lower_bound.py）时提前结束。
+        """
         self.current_layout = initial_layout
         self.initial_temperature = initial_temperature
         self.cooling_rate = cooling_rate
         self.min_temperature = min_temperature
+        self.schedule = schedule
+        self.stop_at_lower_bound = stop_at_lower_bound
         self.best_layout = initial_layout
         self.cost_history = []
+        self.best_cost = None
+        self.lower_bound = None
+        self.optimality_gap = None
 
-    def optimize(self, iterations):
-        temperature = self.initial_temperature
-        current_cost = self.current_layout.get_cost()
-        self.best_layout = self.current_layout
-        best_cost = current_cost
-
-        # print(f"开始优化，初始成本: {current_cost:.2f}")
-
-        for i in range(iterations):
-            # --- FIX START ---
-            # 修复: SingleRowLayout 类中的方法名为 get_neighbor, 而不是 generate_neighbor
-            neighbor_layout = self.current_layout.get_neighbor()
-            # --- FIX END ---
-
-            neighbor_cost = neighbor_layout.get_cost()
-
-            cost_delta = neighbor_cost - current_cost
+    def optimize(
+        self, iterations=None, deadline=None, time_budget_ms=None, cancel=None
+    ):
+        """
+        执行退火并返回最优布局。
+        :param iterations: 迭代次数上限；给出时间预算或取消信号时可以为 None。
+        :param deadline: time.monotonic() 时钟下的截止时间。
+        :param time_budget_ms: 从现在起的时间预算（毫秒），与 deadline 同时给出时取较早者。
+        :param cancel: 取消信号（带 is_set() 的对象，如 threading.Event）。
+        时间耗尽或收到取消信号时返回目前找到的最优布局，温度调度按时间进度铺满预算。
+        结束后 best_cost、lower_bound 和 optimality_gap 记录最优成本、下界和最优性差距。
+        """
+        deadline = resolve_deadline(deadline, time_budget_ms)
+        layout = self.current_layout
+        self.lower_bound = single_row_lower_bound(
+            layout.bdd, layout.w_wire, layout.w_area
+        )
 
-            if cost_delta < 0 or random.uniform(0, 1) < math.exp(
-                -cost_delta / temperature
-            ):
-                self.current_layout = neighbor_layout
-                current_cost = neighbor_cost
+        # 在数组化内核上原地退火，不修改调用方传入的初始布局
+        kernel = SingleRowKernel.from_layout(self.current_layout)
 
-                if current_cost < best_cost:
-                    self.best_layout = self.current_layout
-                    best_cost = current_cost
+        # print(f"开始优化，初始成本: {kernel.cost():.2f}")
 
-            self.cost_history.append(current_cost)
-            temperature *= self.cooling_rate
+        best_cost, best_placement = kernel.anneal(
+            iterations,
+            self.initial_temperature,
+            self.cooling_rate,
+            self.min_temperature,
+            cost_history=self.cost_history,
+            schedule=self.schedule,
+            deadline=deadline,
+            cancel=cancel,
+            target_cost=self.lower_bound if self.stop_at_lower_bound else None,
+        )
+        self.best_cost = best_cost
+        self.optimality_gap = optimality_gap(best_cost, self.lower_bound)
 
-            if temperature < self.min_temperature:
-                # print("温度达到下限，提前结束优化。")
-                break
+        self.current_layout = self.current_layout.copy()
+        self.current_layout.set_placement(kernel.placement_ids())
+        self.best_layout = self.current_layout.copy()
+        self.best_layout.set_placement(best_placement)
 
         # print(f"优化完成，最终成本: {best_cost:.2f}")
         return self.best_layout
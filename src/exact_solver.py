@@ -0,0 +1,136 @@
+# 自动选择精确求解的最大晶体管数（状态数为 2^n * n）。
+# 12个晶体管约20ms，比5000次迭代的退火更快；每多一个晶体管耗时约翻倍
+EXACT_MAX_TRANSISTORS = 12
+
+
+def solve_single_row_exact(bdd, transistors, w_wire=0.5, w_area=0.5):
+    """
+    对单行布局的 线长+面积 加权成本做子集动态规划，返回 (最优成本, 最优顺序)。
+
+    按位置从左到右放置晶体管。已放置集合为 S 时，S 与其余晶体管之间的间隙
+    被 cut(S) 个网络跨越（网络的引脚同时在 S 内外），总线长等于各间隙 cut 之和；
+    面积只与相邻两个晶体管是否共享网络有关。因此状态为 (已放置集合, 最后一个晶体管)，
+    复杂度 O(2^n * n * 度数)。
+    :param transistors: 参与布局的晶体管id列表。
+    """
+    ids = sorted(transistors)
+    n = len(ids)
+    if n == 0:
+        return 0.0, []
+    index_of = {tid: k for k, tid in enumerate(ids)}
+    full = (1 << n) - 1
+
+    # 各网络的位掩码，以及每个晶体管所属网络的掩码
+    net_masks_of = [[] for _ in range(n)]
+    for net in bdd.get_nets():
+        mask = 0
+        for pin in net:
+            if pin in index_of:
+                mask |= 1 << index_of[pin]
+        if bin(mask).count("1") > 1:
+            for k in range(n):
+                if mask >> k & 1:
+                    net_masks_of[k].append(mask)
+
+    # 共享网络的邻居（相邻放置可以共享扩散区）
+    neighbors = [
+        [u for u in range(n) if u != v and bdd.share_net(ids[u], ids[v])]
+        for v in range(n)
+    ]
+
+    # cut[S]：由 S 去掉最低位的集合递推，只有该晶体管所在的网络会变化
+    cut = [0] * (full + 1)
+    for s in range(1, full + 1):
+        low = s & -s
+        prev = s ^ low
+        value = cut[prev]
+        for mask in net_masks_of[low.bit_length() - 1]:
+            before = prev & mask
+            if before and before != mask:
+                value -= 1
+            if s & mask != mask:
+                value += 1
+        cut[s] = value
+
+    inf = float("inf")
+    cost = [[inf] * n for _ in range(full + 1)]
+    parent = [[-1] * n for _ in range(full + 1)]
+    for v in range(n):
+        cost[1 << v][v] = 0.0
+    neighbor_bits = [[(u, 1 << u) for u in neighbors[v]] for v in range(n)]
+
+    for s in range(1, full):
+        row = cost[s]
+        gap = w_wire * cut[s]
+        # 不共享网络时，接在当前成本最低的末尾晶体管之后
+        base = min(row)
+        best_last = row.index(base)
+
+        rest = full ^ s
+        while rest:
+            bit = rest & -rest
+            rest ^= bit
+            v = bit.bit_length() - 1
+
+            value = base
+            via = best_last
+            for u, u_bit in neighbor_bits[v]:
+                if s & u_bit and row[u] - w_area < value:
+                    value = row[u] - w_area
+                    via = u
+            value += gap
+
+            t = s | bit
+            if value < cost[t][v]:
+                cost[t][v] = value
+                parent[t][v] = via
+
+    # 从完整集合回溯最优顺序
+    row = cost[full]
+    last = min(range(n), key=row.__getitem__)
+    best_cost = row[last] + w_area * n
+    order = []
+    s = full
+    while last >= 0:
+        order.append(ids[last])
+        last, s = parent[s][last], s ^ (1 << last)
+    order.reverse()
+    return best_cost, order
+
+
+class ExactSingleRowSolver:
+    """
+    小规模单行布局的精确求解器，接口与 EnhancedSimulatedAnnealing 相同。
+    结果确定且最优，不消耗随机数。
+    """
+
+    def __init__(self, initial_layout):
+        self.current_layout = initial_layout
+        self.best_layout = initial_layout
+        self.best_cost = None
+        # 与 EnhancedSimulatedAnnealing 一致的结果属性；精确解的下界即其成本
+        self.lower_bound = None
+        self.optimality_gap = None
+
+    def optimize(
+        self, iterations=None, deadline=None, time_budget_ms=None, cancel=None
+    ):
+        """
+        求解最优顺序。预算参数只为接口兼容，精确求解不会被截断，
+        自动选择的规模下耗时远低于常用的时间预算。
+        """
+        layout = self.current_layout
+        self.best_cost, placement = solve_single_row_exact(
+            layout.bdd, layout.placement, layout.w_wire, layout.w_area
+        )
+        self.best_layout = layout.copy()
+        self.best_layout.set_placement(placement)
+        self.current_layout = self.best_layout
+        self.lower_bound = self.best_cost
+        self.optimality_gap = 0.0
+        return self.best_layout
+
+
+def use_exact_solver(num_transistors, max_transistors=EXACT_MAX_TRANSISTORS):
+    """晶体管数不超过阈值时使用精确求解"""
+    return num_transistors <= max_transistors
@@ -0,0 +1,129 @@
+import json
+import math
+import sys
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+
+# 未启用时 phase() 返回的空上下文，避免每次调用分配对象
+_NULL_PHASE = nullcontext()
+
+# 当前启用的统计对象；为 None 时各处的埋点只做一次判断
+_active = None
+
+
+class Instrumentation:
+    """
+    一次运行的性能统计：各阶段耗时、计数器、按温度区间的接受率和异常信息。
+    通过 enable() 启用，热路径中用 active() 取得当前对象，未启用时开销只有一次判断。
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        # 温度区间（以10为底的对数向下取整）-> [尝试次数, 接受次数]
+        self.temperature_bands = {}
+        self.error = None
+
+    @contextmanager
+    def phase(self, name):
+        """累计一个阶段的耗时（同名阶段多次进入时相加）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def add(self, name, count=1):
+        self.counters[name] = self.counters.get(name, 0) + count
+
+    def add_band(self, band, attempted, accepted):
+        """累加一个温度区间的尝试次数和接受次数"""
+        counts = self.temperature_bands.setdefault(band, [0, 0])
+        counts[0] += attempted
+        counts[1] += accepted
+
+    def record_error(self, error):
+        self.error = {
+            "type": type(error).__name__,
+            "message": str(error),
+            "traceback": "".join(
+                traceback.format_exception(type(error), error, error.__traceback__)
+            ),
+        }
+
+    def to_dict(self):
+        bands = []
+        for band in sorted(self.temperature_bands, key=_band_sort_key):
+            attempted, accepted = self.temperature_bands[band]
+            bands.append(
+                {
+                    "t_min": 0.0 if band is None else 10.0**band,
+                    "t_max": 0.0 if band is None else 10.0 ** (band + 1),
+                    "attempted": attempted,
+                    "accepted": accepted,
+                    "rate": accepted / attempted if attempted else 0.0,
+                }
+            )
+        report = {
+            "phases_ms": {name: t * 1000 for name, t in self.phases.items()},
+            "counters": dict(self.counters),
+            "acceptance_by_temperature": bands,
+        }
+        if self.error is not None:
+            report["error"] = self.error
+        return report
+
+    def emit(self, target="-"):
+        """
+        输出JSON报告。target 为 "-" 时写到标准错误（一行），否则追加到文件，
+        常驻进程的多个请求依次追加为JSON Lines。不写标准输出，以保持成本输出格式。
+        """
+        line = json.dumps(self.to_dict(), ensure_ascii=False)
+        if target == "-":
+            print(line, file=sys.stderr)
+        else:
+            with open(target, "a") as f:
+                f.write(line + "\n")
+
+
+def _band_sort_key(band):
+    return -math.inf if band is None else band
+
+
+def temperature_band(temperature):
+    """温度所在的区间：以10为底的对数向下取整，温度非正时为 None"""
+    return math.floor(math.log10(temperature)) if temperature > 0 else None
+
+
+def enable():
+    """启用统计并返回新的统计对象（替换之前的对象）"""
+    global _active
+    _active = Instrumentation()
+    return _active
+
+
+def disable():
+    """停用统计，返回之前的统计对象"""
+    global _active
+    previous, _active = _active, None
+    return previous
+
+
+def active():
+    """当前启用的统计对象，未启用时为 None"""
+    return _active
+
+
+def phase(name):
+    """统计一个阶段的耗时；未启用时返回空上下文"""
+    if _active is None:
+        return _NULL_PHASE
+    return _active.phase(name)
+
+
+def count(name, n=1):
+    """累加计数器；未启用时不做任何事"""
+    if _active is not None:
+        _active.add(name, n)
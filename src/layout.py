@@ -1,18 +1,49 @@
 import copy
 import random
+from collections.abc import Sequence
 
-import numpy as np
-from utils import calculate_manhattan_wirelength, generate_random_layout
+from utils import generate_random_layout
 
 
 class Layout:
     def __init__(self, bdd, area_size=(100, 100)):
         self.bdd = bdd
         self.area_size = area_size
-        self.transistor_positions = {}
+        self._positions = None
+        self._net_arrays = None
+        self._net_box = None  # 增量移动的网络包围盒，首次 move() 时构建
         self.wire_length = 0
         self.initialize_random_positions()
 
+    @property
+    def transistor_positions(self):
+        """晶体管位置，字典接口，数据保存在NumPy坐标数组中"""
+        return self._positions
+
+    @transistor_positions.setter
+    def transistor_positions(self, positions):
+        # numpy 只在2D布局中使用，延迟导入以保持单行布局流程的启动速度
+        from wirelength import PositionMap
+
+        if self._positions is None:
+            self._positions = PositionMap.empty(self.bdd.get_transistor_count())
+        self._positions.load(positions)
+        self._net_box = None
+
+    def _get_net_arrays(self):
+        """网络的CSR数组，首次使用时编译"""
+        if self._net_arrays is None:
+            from wirelength import NetArrays
+
+            self._net_arrays = NetArrays.from_bdd(self.bdd)
+        return self._net_arrays
+
+    def _evaluate_wire_length(self, metric):
+        """向量化计算线长指标，未放置的晶体管被忽略"""
+        positions = self._positions
+        placed = None if positions.all_placed() else positions.placed
+        return self._get_net_arrays().evaluate(metric, positions.coords, placed)
+
     def initialize_random_positions(self):
         """初始化随机晶体管位置"""
         num_transistors = self.bdd.get_transistor_count()
@@ -23,7 +54,10 @@ class Layout:
         self.wire_length = self.calculate_manhattan_wire_length()
 
     def calculate_manhattan_wire_length(self, debug=False):
-        """计算曼哈顿距离线长"""
+        """计算曼哈顿距离线长（网络内所有晶体管对的距离之和）"""
+        if not debug:
+            return self._evaluate_wire_length("clique")
+
         nets = self.bdd.get_nets()
         total_length = 0
 
@@ -73,6 +107,9 @@ class Layout:
 
     def calculate_half_perimeter_wire_length(self, debug=False):
         """计算半周线长"""
+        if not debug:
+            return self._evaluate_wire_length("hpwl")
+
         nets = self.bdd.get_nets()
         total_length = 0
 
@@ -117,20 +154,23 @@ class Layout:
             print(f"总半周线长: {total_length}")
         return total_length
 
-    def generate_neighbor(self):
-        """生成邻居解"""
-        new_layout = Layout(self.bdd, self.area_size)
-        new_layout.transistor_positions = copy.deepcopy(self.transistor_positions)
-
-        # 随机选择一个晶体管并移动其位置
-        if not self.transistor_positions:
-            return new_layout
+    def calculate_star_manhattan_wire_length(self):
+        """计算星形曼哈顿线长（各晶体管到网络质心的距离之和）"""
+        return self._evaluate_wire_length("star")
 
-        transistor_id = random.choice(list(self.transistor_positions.keys()))
+    def propose_move(self):
+        """
+        随机选择一个晶体管，在当前位置附近生成新位置（移动范围为区域大小的10%）。
+        :return: (晶体管id, 新位置)
+        """
+        positions = self._positions
+        if positions.all_placed():
+            transistor_id = random.randrange(len(positions))
+        else:
+            transistor_id = random.choice(list(positions))
 
-        # 在当前位置附近生成新位置
-        current_pos = self.transistor_positions[transistor_id]
-        move_range = min(self.area_size) * 0.1  # 移动范围为区域大小的10%
+        current_pos = positions[transistor_id]
+        move_range = min(self.area_size) * 0.1
 
         new_x = max(
             0,
@@ -146,13 +186,109 @@ class Layout:
                 current_pos[1] + random.uniform(-move_range, move_range),
             ),
         )
+        return transistor_id, (new_x, new_y)
+
+    def generate_neighbor(self):
+        """生成邻居解（移动一个晶体管的副本）"""
+        new_layout = self.copy()
+        if not self.transistor_positions:
+            return new_layout
 
-        new_layout.transistor_positions[transistor_id] = (new_x, new_y)
-        # 不需要调试信息的快速计算
+        transistor_id, new_pos = self.propose_move()
+        new_layout.transistor_positions[transistor_id] = new_pos
         new_layout.wire_length = new_layout.calculate_manhattan_wire_length(debug=False)
 
         return new_layout
 
+    def copy(self):
+        """复制布局，共享BDD和网络数组，不重新随机化位置"""
+        new_layout = copy.copy(self)
+        new_layout._positions = self._positions.copy()
+        new_layout._net_box = None
+        return new_layout
+
+    def _build_move_state(self):
+        """构建增量移动所需的状态：各网络的包围盒和当前半周线长"""
+        positions = self._positions
+        if not positions.all_placed():
+            raise ValueError("增量移动要求所有晶体管都已放置")
+
+        xs = positions.coords[:, 0].tolist()
+        ys = positions.coords[:, 1].tolist()
+        self._net_pins = self.bdd.get_nets()
+        self._pin_nets = self.bdd.get_transistor_nets()
+        self._net_box = []
+        self._hpwl = 0.0
+        for net in self._net_pins:
+            net_xs = [xs[p] for p in net]
+            net_ys = [ys[p] for p in net]
+            box = [min(net_xs), max(net_xs), min(net_ys), max(net_ys)]
+            self._net_box.append(box)
+            self._hpwl += (box[1] - box[0]) + (box[3] - box[2])
+
+        # 撤销信息：(晶体管id, 原位置, 原包围盒列表, 线长变化量)
+        self._last_move = None
+
+    def get_tracked_cost(self):
+        """增量维护的半周线长，与 get_cost() 相同但为 O(1)"""
+        if self._net_box is None:
+            self._build_move_state()
+        return self._hpwl
+
+    def move(self, transistor_id, new_pos):
+        """
+        把一个晶体管移到 new_pos，只更新它所在网络的包围盒，返回半周线长变化量。
+        最近一次移动可以用 undo() 撤销。
+        对 transistor_positions 整体赋值会使增量状态失效并在下次调用时重建；
+        逐项修改 transistor_positions 不会被跟踪，增量移动期间应只通过 move() 修改位置。
+        """
+        if self._net_box is None:
+            self._build_move_state()
+
+        coords = self._positions.coords
+        old_x, old_y = coords[transistor_id].tolist()
+        new_x, new_y = new_pos
+        coords[transistor_id, 0] = new_x
+        coords[transistor_id, 1] = new_y
+
+        saved_boxes = []
+        delta = 0.0
+        for net in self._pin_nets[transistor_id]:
+            box = self._net_box[net]
+            saved_boxes.append((net, box))
+            x_lo, x_hi, y_lo, y_hi = box
+
+            # 原位置严格在包围盒内部时边界只会扩大；位于边界上时重新扫描该网络
+            if x_lo < old_x < x_hi:
+                x_lo, x_hi = min(x_lo, new_x), max(x_hi, new_x)
+            else:
+                net_xs = [coords[p, 0] for p in self._net_pins[net]]
+                x_lo, x_hi = float(min(net_xs)), float(max(net_xs))
+            if y_lo < old_y < y_hi:
+                y_lo, y_hi = min(y_lo, new_y), max(y_hi, new_y)
+            else:
+                net_ys = [coords[p, 1] for p in self._net_pins[net]]
+                y_lo, y_hi = float(min(net_ys)), float(max(net_ys))
+
+            new_box = [x_lo, x_hi, y_lo, y_hi]
+            self._net_box[net] = new_box
+            delta += (
+                (x_hi - x_lo) + (y_hi - y_lo) - (box[1] - box[0]) - (box[3] - box[2])
+            )
+
+        self._hpwl += delta
+        self._last_move = (transistor_id, (old_x, old_y), saved_boxes, delta)
+        return delta
+
+    def undo(self):
+        """撤销最近一次 move()"""
+        transistor_id, old_pos, saved_boxes, delta = self._last_move
+        self._positions.coords[transistor_id] = old_pos
+        for net, box in saved_boxes:
+            self._net_box[net] = box
+        self._hpwl -= delta
+        self._last_move = None
+
     def get_cost(self):
         """获取布局成本 - 使用半周线长"""
         return self.calculate_half_perimeter_wire_length(debug=False)
@@ -221,47 +357,51 @@ class Layout:
             print(f"  ... 还有 {len(self.transistor_positions) - 10} 个晶体管")
 
 
-import random
-
-import numpy as np
-
-
 class SingleRowLayout:
     """
     表示和评估一个单行的晶体管布局。
     优化目标是线长和面积（通过扩散区共享）的加权和。
     """
 
-    def __init__(self, bdd, w_wire=0.5, w_area=0.5):
+    def __init__(self, bdd, w_wire=0.5, w_area=0.5, placement=None):
         """
         初始化单行布局。
         :param bdd: BDD对象，包含晶体管和网络信息。
         :param w_wire: 线长成本的权重。
         :param w_area: 面积成本的权重。
+        :param placement: 初始顺序（晶体管id列表），例如 constructive_placement() 的结果；
+            None 时随机打乱。
         """
         self.bdd = bdd
         self.w_wire = w_wire
         self.w_area = w_area
 
-        # bdd.transistors 是一个字典列表，例如 [{'id': 0, ...}, {'id': 1, ...}]
-        if isinstance(bdd.transistors, list):
-            self.transistor_map = {t["id"]: t for t in bdd.transistors}
-            self.transistors = list(self.transistor_map.keys())
-        elif isinstance(bdd.transistors, dict):
+        # bdd.transistors 是按id索引的晶体管视图，例如 [{'id': 0, ...}, {'id': 1, ...}]；
+        # 视图按需生成字典，这里只取id，不遍历其内容
+        if isinstance(bdd.transistors, dict):
             self.transistor_map = bdd.transistors
             self.transistors = list(bdd.transistors.keys())
+        elif isinstance(bdd.transistors, Sequence):
+            self.transistor_map = bdd.transistors
+            self.transistors = list(range(len(bdd.transistors)))
         else:
             raise TypeError(
                 f"Unsupported type for bdd.transistors: {type(bdd.transistors)}"
             )
 
-        self.placement = list(self.transistors)
-        random.shuffle(self.placement)
+        if placement is not None:
+            self.placement = list(placement)
+        else:
+            self.placement = list(self.transistors)
+            random.shuffle(self.placement)
 
         self.pos_map = {
             transistor_id: i for i, transistor_id in enumerate(self.placement)
         }
 
+        # 增量评估内核，首次调用 swap_delta 时按需构建
+        self._kernel = None
+
     def get_cost(self):
         """计算布局的总成本（线长 + 面积）"""
         cost_wire = self.calculate_wire_length()
@@ -288,27 +428,16 @@ class SingleRowLayout:
         计算面积成本。成本定义为 (总晶体管数 - 可共享扩散区的邻居对数)。
         最小化此成本等同于最大化扩散区共享。
         """
+        # 相邻两个晶体管出现在同一个网络中即可共享扩散区。
+        # 使用BDD预先构建的共享索引，每个相邻对的判断为 O(1)，整体一次线性扫描。
+        transistor_nets = self.bdd.get_transistor_nets()
         shared_pairs = 0
-        # --- FIX START ---
-        # 修复: 不再依赖 'source_net'/'drain_net' 键。
-        # 而是检查相邻的两个晶体管是否出现在同一个网络中。
         for i in range(len(self.placement) - 1):
-            t1_id = self.placement[i]
-            t2_id = self.placement[i + 1]
-
-            # 遍历所有网络，查找是否有网络同时包含 t1_id 和 t2_id
-            is_shared = False
-            for net in self.bdd.nets:
-                # 如果一个网络同时包含这两个相邻的晶体管，则它们可以共享扩散区
-                if t1_id in net and t2_id in net:
-                    # 排除全局网络（如Vdd/GND），这里假设它们不被列为普通网络
-                    # 或者假设共享任何网络都有助于减少面积
-                    is_shared = True
-                    break  # 找到一个共享网络就足够了
-
-            if is_shared:
-                shared_pairs += 1
-        # --- FIX END ---
+            nets2 = transistor_nets[self.placement[i + 1]]
+            for net_idx in transistor_nets[self.placement[i]]:
+                if net_idx in nets2:
+                    shared_pairs += 1
+                    break
 
         return len(self.transistors) - shared_pairs
 
@@ -330,6 +459,44 @@ class SingleRowLayout:
 
         return new_layout
 
+    def _get_kernel(self):
+        """按需构建与当前顺序同步的数组化内核，用于增量评估"""
+        if self._kernel is None:
+            from single_row_kernel import SingleRowKernel
+
+            self._kernel = SingleRowKernel.from_layout(self)
+        return self._kernel
+
+    def swap_delta(self, i, j):
+        """
+        计算交换位置 i、j 两个晶体管后的成本变化量，不修改布局。
+        只访问两个晶体管所属的网络和至多四个受影响的相邻对。
+        """
+        kernel = self._get_kernel()
+        cost_delta = kernel.swap(i, j)
+        kernel.undo()
+        return cost_delta
+
+    def apply_swap(self, i, j):
+        """原地交换位置 i、j 两个晶体管，并同步更新增量评估状态"""
+        self._get_kernel().swap(i, j)
+
+        t1_id, t2_id = self.placement[i], self.placement[j]
+        self.placement[i], self.placement[j] = t2_id, t1_id
+        self.pos_map[t1_id], self.pos_map[t2_id] = j, i
+
+    def get_tracked_cost(self):
+        """返回增量维护的总成本，与 get_cost() 结果相同，但只需 O(1)"""
+        return self._get_kernel().cost()
+
+    def set_placement(self, placement):
+        """设置新的晶体管顺序，增量评估状态随之失效"""
+        self.placement = list(placement)
+        self.pos_map = {
+            transistor_id: i for i, transistor_id in enumerate(self.placement)
+        }
+        self._kernel = None
+
     def copy(self):
         """创建当前布局的深拷贝"""
         new_layout = object.__new__(SingleRowLayout)
@@ -340,6 +507,7 @@ class SingleRowLayout:
         new_layout.transistors = self.transistors
         new_layout.placement = self.placement[:]
         new_layout.pos_map = self.pos_map.copy()
+        new_layout._kernel = None
         return new_layout
 
     def __str__(self):
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Liberty (.lib) 单元库解析器。
+
+用一个正则表达式逐条语句线性扫描一遍，同时构建 组/属性 树:
+  - 组:       name (args) { ... }
+  - 简单属性: name : value ;
+  - 复杂属性: name (args) ;
+在树之上提供 cell、pin（方向、function、电容、时钟）、ff/latch 组的访问接口，
+命令行输出与 readlib.py 相同格式的单元逻辑报告。
+
+用法:
+    python src/liberty.py smic_cmos.lib [--cells AND2_X1,DFF_X1] [--output report.txt]
+"""
+
+import argparse
+import re
+import sys
+
+# 逐条语句匹配（连同前面的空白）；注释、续行反斜杠和多余的分号各分组均为空，被跳过
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_NAME = r'[^\s{}():;,"\\]+'
+_STATEMENT = re.compile(
+    r"\s*(?:/\*.*?\*/|//[^\n]*|[;\\]"
+    r"|(\})"  # 组结束
+    rf"|({_NAME})\s*(?:"
+    rf'(:)\s*({_STRING}|[^;\n{{}}"]*)\s*;?'  # 简单属性
+    rf'|\(([^")]*(?:{_STRING}[^")]*)*)\)\s*(\{{)?'  # 组或复杂属性
+    r")|(\S))",  # 无法识别
+    re.S,
+)
+# 参数列表中的字符串（取引号内的内容）或单词；逗号和续行符被跳过
+_ARGUMENT = re.compile(rf'"([^"\\]*(?:\\.[^"\\]*)*)"|({_NAME}(?:[ \t]+{_NAME})*)')
+
+
+class LibertyGroup:
+    """
+    Liberty 组：类型（如 cell、pin、timing）、参数、简单属性、复杂属性和子组。
+    简单属性保存为 {名称: 值}（同名属性取最后一个），值去掉引号但不做类型转换；
+    复杂属性按出现顺序保存为 [(名称, 参数列表)]。
+    """
+
+    __slots__ = ("type", "args", "attributes", "complex_attributes", "groups")
+
+    def __init__(self, type, args):
+        self.type = type
+        self.args = args
+        self.attributes = {}
+        self.complex_attributes = []
+        self.groups = []
+
+    @property
+    def name(self):
+        """第一个参数，cell/pin 等命名组的名称"""
+        return self.args[0] if self.args else None
+
+    def get(self, name, default=None):
+        """简单属性的值"""
+        return self.attributes.get(name, default)
+
+    def complex_attribute(self, name):
+        """第一个同名复杂属性的参数列表，不存在时返回 None"""
+        for attr_name, args in self.complex_attributes:
+            if attr_name == name:
+                return args
+        return None
+
+    def iter_groups(self, type):
+        """指定类型的直接子组"""
+        return (group for group in self.groups if group.type == type)
+
+    def find(self, type, name=None):
+        """第一个指定类型（和名称）的直接子组，不存在时返回 None"""
+        for group in self.groups:
+            if group.type == type and (name is None or name in group.args):
+                return group
+        return None
+
+    def __repr__(self):
+        return f"LibertyGroup({self.type}, {self.args})"
+
+
+def _unquote(value):
+    if value[:1] == '"':
+        value = _unescape(value[1:-1])
+    return value
+
+
+def _unescape(value):
+    """去掉字符串中的续行符"""
+    if "\\" in value:
+        value = value.replace("\\\r\n", "").replace("\\\n", "")
+    return value
+
+
+def _parse_arguments(text):
+    """组或复杂属性的参数列表"""
+    if '"' not in text and "\\" not in text:
+        return [arg.strip() for arg in text.split(",")] if text.strip() else []
+    return [
+        _unescape(quoted) if quoted else word
+        for quoted, word in _ARGUMENT.findall(text)
+    ]
+
+
+def _error_position(text):
+    """第一个无法识别的语句或多余的 } 在文本中的位置，只在报错时重新扫描"""
+    depth = 0
+    for match in _STATEMENT.finditer(text):
+        if match.group(7) is not None:
+            return match.start(7)
+        if match.group(6) is not None:
+            depth += 1
+        elif match.group(1) is not None:
+            if depth == 0:
+                return match.start(1)
+            depth -= 1
+    return len(text)
+
+
+def parse_liberty(text):
+    """
+    解析 Liberty 文本，返回类型为空的根组，其子组为文件中的顶层组（通常是一个 library）。
+    :raises ValueError: 语法错误（括号不匹配、无法识别的语句等），信息中含行号。
+    """
+    root = LibertyGroup("", [])
+    stack = [root]
+    group = root
+
+    def error(message, position):
+        line = text.count("\n", 0, position) + 1
+        return ValueError(f"Liberty 语法错误 (第{line}行): {message}")
+
+    # findall 在C中完成扫描，避免为每条语句创建匹配对象
+    for close, name, colon, value, args, opening, other in _STATEMENT.findall(text):
+        if colon:
+            group.attributes[name] = (
+                _unquote(value) if value[:1] == '"' else value.strip()
+            )
+        elif name:
+            args = _parse_arguments(args)
+            if opening:
+                child = LibertyGroup(name, args)
+                group.groups.append(child)
+                stack.append(child)
+                group = child
+            else:
+                group.complex_attributes.append((name, args))
+        elif close:
+            if len(stack) == 1:
+                raise error("多余的 }", _error_position(text))
+            stack.pop()
+            group = stack[-1]
+        elif other:
+            raise error(f"无法识别的语句: {other}", _error_position(text))
+
+    if len(stack) > 1:
+        raise error(f"组 {group.type}({', '.join(group.args)}) 缺少 }}", len(text))
+    return root
+
+
+class Pin:
+    """单元的一个引脚"""
+
+    def __init__(self, name, group):
+        self.name = name
+        self.group = group
+
+    @property
+    def direction(self):
+        return self.group.get("direction")
+
+    @property
+    def function(self):
+        return self.group.get("function")
+
+    @property
+    def capacitance(self):
+        value = self.group.get("capacitance")
+        return float(value) if value is not None else None
+
+    @property
+    def is_clock(self):
+        return self.group.get("clock") == "true"
+
+    def timing_groups(self):
+        """引脚下的 timing 组"""
+        return list(self.group.iter_groups("timing"))
+
+
+class Cell:
+    """库中的一个单元：引脚、输出函数和时序单元的 ff/latch 定义"""
+
+    def __init__(self, group):
+        self.group = group
+        self.name = group.name
+        self.pins = {}
+        for pin_group in _iter_pin_groups(group):
+            for name in pin_group.args:
+                self.pins[name] = Pin(name, pin_group)
+
+    @property
+    def ff(self):
+        """ff 组的信息 {q_pin, qn_pin, next_state, clocked_on, clear, preset}，没有时为 None"""
+        return _storage_info(self.group.find("ff"))
+
+    @property
+    def latch(self):
+        """latch 组的信息 {q_pin, qn_pin, data_in, enable, clear, preset}，没有时为 None"""
+        return _storage_info(self.group.find("latch"))
+
+    @property
+    def is_sequential(self):
+        return self.group.find("ff") is not None or self.group.find("latch") is not None
+
+    @property
+    def type(self):
+        return "sequential" if self.is_sequential else "combinational"
+
+    @property
+    def functions(self):
+        """{输出引脚: function}，按引脚出现顺序"""
+        return {name: pin.function for name, pin in self.pins.items() if pin.function}
+
+    @property
+    def direct_functions(self):
+        """单元中所有 function 属性的值（不论是否在 pin 组中），按出现顺序"""
+        return list(_iter_function_values(self.group))
+
+    def input_pins(self):
+        return [name for name, pin in self.pins.items() if pin.direction == "input"]
+
+    def output_pins(self):
+        return [name for name, pin in self.pins.items() if pin.direction == "output"]
+
+
+def _iter_pin_groups(group):
+    """单元的 pin 组，包括 bus/bundle 中的 pin"""
+    for child in group.groups:
+        if child.type == "pin":
+            yield child
+        elif child.type in ("bus", "bundle"):
+            yield from _iter_pin_groups(child)
+
+
+def _iter_function_values(group):
+    """组及其子组（不含嵌套的 cell）中的 function 属性"""
+    function = group.get("function")
+    if function is not None:
+        yield function
+    for child in group.groups:
+        if child.type != "cell":
+            yield from _iter_function_values(child)
+
+
+def _iter_cell_groups(group):
+    """
+    library 下的 cell 组。缺少 } 的 cell 会把后面的 cell 当作子组，
+    这些 cell 同样被收集（与按名称搜索 cell 的旧实现结果一致）。
+    """
+    for child in group.groups:
+        if child.type == "cell":
+            yield child
+            yield from _iter_cell_groups(child)
+
+
+def _storage_info(group):
+    if group is None:
+        return None
+    info = dict(group.attributes)
+    if group.args:
+        info["q_pin"] = group.args[0]
+    if len(group.args) > 1:
+        info["qn_pin"] = group.args[1]
+    return info
+
+
+class Library:
+    """解析后的 Liberty 库，cells 为 {单元名: Cell}，按文件中的顺序"""
+
+    def __init__(self, group, trailing_cells=()):
+        """
+        :param group: library 组。
+        :param trailing_cells: library 组之后的顶层 cell 组（library 被多余的 } 提前闭合时），
+            同样属于该库。
+        """
+        self.group = group
+        self.name = group.name
+        self.cells = {}
+        for cell_group in _iter_cell_groups(group):
+            cell = Cell(cell_group)
+            self.cells[cell.name] = cell
+        for cell_group in trailing_cells:
+            for nested in (cell_group, *_iter_cell_groups(cell_group)):
+                cell = Cell(nested)
+                self.cells[cell.name] = cell
+
+    @property
+    def attributes(self):
+        return self.group.attributes
+
+    def cell(self, name):
+        return self.cells[name]
+
+
+def parse_library(text):
+    """
+    解析 Liberty 文本中的 library 组。
+    library 组之后的顶层 cell 也收集到库中，与按名称扫描 cell 的
+    liberty_index.open_liberty 得到相同的单元。
+    """
+    root = parse_liberty(text)
+    group = root.find("library")
+    if group is None:
+        raise ValueError("Liberty 文本中没有 library 组")
+    following = root.groups[root.groups.index(group) + 1 :]
+    return Library(group, [child for child in following if child.type == "cell"])
+
+
+def read_liberty(path):
+    """读取并解析 Liberty 文件"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_library(f.read())
+
+
+def infer_logic_function(cell):
+    """根据单元信息推断逻辑功能的描述，无法推断时返回 None"""
+    if cell.is_sequential:
+        ff = cell.ff
+        if ff is not None and ff.get("clocked_on") and ff.get("next_state"):
+            reset_info = (
+                f" with reset ({ff.get('clear', 'none')})" if ff.get("clear") else ""
+            )
+            return f"D Flip-Flop{reset_info}: Q(t+1) = {ff['next_state']} on {ff['clocked_on']} rising edge"
+        latch = cell.latch
+        if latch is not None and latch.get("data_in") and latch.get("enable"):
+            return f"D Latch: Q = {latch['data_in']} while {latch['enable']}"
+        return None
+
+    # 检查已知的组合逻辑单元
+    name = cell.name
+    if "OR2" in name:
+        return "2-input OR Gate: Z = A | B"
+    elif "XOR2" in name:
+        return "2-input XOR Gate: Z = A ^ B"
+    elif "AND2" in name:
+        return "2-input AND Gate: Z = A & B"
+    elif "INV" in name:
+        return "Inverter: Z = !A"
+    elif "NAND2" in name:
+        return "2-input NAND Gate: Z = !(A & B)"
+    elif "NOR2" in name:
+        return "2-input NOR Gate: Z = !(A | B)"
+
+    # 根据function推断
+    for function in cell.functions.values():
+        if "|" in function:
+            return f"OR-type function: {function}"
+        elif "&" in function:
+            return f"AND-type function: {function}"
+        elif "^" in function:
+            return f"XOR-type function: {function}"
+        elif "!" in function or "~" in function:
+            return f"Inverter-type function: {function}"
+    return None
+
+
+def format_cell_report(cell):
+    """单个单元的报告行"""
+    lines = [f"CELL: {cell.name}", f"TYPE: {cell.type.upper()}", "-" * 40]
+
+    ff = cell.ff
+    if ff is not None:
+        lines.append("FLIP-FLOP DEFINITION:")
+        lines.append(f"  Q Pin: {ff.get('q_pin', 'N/A')}")
+        lines.append(f"  QN Pin: {ff.get('qn_pin', 'N/A')}")
+        lines.append(f"  Next State: {ff.get('next_state', 'N/A')}")
+        lines.append(f"  Clocked On: {ff.get('clocked_on', 'N/A')}")
+        lines.append(f"  Clear: {ff.get('clear', 'N/A')}")
+    latch = cell.latch
+    if latch is not None:
+        lines.append("LATCH DEFINITION:")
+        lines.append(f"  Q Pin: {latch.get('q_pin', 'N/A')}")
+        lines.append(f"  QN Pin: {latch.get('qn_pin', 'N/A')}")
+        lines.append(f"  Data In: {latch.get('data_in', 'N/A')}")
+        lines.append(f"  Enable: {latch.get('enable', 'N/A')}")
+
+    if cell.pins:
+        lines.append("PINS:")
+        for name, pin in cell.pins.items():
+            clock = " [CLOCK]" if pin.is_clock else ""
+            capacitance = (
+                f" [Cap: {pin.capacitance}]" if pin.capacitance is not None else ""
+            )
+            lines.append(f"  {name}: {pin.direction or 'N/A'}{clock}{capacitance}")
+            if pin.function:
+                lines.append(f"    Function: {pin.function}")
+    else:
+        # 没有 pin 组时直接列出单元中的 function 属性
+        direct_functions = cell.direct_functions
+        if direct_functions:
+            lines.append("DIRECT FUNCTIONS:")
+            for function in direct_functions:
+                lines.append(f"  {function}")
+
+    functions = cell.functions
+    if functions:
+        lines.append("OUTPUT FUNCTIONS:")
+        for name, function in functions.items():
+            lines.append(f"  {name}: {function}")
+
+    logic_function = infer_logic_function(cell)
+    if logic_function:
+        lines.append(f"INFERRED LOGIC: {logic_function}")
+    return lines
+
+
+def generate_final_report(library, cell_names=None, file=None):
+    """
+    输出单元逻辑报告和统计信息。各节与原 readlib.py 的报告相同，以下内容按库的实际结构输出:
+      - pg_pin（VDD/VSS 等电源引脚）不列入 PINS，旧实现的正则把 pg_pin(VDD) 误当作 pin；
+      - 引脚电容只取 capacitance 属性，输出引脚不再显示 max_capacitance；
+      - 含 latch 组的单元为 SEQUENTIAL，并输出 LATCH DEFINITION 和 D Latch 的推断逻辑；
+      - 缺少 } 的 cell 之后的单元各自报告，旧实现把它们的引脚并入前一个单元；
+      - 报告前不再输出逐个单元的解析进度。
+    :param cell_names: 只报告这些单元，None 表示全部。
+    :raises ValueError: cell_names 中有库中不存在的单元。
+    """
+    file = file or sys.stdout
+    if cell_names is None:
+        cells = list(library.cells.values())
+    else:
+        unknown = [name for name in cell_names if name not in library.cells]
+        if unknown:
+            raise ValueError(f"库中没有单元: {', '.join(unknown)}")
+        cells = [library.cell(name) for name in cell_names]
+
+    print("=" * 80, file=file)
+    print("FINAL CELL LOGIC REPORT", file=file)
+    print("=" * 80, file=file)
+    for cell in cells:
+        print(file=file)
+        print("\n".join(format_cell_report(cell)), file=file)
+
+    sequential_count = sum(1 for cell in cells if cell.is_sequential)
+    print("\n" + "=" * 80, file=file)
+    print("SUMMARY:", file=file)
+    print(f"Total Cells: {len(cells)}", file=file)
+    print(f"Sequential Cells: {sequential_count}", file=file)
+    print(f"Combinational Cells: {len(cells) - sequential_count}", file=file)
+    print("=" * 80, file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="解析 Liberty 单元库并输出单元逻辑报告"
+    )
+    parser.add_argument("library", help="Liberty 文件路径")
+    parser.add_argument("--cells", help="逗号分隔的单元名，默认全部")
+    parser.add_argument("--output", help="报告文件路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    cell_names = args.cells.split(",") if args.cells else None
+    if cell_names is None:
+        library = read_liberty(args.library)
+    else:
+        # 只报告少数单元时按索引只解析这些单元
+        from liberty_index import open_liberty
+
+        library = open_liberty(args.library)
+        unknown = [name for name in cell_names if name not in library.cells]
+        if unknown:
+            parser.error(f"库中没有单元: {', '.join(unknown)}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            generate_final_report(library, cell_names, f)
+    else:
+        generate_final_report(library, cell_names)
+
+
+if __name__ == "__main__":
+    main()
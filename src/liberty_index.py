@@ -0,0 +1,283 @@
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import re
+from collections.abc import Mapping
+
+from liberty import Cell, parse_liberty
+
+# 索引文件格式版本；扫描规则变化时递增，使旧索引失效
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".cellidx"
+
+# cell 组的开始；名称可以带引号。前一个字节必须是空白或 { } ;，排除 xcell( 之类的名称
+_CELL_START = re.compile(rb'cell\s*\(\s*"?([^")\s]+)"?\s*\)\s*\{')
+_STATEMENT_BOUNDARY = frozenset(b" \t\r\n{};")
+
+# 批量解析时每个进程分到的任务数，任务按字节数均分
+CHUNKS_PER_WORKER = 4
+
+
+def _file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def scan_cells(data):
+    """
+    扫描 cell 组的位置，不做完整解析。
+    每个 cell 从其开始位置延伸到下一个 cell 之前；花括号配平时在最后一个配平的 } 处结束
+    （文件末尾多出的 } 属于 library），缺少 } 时延伸到下一个 cell 之前，解析时补齐。
+    :param data: bytes 或 mmap。
+    :return: [(名称, 开始字节, 结束字节)]，按文件中的顺序。
+    """
+    starts = []
+    for match in _CELL_START.finditer(data):
+        start = match.start()
+        if start == 0 or data[start - 1] in _STATEMENT_BOUNDARY:
+            starts.append((match.group(1).decode("utf-8", errors="replace"), start))
+
+    cells = []
+    for k, (name, start) in enumerate(starts):
+        end = starts[k + 1][1] if k + 1 < len(starts) else len(data)
+        segment = data[start:end]
+        extra = segment.count(b"}") - segment.count(b"{")
+        close = len(segment)
+        if extra >= 0:
+            # 去掉 extra 个尾部多余的 }，停在与开头配平的 } 之后
+            for _ in range(extra + 1):
+                close = segment.rfind(b"}", 0, close)
+            close += 1
+        cells.append((name, start, start + close))
+    return cells
+
+
+def _parse_cell(data, name, start, end):
+    """解析一个 cell 的字节范围，缺少的 } 在末尾补齐"""
+    text = data[start:end].decode("utf-8", errors="replace")
+    missing = text.count("{") - text.count("}")
+    if missing > 0:
+        text += "}" * missing
+    try:
+        group = parse_liberty(text).find("cell")
+    except ValueError as e:
+        raise ValueError(f"单元 {name}: {e}") from e
+    if group is None:
+        raise ValueError(f"单元 {name}: 无法解析")
+    return Cell(group)
+
+
+def _open_mmap(path):
+    """只读映射整个文件；空文件返回 b""（mmap 不能映射长度为0的文件）"""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _map_chunk(path, ranges, func):
+    """工作进程：映射文件，解析一组 cell 并对每个 cell 调用 func"""
+    data = _open_mmap(path)
+    try:
+        return [
+            (name, func(_parse_cell(data, name, start, end)))
+            for name, start, end in ranges
+        ]
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def cell_group(cell):
+    """map_cells 的默认函数：返回 cell 的组（可以跨进程传回）"""
+    return cell.group
+
+
+class _LazyCells(Mapping):
+    """按需解析的 {单元名: Cell}，已解析的单元被缓存"""
+
+    def __init__(self, library):
+        self._library = library
+        self._parsed = {}
+
+    def __getitem__(self, name):
+        cell = self._parsed.get(name)
+        if cell is None:
+            start, end = self._library.ranges[name]
+            cell = _parse_cell(self._library.data, name, start, end)
+            self._parsed[name] = cell
+        return cell
+
+    def __iter__(self):
+        return iter(self._library.ranges)
+
+    def __len__(self):
+        return len(self._library.ranges)
+
+    def __contains__(self, name):
+        return name in self._library.ranges
+
+
+class LazyLibrary:
+    """
+    内存映射的 Liberty 库：打开时只读入 cell 名称到字节范围的索引，cell 在首次访问时才解析。
+    接口与 liberty.Library 相同（group、cells、cell()），group 为不含 cell 的 library 组
+    （属性、lu_table_template 等）。
+
+    索引保存在库文件旁边的 <库文件>.cellidx（或 index_dir 中），以文件大小和修改时间校验；
+    修改时间变化而大小不变时再比较内容哈希，内容未变则沿用索引。
+    """
+
+    def __init__(self, path, index_dir=None, use_index_cache=True):
+        """
+        :param path: Liberty 文件路径。
+        :param index_dir: 索引文件目录，默认与库文件相同；目录不可写时不保存索引。
+        :param use_index_cache: 为 False 时总是重新扫描且不保存索引。
+        """
+        self.path = path
+        self.data = _open_mmap(path)
+        self.index_path = None
+        if use_index_cache:
+            directory = index_dir or os.path.dirname(os.path.abspath(path))
+            self.index_path = os.path.join(
+                directory, os.path.basename(path) + INDEX_SUFFIX
+            )
+
+        self.index_from_cache = False
+        cells = self._load_index()
+        if cells is None:
+            cells = scan_cells(self.data)
+            self._store_index(cells)
+        self.ranges = {name: (start, end) for name, start, end in cells}
+
+        # library 头部：第一个 cell 之前的内容
+        header_end = min((start for start, _ in self.ranges.values()), default=None)
+        header = self.data[: len(self.data) if header_end is None else header_end]
+        text = header.decode("utf-8", errors="replace")
+        if header_end is not None:
+            text += "}" * (text.count("{") - text.count("}"))
+        self.group = parse_liberty(text).find("library")
+        if self.group is None:
+            raise ValueError(f"{path} 中没有 library 组")
+        self.name = self.group.name
+        self.cells = _LazyCells(self)
+
+    @property
+    def attributes(self):
+        return self.group.attributes
+
+    def cell(self, name):
+        return self.cells[name]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self):
+        """读取并校验索引，无效时返回 None"""
+        if self.index_path is None:
+            return None
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            return None
+
+        size, mtime_ns = self._stat()
+        if index.get("size") != size:
+            return None
+        if index.get("mtime_ns") != mtime_ns:
+            # 只是被 touch 过时内容哈希不变，沿用索引并更新修改时间
+            if index.get("sha256") != _file_digest(self.data):
+                return None
+            index["mtime_ns"] = mtime_ns
+            self._write_index(index)
+        self.index_from_cache = True
+        return [tuple(entry) for entry in index["cells"]]
+
+    def _store_index(self, cells):
+        if self.index_path is None:
+            return
+        size, mtime_ns = self._stat()
+        self._write_index(
+            {
+                "version": INDEX_VERSION,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "sha256": _file_digest(self.data),
+                "cells": [list(entry) for entry in cells],
+            }
+        )
+
+    def _write_index(self, index):
+        # 先写临时文件再替换，避免并发读到半个文件；目录不可写时放弃保存
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def map_cells(self, func=cell_group, names=None, workers=None):
+        """
+        用进程池并行解析 cell 并对每个 cell 调用 func（须为可 pickle 的模块级函数），
+        返回 {单元名: func(cell)}，按索引中的顺序。func 只返回需要的结果（如函数表达式、
+        查找表）时传回主进程的数据最少；传回整个组树的序列化开销与解析本身相当。
+        :param names: 只处理这些单元，None 表示全部。
+        :param workers: 进程数，默认CPU核数；为 1 时在当前进程中执行。
+        """
+        names = list(self.ranges) if names is None else list(names)
+        ranges = [(name, *self.ranges[name]) for name in names]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(ranges) <= 1:
+            return {
+                name: func(_parse_cell(self.data, name, start, end))
+                for name, start, end in ranges
+            }
+
+        # 按字节数把 cell 均分为若干任务
+        total = sum(end - start for _, start, end in ranges)
+        target = max(1, total // (workers * CHUNKS_PER_WORKER))
+        chunks = [[]]
+        size = 0
+        for entry in ranges:
+            if size >= target:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(entry)
+            size += entry[2] - entry[1]
+
+        results = {}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_map_chunk, self.path, chunk, func) for chunk in chunks
+            ]
+            for future in futures:
+                results.update(future.result())
+        return {name: results[name] for name in names}
+
+    def parse_all(self, workers=None):
+        """并行解析全部 cell 并放入缓存，之后访问 cells 不再解析"""
+        groups = self.map_cells(cell_group, workers=workers)
+        for name, group in groups.items():
+            self.cells._parsed[name] = Cell(group)
+        return self.cells
+
+
+def open_liberty(path, index_dir=None, use_index_cache=True):
+    """打开 Liberty 文件并返回 LazyLibrary"""
+    return LazyLibrary(path, index_dir=index_dir, use_index_cache=use_index_cache)
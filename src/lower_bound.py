@@ -0,0 +1,79 @@
+# 判断成本达到下界时允许的浮点误差
+BOUND_TOLERANCE = 1e-9
+
+
+def wire_lower_bound(bdd):
+    """
+    线长下界：k 个引脚的网络在单行上至少跨越 k-1 个位置，
+    总线长不小于各网络 (k - 1) 之和。
+    """
+    return sum(len(net) - 1 for net in bdd.get_nets())
+
+
+def max_shared_pairs(bdd):
+    """
+    可共享扩散区的相邻对数上界。
+
+    共享图中两个晶体管属于同一网络即相邻；一个布局中共享的相邻对构成共享图的
+    一组不相交路径（路径覆盖），共享对数 = 晶体管数 - 路径数。
+    对每个连通分量取两个上界中的较小者：
+      - 路径覆盖至少有一条路径，共享对数不超过 分量大小 - 1；
+      - 路径上每个晶体管至多有两条共享边，且不超过其度数，
+        共享对数不超过 sum(min(度数, 2)) / 2。
+    """
+    n = bdd.get_transistor_count()
+    nets = bdd.get_nets()
+    transistor_nets = bdd.get_transistor_nets()
+
+    # 按网络合并连通分量
+    parent = list(range(n))
+
+    def find(t):
+        while parent[t] != t:
+            parent[t] = parent[parent[t]]
+            t = parent[t]
+        return t
+
+    for net in nets:
+        root = find(net[0])
+        for pin in net[1:]:
+            other = find(pin)
+            if other != root:
+                parent[other] = root
+
+    # min(度数, 2)：度数为所在网络并集的大小减 1，只需区分 0、1、>=2
+    sizes = {}
+    capped_degrees = {}
+    for t in range(n):
+        net_ids = transistor_nets[t]
+        if any(len(nets[k]) > 2 for k in net_ids):
+            degree = 2
+        else:
+            # 只有两引脚网络时逐个数邻居（两个网络的另一端可能相同）
+            degree = min(len({pin for k in net_ids for pin in nets[k] if pin != t}), 2)
+        root = find(t)
+        sizes[root] = sizes.get(root, 0) + 1
+        capped_degrees[root] = capped_degrees.get(root, 0) + degree
+
+    return sum(min(size - 1, capped_degrees[root] // 2) for root, size in sizes.items())
+
+
+def single_row_lower_bound(bdd, w_wire=0.5, w_area=0.5):
+    """
+    SingleRowLayout 成本 w_wire * 线长 + w_area * (晶体管数 - 共享对数) 的下界。
+    线长和面积分别取下界，两者不一定能同时达到，成本达到下界即为最优。
+    """
+    area = bdd.get_transistor_count() - max_shared_pairs(bdd)
+    return w_wire * wire_lower_bound(bdd) + w_area * area
+
+
+def meets_lower_bound(cost, lower_bound):
+    """成本是否已达到下界（可证明最优）"""
+    return cost <= lower_bound + BOUND_TOLERANCE * max(1.0, abs(lower_bound))
+
+
+def optimality_gap(cost, lower_bound):
+    """最优性差距 (cost - lower_bound) / cost，成本达到下界时为 0"""
+    if meets_lower_bound(cost, lower_bound) or cost <= 0:
+        return 0.0
+    return (cost - lower_bound) / cost
@@ -3,6 +3,7 @@ import os
 import sys
 
 from bdd import BDD
+from cooling import AdaptiveCooling
 from layout import Layout
 from simulated_annealing import SimulatedAnnealing
 
@@ -159,6 +160,7 @@ def main():
             initial_temperature=1000,
             cooling_rate=0.95,
             min_temperature=1,
+            schedule=AdaptiveCooling(),
         )
 
         optimized_layout = sa.optimize(iterations=1000)
@@ -1,10 +1,62 @@
+import json
+import math
+import multiprocessing
 import os
 import random
+import signal
 import sys
+import threading
+from collections import OrderedDict
 
+import instrumentation
 from bdd import BDD
+from constructive_placement import constructive_placement
+from cooling import (
+    SEEDED_START_ACCEPTANCE,
+    AdaptiveCooling,
+    resolve_deadline,
+    seeded_target_acceptance,
+)
 from enhanced_simulated_annealing import EnhancedSimulatedAnnealing
+from exact_solver import ExactSingleRowSolver, use_exact_solver
 from layout import SingleRowLayout
+from lower_bound import optimality_gap, single_row_lower_bound
+from result_cache import DEFAULT_MAX_DISK_BYTES, ResultCache, result_key
+
+DEFAULT_W_WIRE = 0.5
+DEFAULT_W_AREA = 0.5
+DEFAULT_ITERATIONS = 5000
+
+# 优化引擎: auto 按规模在精确求解和退火之间选择
+ENGINES = ("auto", "exact", "anneal")
+
+# 初始布局: constructive 按BDD结构构造（见 constructive_placement），random 随机打乱
+INITIAL_PLACEMENTS = ("constructive", "random")
+
+# 常驻进程模式下缓存的已解析BDD数量上限
+WORKER_BDD_CACHE_SIZE = 64
+
+# 单次运行时收到这些信号会停止退火并输出目前的最优结果
+CANCEL_SIGNALS = ("SIGTERM", "SIGINT")
+
+# 常驻进程模式下收到该信号会取消当前请求并回复目前的最优结果
+WORKER_CANCEL_SIGNAL = "SIGUSR1"
+
+# 设置该环境变量后，BSD解析结果按文件内容哈希缓存到此目录
+BSD_CACHE_DIR = os.environ.get("BSD_CACHE_DIR")
+
+# 设置该环境变量后，优化结果缓存到此目录（见 result_cache.py），容量上限单位为MB
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")
+RESULT_CACHE_MAX_BYTES = int(
+    float(os.environ.get("RESULT_CACHE_MAX_MB", DEFAULT_MAX_DISK_BYTES / 2**20)) * 2**20
+)
+
+# 常驻进程模式下进程内缓存的优化结果数量上限
+WORKER_RESULT_CACHE_SIZE = 256
+
+# 设置该环境变量（或 --profile 参数）后输出性能统计JSON（见 instrumentation.py），
+# 值为 "-" 时写到标准错误，否则追加到该文件；标准输出的格式不变
+PROFILE_TARGET = os.environ.get("PLACEMENT_PROFILE")
 
 
 def create_sample_bsd_file(filename):
@@ -19,44 +71,414 @@ def create_sample_bsd_file(filename):
         f.write(content)
 
 
+def optimize_bdd(
+    bdd,
+    w_wire=DEFAULT_W_WIRE,
+    w_area=DEFAULT_W_AREA,
+    iterations=DEFAULT_ITERATIONS,
+    seed=None,
+    deadline=None,
+    cancel=None,
+    engine="auto",
+    initial="constructive",
+    time_budget_ms=None,
+    cache=None,
+):
+    """
+    对已构建的BDD执行单行布局优化，返回 (初始布局, 优化后布局)。
+    给出 deadline（time.monotonic() 时钟）时退火调度铺满剩余时间，iterations 可以为 None；
+    到时或 cancel 置位后返回目前的最优布局。
+    engine 为 auto 时，小规模实例（见 exact_solver.EXACT_MAX_TRANSISTORS）使用精确求解。
+    initial 为 constructive 时从构造式布局出发，退火从低温起步只做局部改进。
+    time_budget_ms 为从现在起的时间预算，与 deadline 同时给出时取较早者。
+    给出 cache（result_cache.ResultCache）时，按BDD结构、权重、种子和优化设置查找结果，
+    命中则直接返回缓存的最优顺序。只有结果确定的运行使用缓存：精确求解，或给出 seed
+    且没有 deadline/time_budget_ms 的退火；不给种子的运行是独立的随机试验，
+    受时间限制的运行结果取决于机器快慢。被取消的运行不写入缓存。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"未知的优化引擎: {engine}，可选 {ENGINES}")
+    if initial not in INITIAL_PLACEMENTS:
+        raise ValueError(f"未知的初始布局: {initial}，可选 {INITIAL_PLACEMENTS}")
+    if seed is not None:
+        random.seed(seed)
+
+    with instrumentation.phase("init"):
+        if initial == "constructive":
+            initial_layout = SingleRowLayout(
+                bdd, w_wire, w_area, placement=constructive_placement(bdd)
+            )
+            schedule = AdaptiveCooling(
+                initial_acceptance=SEEDED_START_ACCEPTANCE,
+                target_acceptance=seeded_target_acceptance,
+            )
+        else:
+            initial_layout = SingleRowLayout(bdd, w_wire, w_area)
+            schedule = AdaptiveCooling()
+
+    use_exact = engine == "exact" or (
+        engine == "auto" and use_exact_solver(len(initial_layout.placement))
+    )
+    if cache is not None and not (
+        use_exact or (seed is not None and deadline is None and time_budget_ms is None)
+    ):
+        cache = None
+
+    if cache is not None:
+        key = result_key(
+            bdd,
+            w_wire,
+            w_area,
+            seed,
+            iterations=iterations,
+            time_budget_ms=time_budget_ms,
+            engine=engine,
+            initial=initial,
+        )
+        entry = cache.get(key)
+        instrumentation.count(
+            "result_cache_hits" if entry is not None else "result_cache_misses"
+        )
+        if entry is not None:
+            optimized_layout = initial_layout.copy()
+            optimized_layout.set_placement(entry["placement"])
+            return initial_layout, optimized_layout
+
+    if use_exact:
+        optimizer = ExactSingleRowSolver(initial_layout)
+    else:
+        optimizer = EnhancedSimulatedAnnealing(
+            initial_layout=initial_layout,
+            initial_temperature=1000,
+            cooling_rate=0.95,
+            min_temperature=1,
+            schedule=schedule,
+        )
+    with instrumentation.phase("optimize"):
+        optimized_layout = optimizer.optimize(
+            iterations=iterations,
+            deadline=deadline,
+            time_budget_ms=time_budget_ms,
+            cancel=cancel,
+        )
+
+    if cache is not None and not (cancel is not None and cancel.is_set()):
+        cache.put(
+            key,
+            {
+                "placement": list(optimized_layout.placement),
+                "cost": optimized_layout.get_cost(),
+                "wire_cost": optimized_layout.calculate_wire_length(),
+                "area_cost": optimized_layout.calculate_area_cost(),
+            },
+        )
+    return initial_layout, optimized_layout
+
+
+def install_cancel_signals(cancel, names):
+    """收到指定信号时置位 cancel（平台不支持的信号被忽略）"""
+    for name in names:
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, lambda *_: cancel.set())
+
+
+def pop_option(args, name):
+    """
+    从参数列表中取出 name 及其值，不存在时返回 None。
+    :raises ValueError: name 后面没有值，或紧跟着另一个选项。
+    """
+    if name not in args:
+        return None
+    k = args.index(name)
+    if k + 1 >= len(args) or args[k + 1].startswith("--"):
+        raise ValueError(f"{name} 缺少参数值")
+    value = args[k + 1]
+    del args[k : k + 2]
+    return value
+
+
+def parse_number(name, value, convert=float):
+    """
+    把命令行参数转换为数值。
+    :raises ValueError: 不是 convert 能解析的数值，或是 nan/inf。
+    """
+    try:
+        number = convert(value)
+    except ValueError:
+        kind = "整数" if convert is int else "数值"
+        raise ValueError(f"{name} 需要{kind}，而不是 {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{name} 需要有限的数值，而不是 {value!r}")
+    return number
+
+
+def parse_command_options(args):
+    """
+    取出并检查单次运行的命令行选项，剩下的 args 为 BSD 文件和可选的两个权重。
+    所有参数在构建BDD之前检查完毕，出错时不会在运行中途才失败。
+    :return: 选项字典: engine, initial, time_budget_ms, profile, seed, w_wire, w_area
+    :raises ValueError: 选项缺少值或值无效。
+    """
+    engine = pop_option(args, "--engine") or "auto"
+    if engine not in ENGINES:
+        raise ValueError(f"未知的优化引擎: {engine}，可选 {', '.join(ENGINES)}")
+    initial = pop_option(args, "--initial") or "constructive"
+    if initial not in INITIAL_PLACEMENTS:
+        raise ValueError(
+            f"未知的初始布局: {initial}，可选 {', '.join(INITIAL_PLACEMENTS)}"
+        )
+    time_budget_ms = pop_option(args, "--time-budget-ms")
+    profile = pop_option(args, "--profile") or PROFILE_TARGET
+    seed = pop_option(args, "--seed")
+    if seed is not None:
+        seed = parse_number("--seed", seed, int)
+    if time_budget_ms is not None:
+        time_budget_ms = parse_number("--time-budget-ms", time_budget_ms)
+        if time_budget_ms < 0:
+            raise ValueError(f"--time-budget-ms 不能为负数: {time_budget_ms}")
+    if len(args) > 3:
+        raise ValueError(f"多余的参数: {' '.join(args[3:])}")
+    w_wire = parse_number("w_wire", args[1]) if len(args) > 1 else DEFAULT_W_WIRE
+    w_area = parse_number("w_area", args[2]) if len(args) > 2 else DEFAULT_W_AREA
+    return {
+        "engine": engine,
+        "initial": initial,
+        "time_budget_ms": time_budget_ms,
+        "profile": profile,
+        "seed": seed,
+        "w_wire": w_wire,
+        "w_area": w_area,
+    }
+
+
+def usage_error(message):
+    """命令行参数错误：向标准错误输出一行说明，以状态码 2 退出"""
+    print(f"main_enhanced: {message}", file=sys.stderr)
+    sys.exit(2)
+
+
 def main():
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    if not args:
         return
 
-    if sys.argv[1] == "--sample":
+    if args[0] == "--worker":
+        try:
+            profile = pop_option(args, "--profile") or PROFILE_TARGET
+        except ValueError as e:
+            usage_error(e)
+        cancel = threading.Event()
+        install_cancel_signals(cancel, [WORKER_CANCEL_SIGNAL])
+        cache = ResultCache(
+            RESULT_CACHE_DIR,
+            memory_entries=WORKER_RESULT_CACHE_SIZE,
+            max_disk_bytes=RESULT_CACHE_MAX_BYTES,
+        )
+        run_worker(sys.stdin, sys.stdout, cancel, cache, profile)
+        return
+
+    if args[0] == "--batch":
+        from batch_evaluate import main as batch_main
+
+        batch_main(args[1:])
+        return
+
+    try:
+        options = parse_command_options(args)
+    except ValueError as e:
+        usage_error(e)
+    engine = options["engine"]
+    initial = options["initial"]
+    time_budget_ms = options["time_budget_ms"]
+    profile = options["profile"]
+    seed = options["seed"]
+    w_wire = options["w_wire"]
+    w_area = options["w_area"]
+
+    # --time-budget-ms 从 main() 开始算起，包括解析BSD的时间
+    deadline = None
+    iterations = DEFAULT_ITERATIONS
+    if time_budget_ms is not None:
+        deadline = resolve_deadline(None, time_budget_ms)
+        iterations = None
+
+    cancel = threading.Event()
+    install_cancel_signals(cancel, CANCEL_SIGNALS)
+    cache = None
+    if RESULT_CACHE_DIR is not None:
+        cache = ResultCache(
+            RESULT_CACHE_DIR, memory_entries=0, max_disk_bytes=RESULT_CACHE_MAX_BYTES
+        )
+
+    if args[0] == "--sample":
         bsd_file = "sample.bsd"
         create_sample_bsd_file(bsd_file)
     else:
-        bsd_file = sys.argv[1]
+        bsd_file = args[0]
         if not os.path.exists(bsd_file):
             return
 
-    w_wire = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
-    w_area = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
     if abs((w_wire + w_area) - 1.0) > 1e-6:
         pass
 
+    stats = instrumentation.enable() if profile else None
     try:
         bdd = BDD()
-        bdd.construct_from_bsd(bsd_file)
+        bdd.construct_from_bsd(bsd_file, cache_dir=BSD_CACHE_DIR)
         bdd.analyze_structure()
 
-        initial_layout = SingleRowLayout(bdd, w_wire, w_area)
-
-        sa = EnhancedSimulatedAnnealing(
-            initial_layout=initial_layout,
-            initial_temperature=1000,
-            cooling_rate=0.95,
-            min_temperature=1,
+        initial_layout, optimized_layout = optimize_bdd(
+            bdd,
+            w_wire,
+            w_area,
+            iterations,
+            seed,
+            deadline=deadline,
+            cancel=cancel,
+            engine=engine,
+            initial=initial,
+            time_budget_ms=time_budget_ms,
+            cache=cache,
         )
-        optimized_layout = sa.optimize(iterations=5000)
 
-        analyze_and_save_results(
-            initial_layout, optimized_layout, "enhanced_single_row_results.txt"
-        )
+        with instrumentation.phase("report"):
+            analyze_and_save_results(
+                initial_layout, optimized_layout, "enhanced_single_row_results.txt"
+            )
 
     except Exception as e:
-        import traceback
+        # 标准输出没有成本即表示失败；原因写到标准错误
+        print(f"main_enhanced: {type(e).__name__}: {e}", file=sys.stderr)
+        if stats is not None:
+            stats.record_error(e)
+        failed = True
+    else:
+        failed = False
+
+    finally:
+        if stats is not None:
+            instrumentation.disable()
+            stats.emit(profile)
+
+    if failed:
+        sys.exit(1)
+
+
+def parse_worker_request(line):
+    """
+    解析常驻进程模式下的一行请求。
+    支持两种格式:
+      - JSON对象: {"bsd": 路径} 或 {"bsd_text": BSD文本}，
+        可选字段 w_wire, w_area, iterations, seed, time_budget_ms, engine, initial
+      - 空白分隔: <bsd路径> [w_wire] [w_area] [iterations] [seed] [time_budget_ms]
+    给出 time_budget_ms 而未给出 iterations 时，退火用满时间预算。
+    """
+    if line.startswith("{"):
+        fields = json.loads(line)
+        if "bsd_text" not in fields and "bsd" not in fields:
+            raise ValueError("请求中缺少 bsd 或 bsd_text 字段")
+    else:
+        tokens = line.split()
+        names = ["bsd", "w_wire", "w_area", "iterations", "seed", "time_budget_ms"]
+        if len(tokens) > len(names):
+            raise ValueError(f"请求字段过多: {line}")
+        fields = dict(zip(names, tokens))
+
+    seed = fields.get("seed")
+    time_budget_ms = fields.get("time_budget_ms")
+    iterations = fields.get("iterations")
+    if iterations is None and time_budget_ms is None:
+        iterations = DEFAULT_ITERATIONS
+    return {
+        "bsd": fields.get("bsd"),
+        "bsd_text": fields.get("bsd_text"),
+        "w_wire": float(fields.get("w_wire", DEFAULT_W_WIRE)),
+        "w_area": float(fields.get("w_area", DEFAULT_W_AREA)),
+        "iterations": int(iterations) if iterations is not None else None,
+        "seed": int(seed) if seed is not None else None,
+        "time_budget_ms": float(time_budget_ms) if time_budget_ms is not None else None,
+        "engine": fields.get("engine", "auto"),
+        "initial": fields.get("initial", "constructive"),
+    }
+
+
+def _load_worker_bdd(request, bdd_cache):
+    """按文件(路径+修改时间)或文本内容缓存已解析的BDD"""
+    if request["bsd_text"] is not None:
+        key = ("text", request["bsd_text"])
+    else:
+        stat = os.stat(request["bsd"])
+        key = ("file", os.path.abspath(request["bsd"]), stat.st_mtime_ns, stat.st_size)
+
+    bdd = bdd_cache.get(key)
+    if bdd is not None:
+        bdd_cache.move_to_end(key)
+        return bdd
+
+    bdd = BDD()
+    if request["bsd_text"] is not None:
+        bdd.construct_from_bsd_text(request["bsd_text"])
+    else:
+        bdd.construct_from_bsd(request["bsd"], cache_dir=BSD_CACHE_DIR)
+
+    bdd_cache[key] = bdd
+    if len(bdd_cache) > WORKER_BDD_CACHE_SIZE:
+        bdd_cache.popitem(last=False)
+    return bdd
+
+
+def run_worker(stdin, stdout, cancel=None, cache=None, profile=None):
+    """
+    常驻进程模式：每行读取一个请求，每个请求输出一行成本。
+    已导入的模块和解析过的BDD在请求之间保持常驻，
+    单次请求的开销只剩退火本身。请求出错时输出 nan 以保持一问一答。
+    cancel 置位（例如收到 SIGUSR1）时当前请求立即回复目前的最优成本。
+    给出 cache 时重复的请求直接返回缓存的结果，输入结束时把命中统计写到标准错误。
+    给出 profile 时每个请求输出一条性能统计（见 instrumentation.Instrumentation.emit）。
+    """
+    bdd_cache = OrderedDict()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if cancel is not None:
+            cancel.clear()
+
+        stats = instrumentation.enable() if profile else None
+        try:
+            request = parse_worker_request(line)
+            # 时间预算从收到请求时算起，包括解析BSD的时间
+            deadline = resolve_deadline(None, request["time_budget_ms"])
+            bdd = _load_worker_bdd(request, bdd_cache)
+            _, optimized_layout = optimize_bdd(
+                bdd,
+                request["w_wire"],
+                request["w_area"],
+                request["iterations"],
+                request["seed"],
+                deadline=deadline,
+                cancel=cancel,
+                engine=request["engine"],
+                initial=request["initial"],
+                time_budget_ms=request["time_budget_ms"],
+                cache=cache,
+            )
+            stdout.write(f"{optimized_layout.get_cost()}\n")
+        except Exception as e:
+            print(f"worker error: {e}", file=sys.stderr)
+            stdout.write("nan\n")
+            if stats is not None:
+                stats.record_error(e)
+
+        stdout.flush()
+        if stats is not None:
+            instrumentation.disable()
+            stats.emit(profile)
+
+    if cache is not None:
+        print(f"result cache: {json.dumps(cache.stats())}", file=sys.stderr)
 
 
 def analyze_and_save_results(initial_layout, optimized_layout, filename):
@@ -72,6 +494,10 @@ def analyze_and_save_results(initial_layout, optimized_layout, filename):
     final_area_cost = optimized_layout.calculate_area_cost()
     final_total_cost = optimized_layout.get_cost()
     final_shared_pairs = num_transistors - final_area_cost
+    lower_bound = single_row_lower_bound(
+        initial_layout.bdd, initial_layout.w_wire, initial_layout.w_area
+    )
+    gap = optimality_gap(final_total_cost, lower_bound)
 
     wire_improvement = (
         (initial_wire_cost - final_wire_cost) / initial_wire_cost * 100
@@ -109,6 +535,13 @@ def analyze_and_save_results(initial_layout, optimized_layout, filename):
             f"  - 面积成本: {final_area_cost:.2f} (可共享扩散区对数: {final_shared_pairs})\n\n"
         )
 
+        f.write(f"成本下界: {lower_bound:.2f}\n")
+        f.write(
+            f"  - 最优性差距: {gap * 100:.1f}%"
+            + (" (已达到下界，可证明最优)" if gap == 0 else "")
+            + "\n\n"
+        )
+
         f.write("优化改善率:\n")
         f.write(f"  - 线长改善率: {wire_improvement:.1f}%\n")
         f.write(f"  - 面积成本改善率: {area_improvement:.1f}%\n")
@@ -118,4 +551,6 @@ def analyze_and_save_results(initial_layout, optimized_layout, filename):
 
 
 if __name__ == "__main__":
+    # 打包为可执行文件后，批量模式的进程池需要此调用
+    multiprocessing.freeze_support()
     main()
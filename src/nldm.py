@@ -0,0 +1,272 @@
+import numpy as np
+
+# 读入的延迟/转换时间查找表类型
+DELAY_TABLE_TYPES = ("cell_rise", "cell_fall", "rise_transition", "fall_transition")
+
+# 查找表变量中表示输入转换时间和输出负载的名称
+SLEW_VARIABLES = frozenset(
+    (
+        "input_net_transition",
+        "input_transition_time",
+        "related_pin_transition",
+        "constrained_pin_transition",
+    )
+)
+LOAD_VARIABLES = frozenset(("total_output_net_capacitance",))
+
+# 模板缺少 variable_1/variable_2 时的默认变量
+DEFAULT_VARIABLES = ("input_net_transition", "total_output_net_capacitance")
+
+
+def _parse_numbers(args):
+    """复杂属性的参数（每个参数为逗号分隔的数字串）拼成一维数组"""
+    return np.array(",".join(args).split(","), dtype=float)
+
+
+def _segments(index, x):
+    """
+    x 在 index 中所在的区间：返回 (下端下标, 上端下标, 插值比例)。
+    超出范围时使用两端的区间线性外推；只有一个点的坐标轴比例为 0。
+    """
+    n = len(index)
+    if n == 1:
+        zeros = np.zeros(np.shape(x), dtype=np.intp)
+        return zeros, zeros, np.zeros(np.shape(x))
+    low = np.clip(np.searchsorted(index, x, side="right") - 1, 0, n - 2)
+    high = low + 1
+    start = index[low]
+    return low, high, (x - start) / (index[high] - start)
+
+
+class TimingTable:
+    """
+    NLDM 查找表：index_1、index_2 为坐标，values 的形状为 (len(index_1), len(index_2))；
+    一维表没有 index_2，标量表 values 的形状为 ()。
+    variables 为两个坐标轴对应的变量名（来自 lu_table_template），lookup 据此区分转换时间和负载。
+    """
+
+    def __init__(self, index_1, index_2, values, variables=DEFAULT_VARIABLES):
+        self.index_1 = np.asarray(index_1, dtype=float)
+        self.index_2 = None if index_2 is None else np.asarray(index_2, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.variables = tuple(variables)
+        expected = tuple(
+            len(index) for index in (self.index_1, self.index_2) if index is not None
+        )
+        if self.values.ndim and self.values.shape != expected:
+            raise ValueError(
+                f"查找表 values 的形状 {self.values.shape} 与坐标 {expected} 不一致"
+            )
+
+    def interpolate(self, x1, x2=None):
+        """
+        按表自身的坐标轴做双线性插值（超出范围时线性外推），x1/x2 可以是标量或数组（按广播规则）。
+        """
+        if self.values.ndim == 0:
+            return np.broadcast_to(self.values, np.broadcast(x1, x2).shape).copy()
+
+        x1 = np.asarray(x1, dtype=float)
+        low_1, high_1, t_1 = _segments(self.index_1, x1)
+        if self.values.ndim == 1:
+            v = self.values
+            return v[low_1] + t_1 * (v[high_1] - v[low_1])
+
+        x2 = np.asarray(x2, dtype=float)
+        low_2, high_2, t_2 = _segments(self.index_2, x2)
+        v = self.values
+        near = v[low_1, low_2] + t_2 * (v[low_1, high_2] - v[low_1, low_2])
+        far = v[high_1, low_2] + t_2 * (v[high_1, high_2] - v[high_1, low_2])
+        return near + t_1 * (far - near)
+
+    def lookup(self, slew, load):
+        """
+        查询 (输入转换时间, 输出负载) 对应的值，两者可以是等长数组或标量，按广播规则返回数组。
+        坐标轴的顺序由 variables 决定（有的库把负载作为 index_1）。
+        """
+        first, second = (self.variables + (None, None))[:2]
+        if self.values.ndim < 2:
+            return self.interpolate(load if first in LOAD_VARIABLES else slew)
+        if first in LOAD_VARIABLES or second in SLEW_VARIABLES:
+            return self.interpolate(load, slew)
+        return self.interpolate(slew, load)
+
+    @classmethod
+    def from_group(cls, group, templates=None):
+        """
+        由 cell_rise 等查找表组构建。表中没有 index_1/index_2 时使用模板的坐标。
+        :param templates: {模板名: lu_table_template 组}。
+        :raises ValueError: 缺少 values，多个值却没有 index_1，或值的个数与坐标不一致。
+        """
+        template = (templates or {}).get(group.name)
+        variables = DEFAULT_VARIABLES
+        if template is not None:
+            variables = tuple(
+                template.get(name)
+                for name in ("variable_1", "variable_2")
+                if template.get(name) is not None
+            )
+
+        def index(name):
+            args = group.complex_attribute(name)
+            if args is None and template is not None:
+                args = template.complex_attribute(name)
+            return _parse_numbers(args) if args else None
+
+        values_args = group.complex_attribute("values")
+        if not values_args:
+            raise ValueError(f"查找表 {group.type}({group.name}) 缺少 values")
+        values = _parse_numbers(values_args)
+        index_1, index_2 = index("index_1"), index("index_2")
+        if group.name == "scalar" or (index_1 is None and len(values) == 1):
+            return cls([0.0], None, values[0], variables)
+        if index_1 is None:
+            raise ValueError(f"查找表 {group.type}({group.name}) 缺少 index_1")
+        if index_2 is not None:
+            if values.size != len(index_1) * len(index_2):
+                raise ValueError(
+                    f"查找表 {group.type}({group.name}) 的 values 个数 {values.size} "
+                    f"与坐标 {len(index_1)}x{len(index_2)} 不一致"
+                )
+            values = values.reshape(len(index_1), len(index_2))
+        return cls(index_1, index_2, values, variables)
+
+
+def _stacked_segments(indexes, x):
+    """_segments 的多表版本：indexes 的每一行是一个查询所在表的坐标"""
+    n = indexes.shape[-1]
+    if n == 1:
+        zeros = np.zeros(x.shape, dtype=np.intp)
+        return zeros, zeros, np.zeros(x.shape)
+    # 中间坐标中不大于 x 的个数即 searchsorted(right) - 1 截断到 [0, n-2]
+    low = np.count_nonzero(indexes[..., 1:-1] <= x[..., None], axis=-1)
+    rows = np.arange(len(x))
+    start = indexes[rows, low]
+    return low, low + 1, (x - start) / (indexes[rows, low + 1] - start)
+
+
+class TableStack:
+    """
+    形状相同的多个二维查找表叠成三维数组，一次调用完成落在不同表上的大批查询，
+    例如对许多候选布局同时估计各条时序弧的延迟。
+    """
+
+    def __init__(self, tables):
+        self.tables = list(tables)
+        shapes = {table.values.shape for table in self.tables}
+        if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+            raise ValueError(
+                f"只能叠放形状相同的二维查找表，实际形状: {sorted(shapes)}"
+            )
+        self.index_1 = np.stack([table.index_1 for table in self.tables])
+        self.index_2 = np.stack([table.index_2 for table in self.tables])
+        self.values = np.stack([table.values for table in self.tables])
+        # index_1 为负载的表，查询时交换两个坐标
+        self.swapped = np.array(
+            [
+                (table.variables + (None, None))[0] in LOAD_VARIABLES
+                or (table.variables + (None, None))[1] in SLEW_VARIABLES
+                for table in self.tables
+            ]
+        )
+
+    def __len__(self):
+        return len(self.tables)
+
+    def lookup(self, table_ids, slew, load):
+        """
+        第 k 个查询在表 table_ids[k] 上取 (slew[k], load[k]) 的值（双线性插值，超出范围线性外推）。
+        三个参数按广播规则对齐，返回一维数组。
+        """
+        table_ids, slew, load = np.broadcast_arrays(
+            np.asarray(table_ids, dtype=np.intp),
+            np.asarray(slew, dtype=float),
+            np.asarray(load, dtype=float),
+        )
+        table_ids, slew, load = table_ids.ravel(), slew.ravel(), load.ravel()
+        swapped = self.swapped[table_ids]
+        x1 = np.where(swapped, load, slew)
+        x2 = np.where(swapped, slew, load)
+        low_1, high_1, t_1 = _stacked_segments(self.index_1[table_ids], x1)
+        low_2, high_2, t_2 = _stacked_segments(self.index_2[table_ids], x2)
+        v = self.values
+        near = v[table_ids, low_1, low_2] + t_2 * (
+            v[table_ids, low_1, high_2] - v[table_ids, low_1, low_2]
+        )
+        far = v[table_ids, high_1, low_2] + t_2 * (
+            v[table_ids, high_1, high_2] - v[table_ids, high_1, low_2]
+        )
+        return near + t_1 * (far - near)
+
+
+class TimingArc:
+    """
+    一条时序弧：cell 的输出引脚 pin 相对 related_pin 的 timing 组，
+    tables 为 {表类型: TimingTable}，只包含组中出现的 DELAY_TABLE_TYPES。
+    """
+
+    def __init__(self, cell, pin, related_pin, group, tables):
+        self.cell = cell
+        self.pin = pin
+        self.related_pin = related_pin
+        self.timing_type = group.get("timing_type")
+        self.timing_sense = group.get("timing_sense")
+        self.when = group.get("when")
+        self.tables = tables
+
+    def __repr__(self):
+        return (
+            f"TimingArc({self.cell}.{self.related_pin}->{self.pin}, {self.timing_type})"
+        )
+
+
+def _templates(library):
+    return {
+        group.name: group for group in library.group.iter_groups("lu_table_template")
+    }
+
+
+def load_timing_arcs(library, cell_names=None):
+    """
+    读出库中所有 timing 组的延迟/转换时间查找表。
+    :param library: liberty.Library。
+    :param cell_names: 只读这些单元，None 表示全部。
+    :return: TimingArc 列表，按文件中的顺序；related_pin 含多个引脚时每个引脚一条。
+    """
+    templates = _templates(library)
+    names = library.cells if cell_names is None else cell_names
+    arcs = []
+    for cell_name in names:
+        cell = library.cells[cell_name]
+        for pin_name, pin in cell.pins.items():
+            for timing in pin.timing_groups():
+                tables = {
+                    group.type: TimingTable.from_group(group, templates)
+                    for group in timing.groups
+                    if group.type in DELAY_TABLE_TYPES
+                }
+                if not tables:
+                    continue
+                for related_pin in (timing.get("related_pin") or "").split():
+                    arcs.append(
+                        TimingArc(cell_name, pin_name, related_pin, timing, tables)
+                    )
+    return arcs
+
+
+def load_timing_tables(library, cell_names=None):
+    """
+    按 (cell, pin, related_pin) 索引的查找表 {键: {表类型: TimingTable}}。
+    同一键有多个 timing 组（如带 when 条件的 preset/clear 弧）时，
+    优先取没有 when 条件的组，否则取第一个；全部弧见 load_timing_arcs。
+    """
+    tables = {}
+    conditional = set()
+    for arc in load_timing_arcs(library, cell_names):
+        key = (arc.cell, arc.pin, arc.related_pin)
+        if key not in tables or (key in conditional and arc.when is None):
+            tables[key] = arc.tables
+            if arc.when is not None:
+                conditional.add(key)
+            else:
+                conditional.discard(key)
+    return tables
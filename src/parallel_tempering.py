@@ -0,0 +1,244 @@
+import math
+import multiprocessing
+import os
+import random
+
+from single_row_kernel import SingleRowKernel
+
+# 默认温度阶梯的范围（单行布局一次交换的成本变化量通常在 0.5~10 之间）
+DEFAULT_MIN_TEMPERATURE = 0.05
+DEFAULT_MAX_TEMPERATURE = 5.0
+
+# 默认每隔多少次移动尝试一次相邻副本交换
+DEFAULT_EXCHANGE_INTERVAL = 500
+
+
+def geometric_temperatures(t_min, t_max, count):
+    """在 [t_min, t_max] 之间按几何级数生成 count 个温度，由低到高"""
+    if count == 1:
+        return [t_min]
+    ratio = (t_max / t_min) ** (1.0 / (count - 1))
+    return [t_min * ratio**k for k in range(count)]
+
+
+class _ReplicaSet:
+    """
+    一组副本的常驻状态：每个副本一个数组化内核和一个随机数生成器，在整个优化过程中保留。
+    交换副本时只交换温度，内核不重建，布局也不在进程间传输。
+    """
+
+    def __init__(self, bdd, placement, w_wire, w_area, seeds):
+        self.kernels = [SingleRowKernel(bdd, placement, w_wire, w_area) for _ in seeds]
+        self.rngs = [random.Random(seed) for seed in seeds]
+        self.best_costs = [kernel.cost() for kernel in self.kernels]
+        self.best_placements = [list(placement) for _ in seeds]
+
+    def run(self, temperatures, iterations):
+        """
+        各副本在给定温度下执行 iterations 次Metropolis移动。
+        :return: 各副本的 (当前成本, 最优成本)
+        """
+        results = []
+        for k, kernel in enumerate(self.kernels):
+            best_cost, best_placement = kernel.anneal(
+                iterations, temperatures[k], 1.0, 0.0, rng=self.rngs[k]
+            )
+            if best_cost < self.best_costs[k]:
+                self.best_costs[k] = best_cost
+                self.best_placements[k] = best_placement
+            results.append((kernel.cost(), self.best_costs[k]))
+        return results
+
+    def placements(self, k):
+        """第 k 个副本的 (当前顺序, 最优顺序)"""
+        return self.kernels[k].placement_ids(), self.best_placements[k]
+
+
+def _replica_worker(conn, *args):
+    """工作进程主循环：持有一组副本，按请求调用 _ReplicaSet 的方法，收到 None 时退出"""
+    replicas = _ReplicaSet(*args)
+    for method, call_args in iter(conn.recv, None):
+        conn.send(getattr(replicas, method)(*call_args))
+    conn.close()
+
+
+class _LocalGroup:
+    """在当前进程中串行运行的一组副本（workers=1）"""
+
+    def __init__(self, *args):
+        self.replicas = _ReplicaSet(*args)
+        self._result = None
+
+    def send(self, method, *args):
+        self._result = getattr(self.replicas, method)(*args)
+
+    def receive(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class _WorkerGroup:
+    """
+    在常驻工作进程中运行的一组副本。BDD只在启动时传输一次；
+    send 之后各工作进程并行执行，receive 取回结果。
+    """
+
+    def __init__(self, *args):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_replica_worker, args=(child, *args), daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def send(self, method, *args):
+        self.conn.send((method, args))
+
+    def receive(self):
+        return self.conn.recv()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+        self.process.join()
+
+
+class ParallelTempering:
+    """
+    单行布局的并行回火（副本交换）优化器。
+    每个副本在固定温度上运行一条退火链，各副本分布在多个常驻工作进程中；
+    每轮结束后按Metropolis准则尝试交换相邻温度上的副本（交换温度而不是布局），
+    高温副本负责跳出局部最优，低温副本负责精细搜索。
+    """
+
+    def __init__(
+        self,
+        initial_layout,
+        temperatures=None,
+        num_replicas=None,
+        exchange_interval=DEFAULT_EXCHANGE_INTERVAL,
+        workers=None,
+        seed=None,
+    ):
+        """
+        :param initial_layout: SingleRowLayout，所有副本的初始布局。
+        :param temperatures: 各副本的温度；默认按几何级数生成 num_replicas 个。
+        :param num_replicas: 副本数，默认等于CPU核数（至少4个）。
+        :param exchange_interval: 两次交换尝试之间每个副本的移动次数。
+        :param workers: 工作进程数，默认不超过副本数和CPU核数；为1时在当前进程中串行运行。
+        :param seed: 随机种子，默认取自全局 random 模块的状态。
+        """
+        cpu_count = os.cpu_count() or 1
+        if temperatures is None:
+            temperatures = geometric_temperatures(
+                DEFAULT_MIN_TEMPERATURE,
+                DEFAULT_MAX_TEMPERATURE,
+                num_replicas or max(cpu_count, 4),
+            )
+        if not temperatures:
+            raise ValueError("至少需要一个副本")
+
+        self.current_layout = initial_layout
+        self.best_layout = initial_layout
+        self.temperatures = sorted(temperatures)
+        self.exchange_interval = exchange_interval
+        self.workers = workers or min(cpu_count, len(self.temperatures))
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
+
+        self.cost_history = []  # 每轮结束后的全局最优成本
+        num_pairs = len(self.temperatures) - 1
+        self.exchange_attempts = [0] * num_pairs
+        self.exchange_accepts = [0] * num_pairs
+
+    def exchange_rates(self):
+        """各相邻温度对的交换接受率，用于调整温度阶梯"""
+        return [
+            accepts / attempts if attempts else 0.0
+            for accepts, attempts in zip(self.exchange_accepts, self.exchange_attempts)
+        ]
+
+    def _exchange(self, replica_at, costs, parity):
+        """按奇偶交替尝试交换相邻温度上的副本；replica_at[k] 为第 k 个温度上的副本"""
+        temperatures = self.temperatures
+        for k in range(parity, len(temperatures) - 1, 2):
+            self.exchange_attempts[k] += 1
+            # 接受概率 min(1, exp((1/T_k - 1/T_k+1) * (E_k - E_k+1)))
+            log_ratio = (1.0 / temperatures[k] - 1.0 / temperatures[k + 1]) * (
+                costs[k] - costs[k + 1]
+            )
+            if log_ratio >= 0 or self.rng.random() < math.exp(log_ratio):
+                replica_at[k], replica_at[k + 1] = replica_at[k + 1], replica_at[k]
+                costs[k], costs[k + 1] = costs[k + 1], costs[k]
+                self.exchange_accepts[k] += 1
+
+    def optimize(self, iterations):
+        """
+        每个副本共执行 iterations 次移动，每 exchange_interval 次移动尝试一次交换。
+        :return: 所有副本中成本最低的布局
+        """
+        layout = self.current_layout
+        num_replicas = len(self.temperatures)
+        seeds = [self.rng.getrandbits(64) for _ in range(num_replicas)]
+
+        # 副本 r 在第 r % workers 个组中的第 r // workers 个位置
+        num_groups = min(self.workers, num_replicas)
+        group_class = _WorkerGroup if num_groups > 1 else _LocalGroup
+        groups = []
+        try:
+            for g in range(num_groups):
+                groups.append(
+                    group_class(
+                        layout.bdd,
+                        layout.placement,
+                        layout.w_wire,
+                        layout.w_area,
+                        seeds[g::num_groups],
+                    )
+                )
+
+            replica_at = list(range(num_replicas))
+            costs = [layout.get_cost()] * num_replicas
+            best_costs = list(costs)
+            temperature_of = [0.0] * num_replicas
+            done = 0
+            parity = 0
+            while done < iterations:
+                steps = min(self.exchange_interval, iterations - done)
+                for k, r in enumerate(replica_at):
+                    temperature_of[r] = self.temperatures[k]
+                for g, group in enumerate(groups):
+                    group.send("run", temperature_of[g::num_groups], steps)
+                for g, group in enumerate(groups):
+                    for offset, (cost, best_cost) in enumerate(group.receive()):
+                        r = g + offset * num_groups
+                        costs[replica_at.index(r)] = cost
+                        best_costs[r] = best_cost
+
+                self._exchange(replica_at, costs, parity)
+                parity ^= 1
+                done += steps
+                self.cost_history.append(min(best_costs))
+
+            def placements(r):
+                group = groups[r % num_groups]
+                group.send("placements", r // num_groups)
+                return group.receive()
+
+            best_replica = min(range(num_replicas), key=best_costs.__getitem__)
+            # 当前布局取最低温度的副本
+            current_placement, _ = placements(replica_at[0])
+            _, best_placement = placements(best_replica)
+        finally:
+            for group in groups:
+                group.close()
+
+        self.current_layout = layout.copy()
+        self.current_layout.set_placement(current_placement)
+        self.best_layout = layout.copy()
+        self.best_layout.set_placement(best_placement)
+        return self.best_layout
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# 结果格式或优化器行为变化时递增，使旧的缓存条目失效
+RESULT_CACHE_VERSION = 1
+
+RESULT_CACHE_SUFFIX = ".json"
+
+# 进程内LRU缓存的默认条目数
+DEFAULT_MEMORY_ENTRIES = 256
+
+# 磁盘缓存的默认容量上限；超出后按最近使用时间淘汰到上限的 EVICT_TARGET 比例
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+EVICT_TARGET = 0.9
+
+
+def result_key(bdd, w_wire, w_area, seed=None, **settings):
+    """
+    优化结果的缓存键：解析后的层级结构和变量序列、成本权重、随机种子，
+    以及影响结果的优化器设置（如 iterations、time_budget_ms、engine、initial）。
+    按解析结果而不是文件内容取哈希，空白和格式不同的同一BSD共用缓存条目。
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((bdd.layers, bdd.var_sequence)).encode())
+    params = {
+        "version": RESULT_CACHE_VERSION,
+        "w_wire": float(w_wire),
+        "w_area": float(w_area),
+        "seed": seed,
+        "settings": settings,
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    优化结果的两级缓存：进程内LRU + 可选的磁盘目录（每个条目一个JSON文件）。
+    条目为 {"placement": 晶体管id顺序, "cost", "wire_cost", "area_cost"}。
+    磁盘总大小超过 max_disk_bytes 时按文件修改时间淘汰，命中时刷新修改时间，
+    因此淘汰顺序近似最近最少使用。hits/misses 等计数器见 stats()。
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        memory_entries=DEFAULT_MEMORY_ENTRIES,
+        max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+    ):
+        """
+        :param cache_dir: 磁盘缓存目录，None 表示只使用进程内缓存。
+        :param memory_entries: 进程内LRU的条目数上限，0 表示不使用进程内缓存。
+        :param max_disk_bytes: 磁盘缓存的总大小上限（字节）。
+        """
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        # 磁盘缓存的总大小，首次写入时扫描目录得到，之后累加估计
+        self._disk_bytes = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """命中和淘汰计数"""
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+        }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + RESULT_CACHE_SUFFIX)
+
+    def get(self, key):
+        """查找结果，依次查进程内缓存和磁盘；未命中返回 None"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path) as file:
+                    entry = json.load(file)
+                os.utime(path)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        """保存结果到进程内缓存和磁盘"""
+        self._remember(key, entry)
+        if self.cache_dir is None:
+            return
+
+        # 先写临时文件再替换，避免并发读到半个文件
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = json.dumps(entry)
+        with open(tmp_path, "w") as file:
+            file.write(data)
+        # 覆盖已有条目时总大小只增加两者之差
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        if self._disk_bytes is None:
+            self._disk_bytes = self._scan_disk_bytes()
+        else:
+            self._disk_bytes += len(data) - replaced
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict()
+
+    def _remember(self, key, entry):
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_entries(self):
+        """磁盘上的条目 (修改时间, 大小, 路径)"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(RESULT_CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # 其他进程刚刚淘汰
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_disk_bytes(self):
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def _evict(self):
+        """按修改时间从旧到新删除条目，直到总大小降到上限的 EVICT_TARGET 比例"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * EVICT_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
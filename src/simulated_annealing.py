@@ -1,6 +1,11 @@
-import copy
 import math
 import random
+from itertools import count
+
+from cooling import Budget
+
+# 有时间预算或取消信号时，每隔多少次迭代检查一次时钟
+CLOCK_CHECK_INTERVAL = 64
 
 
 class SimulatedAnnealing:
@@ -10,45 +15,125 @@ class SimulatedAnnealing:
         initial_temperature=1000,
         cooling_rate=0.95,
         min_temperature=1,
+        schedule=None,
     ):
+        """
+        :param schedule: 自适应温度调度（cooling.AdaptiveCooling）。提供时初始温度由采样确定，
+            温度按接受率调整并用满全部迭代次数，忽略三个固定温度参数。
+        """
         self.current_layout = initial_layout
-        self.best_layout = copy.deepcopy(initial_layout)
+        self.best_layout = initial_layout.copy()
         self.temperature = initial_temperature
         self.cooling_rate = cooling_rate
         self.min_temperature = min_temperature
+        self.schedule = schedule
+
+    def optimize(
+        self, iterations=1000, deadline=None, time_budget_ms=None, cancel=None
+    ):
+        """
+        执行模拟退火优化。
+        在布局副本上原地移动单个晶体管，拒绝时撤销；当前成本和最优成本增量维护，
+        每次迭代的开销只与被移动晶体管所在的网络有关。
+        :param iterations: 迭代次数上限；给出时间预算或取消信号时可以为 None。
+        :param deadline: time.monotonic() 时钟下的截止时间。
+        :param time_budget_ms: 从现在起的时间预算（毫秒），与 deadline 同时给出时取较早者。
+        :param cancel: 取消信号（带 is_set() 的对象，如 threading.Event）。
+        时间耗尽或收到取消信号时返回目前找到的最优布局；
+        有时间预算时温度按时间进度从初始温度几何下降到最低温度（或由自适应调度调整）。
+        """
+        budget = Budget(iterations, deadline, time_budget_ms, cancel)
+        timed = budget.timed
+        checked = timed or cancel is not None
+        initial_temperature = self.temperature
+
+        layout = self.current_layout.copy()
+        current_cost = layout.get_tracked_cost()
+        best_cost = self.best_layout.get_cost()
+        best_positions = None
+        if current_cost < best_cost:
+            best_cost = current_cost
+            best_positions = layout.transistor_positions.copy()
+
+        print(f"开始优化，初始成本: {current_cost:.2f}")
 
-    def optimize(self, iterations=1000):
-        """执行模拟退火优化"""
-        print(f"开始优化，初始成本: {self.current_layout.get_cost():.2f}")
+        schedule = self.schedule
+        if schedule is not None:
 
-        for i in range(iterations):
+            def trial_move():
+                delta = layout.move(*layout.propose_move())
+                layout.undo()
+                return delta
+
+            self.temperature = schedule.start(iterations, trial_move)
+            accepted = uphill = 0
+
+        steps = range(iterations) if iterations is not None else count()
+        for i in steps:
             # 生成邻居解
-            new_layout = self.current_layout.generate_neighbor()
+            transistor_id, new_pos = layout.propose_move()
+            delta = layout.move(transistor_id, new_pos)
+            new_cost = current_cost + delta
 
-            current_cost = self.current_layout.get_cost()
-            new_cost = new_layout.get_cost()
+            # 更新最优解
+            if new_cost < best_cost:
+                best_cost = new_cost
+                best_positions = layout.transistor_positions.copy()
 
             # 决定是否接受新解
             if self._acceptance_probability(current_cost, new_cost) > random.random():
-                self.current_layout = new_layout
+                current_cost = new_cost
+                accepted_move = True
+            else:
+                layout.undo()
+                accepted_move = False
 
-            # 更新最优解
-            if new_cost < self.best_layout.get_cost():
-                self.best_layout = copy.deepcopy(new_layout)
+            # 检查时间预算和取消信号
+            if checked and (i + 1) % CLOCK_CHECK_INTERVAL == 0:
+                if budget.cancelled():
+                    break
+                if timed:
+                    progress = budget.progress(i + 1)
+                    if progress >= 1.0:
+                        break
+                    if schedule is None:
+                        self.temperature = (
+                            initial_temperature
+                            * (self.min_temperature / initial_temperature) ** progress
+                        )
 
             # 降温
-            self.temperature = max(
-                self.min_temperature, self.temperature * self.cooling_rate
-            )
+            if schedule is None:
+                if not timed:
+                    self.temperature = max(
+                        self.min_temperature, self.temperature * self.cooling_rate
+                    )
+            else:
+                if delta > 0:
+                    uphill += 1
+                    accepted += accepted_move
+                if (i + 1) % schedule.window == 0:
+                    self.temperature = schedule.update(
+                        budget.progress(i + 1), accepted, uphill
+                    )
+                    accepted = uphill = 0
 
             # 打印进度
             if (i + 1) % 100 == 0:
                 print(
                     f"迭代 {i + 1}: 当前成本 = {current_cost:.2f}, "
-                    f"最优成本 = {self.best_layout.get_cost():.2f}, "
+                    f"最优成本 = {best_cost:.2f}, "
                     f"温度 = {self.temperature:.2f}"
                 )
 
+        self.current_layout = layout
+        if best_positions is not None:
+            self.best_layout = layout.copy()
+            self.best_layout.transistor_positions = best_positions
+        self.best_layout.wire_length = (
+            self.best_layout.calculate_manhattan_wire_length()
+        )
+
         print(f"优化完成，最终成本: {self.best_layout.get_cost():.2f}")
         return self.best_layout
 
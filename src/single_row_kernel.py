@@ -0,0 +1,410 @@
+import math
+import random
+from array import array
+from itertools import count
+
+import instrumentation
+from cooling import Budget
+from lower_bound import BOUND_TOLERANCE
+
+# 每批预先生成的随机移动数量
+RANDOM_BATCH_SIZE = 4096
+
+# 有时间预算或取消信号时，每隔多少次移动检查一次时钟
+CLOCK_CHECK_INTERVAL = 256
+
+
+class SingleRowKernel:
+    """
+    单行布局的数组化退火内核。
+    布局顺序和逆位置保存在扁平整数数组中，交换在原地进行，拒绝时撤销；
+    每次移动只更新受影响的网络边界和相邻对共享标志，不分配新的布局对象。
+    """
+
+    def __init__(self, bdd, placement, w_wire=0.5, w_area=0.5):
+        """
+        :param bdd: BDD对象，提供网络和网络共享索引。
+        :param placement: 初始晶体管顺序（晶体管id列表）。
+        :param w_wire: 线长成本的权重。
+        :param w_area: 面积成本的权重。
+        """
+        self.w_wire = w_wire
+        self.w_area = w_area
+
+        # 内核内部使用 0..n-1 的稠密编号
+        self.ids = sorted(placement)
+        index_of = {tid: k for k, tid in enumerate(self.ids)}
+        self.size = len(self.ids)
+
+        self.placement = array("l", (index_of[tid] for tid in placement))
+        self.position = array("l", [0]) * self.size
+        for pos, t in enumerate(self.placement):
+            self.position[t] = pos
+
+        # 网络的CSR表示：net_pins[net_ptr[k]:net_ptr[k + 1]] 为第 k 个网络的晶体管
+        nets = bdd.get_nets()
+        self.net_ptr = array("l", [0])
+        self.net_pins = array("l")
+        for net in nets:
+            self.net_pins.extend(index_of[pin] for pin in net if pin in index_of)
+            self.net_ptr.append(len(self.net_pins))
+
+        # 每个晶体管至多属于两个网络（源节点、目标节点），-1 表示无
+        self.net_a = array("l", [-1]) * self.size
+        self.net_b = array("l", [-1]) * self.size
+        transistor_nets = bdd.get_transistor_nets()
+        for tid, k in index_of.items():
+            net_ids = transistor_nets[tid]
+            if len(net_ids) > 2:
+                raise ValueError(f"晶体管 T{tid} 属于超过两个网络: {net_ids}")
+            if len(net_ids) > 0:
+                self.net_a[k] = net_ids[0]
+            if len(net_ids) > 1:
+                self.net_b[k] = net_ids[1]
+
+        self.net_lo = array("l", [0]) * len(nets)
+        self.net_hi = array("l", [0]) * len(nets)
+        self.wire_length = 0
+        for net in range(len(nets)):
+            start, end = self.net_ptr[net], self.net_ptr[net + 1]
+            if start < end:
+                positions = [self.position[self.net_pins[p]] for p in range(start, end)]
+                self.net_lo[net] = min(positions)
+                self.net_hi[net] = max(positions)
+                self.wire_length += self.net_hi[net] - self.net_lo[net]
+
+        self.adj_shared = array("b", [0]) * max(self.size - 1, 0)
+        for k in range(self.size - 1):
+            self.adj_shared[k] = self._shares(self.placement[k], self.placement[k + 1])
+        self.shared_pairs = sum(self.adj_shared)
+
+        # 撤销缓冲区：至多4个网络、4个相邻对
+        self._undo_net = array("l", [0]) * 4
+        self._undo_lo = array("l", [0]) * 4
+        self._undo_hi = array("l", [0]) * 4
+        self._undo_adj = array("l", [0]) * 4
+        self._undo_adj_old = array("b", [0]) * 4
+        self._undo_nets = 0
+        self._undo_adjs = 0
+        self._last_i = -1
+        self._last_j = -1
+        self._last_wire_delta = 0
+        self._last_shared_delta = 0
+
+    @classmethod
+    def from_layout(cls, layout):
+        """由 SingleRowLayout 构建内核"""
+        return cls(layout.bdd, layout.placement, layout.w_wire, layout.w_area)
+
+    def _shares(self, u, v):
+        """判断两个晶体管（稠密编号）是否共享网络"""
+        a = self.net_a[u]
+        if a >= 0 and (a == self.net_a[v] or a == self.net_b[v]):
+            return 1
+        b = self.net_b[u]
+        if b >= 0 and (b == self.net_a[v] or b == self.net_b[v]):
+            return 1
+        return 0
+
+    def _move_net(self, net, old_pos, new_pos, slot):
+        """更新一个晶体管从 old_pos 移到 new_pos 后的网络边界，返回线长变化量"""
+        lo = self.net_lo[net]
+        hi = self.net_hi[net]
+        self._undo_net[slot] = net
+        self._undo_lo[slot] = lo
+        self._undo_hi[slot] = hi
+
+        if lo < old_pos < hi:
+            new_lo = new_pos if new_pos < lo else lo
+            new_hi = new_pos if new_pos > hi else hi
+        else:
+            # 被移动的晶体管位于边界上，重新扫描该网络（位置数组已更新）
+            position = self.position
+            net_pins = self.net_pins
+            new_lo = new_hi = new_pos
+            for p in range(self.net_ptr[net], self.net_ptr[net + 1]):
+                q = position[net_pins[p]]
+                if q < new_lo:
+                    new_lo = q
+                elif q > new_hi:
+                    new_hi = q
+
+        self.net_lo[net] = new_lo
+        self.net_hi[net] = new_hi
+        return (new_hi - new_lo) - (hi - lo)
+
+    def _refresh_adj(self, k, slot):
+        """重新计算相邻对 (k, k+1) 的共享标志，返回共享对数变化量"""
+        old = self.adj_shared[k]
+        new = self._shares(self.placement[k], self.placement[k + 1])
+        self._undo_adj[slot] = k
+        self._undo_adj_old[slot] = old
+        self.adj_shared[k] = new
+        return new - old
+
+    def swap(self, i, j):
+        """
+        原地交换位置 i、j 的晶体管，返回成本变化量。
+        只有最近一次交换可以用 undo() 撤销。
+        """
+        placement = self.placement
+        t1 = placement[i]
+        t2 = placement[j]
+        placement[i] = t2
+        placement[j] = t1
+        self.position[t1] = j
+        self.position[t2] = i
+
+        # 同时包含两个晶体管的网络位置集合不变，无需更新
+        a1, b1 = self.net_a[t1], self.net_b[t1]
+        a2, b2 = self.net_a[t2], self.net_b[t2]
+        wire_delta = 0
+        slot = 0
+        if a1 >= 0 and a1 != a2 and a1 != b2:
+            wire_delta += self._move_net(a1, i, j, slot)
+            slot += 1
+        if b1 >= 0 and b1 != a2 and b1 != b2:
+            wire_delta += self._move_net(b1, i, j, slot)
+            slot += 1
+        if a2 >= 0 and a2 != a1 and a2 != b1:
+            wire_delta += self._move_net(a2, j, i, slot)
+            slot += 1
+        if b2 >= 0 and b2 != a1 and b2 != b1:
+            wire_delta += self._move_net(b2, j, i, slot)
+            slot += 1
+        self._undo_nets = slot
+
+        # 受影响的相邻对: (lo-1, lo), (lo, lo+1), (hi-1, hi), (hi, hi+1)
+        lo, hi = (i, j) if i < j else (j, i)
+        shared_delta = 0
+        slot = 0
+        if lo > 0:
+            shared_delta += self._refresh_adj(lo - 1, slot)
+            slot += 1
+        shared_delta += self._refresh_adj(lo, slot)
+        slot += 1
+        if hi - 1 > lo:
+            shared_delta += self._refresh_adj(hi - 1, slot)
+            slot += 1
+        if hi < self.size - 1:
+            shared_delta += self._refresh_adj(hi, slot)
+            slot += 1
+        self._undo_adjs = slot
+
+        self.wire_length += wire_delta
+        self.shared_pairs += shared_delta
+        self._last_i = i
+        self._last_j = j
+        self._last_wire_delta = wire_delta
+        self._last_shared_delta = shared_delta
+        return self.w_wire * wire_delta - self.w_area * shared_delta
+
+    def undo(self):
+        """撤销最近一次交换"""
+        i = self._last_i
+        j = self._last_j
+
+        placement = self.placement
+        t1 = placement[j]
+        t2 = placement[i]
+        placement[i] = t1
+        placement[j] = t2
+        self.position[t1] = i
+        self.position[t2] = j
+
+        for slot in range(self._undo_nets):
+            net = self._undo_net[slot]
+            self.net_lo[net] = self._undo_lo[slot]
+            self.net_hi[net] = self._undo_hi[slot]
+        for slot in range(self._undo_adjs):
+            self.adj_shared[self._undo_adj[slot]] = self._undo_adj_old[slot]
+
+        self.wire_length -= self._last_wire_delta
+        self.shared_pairs -= self._last_shared_delta
+
+    def cost(self):
+        """当前总成本（线长 + 面积），O(1)"""
+        return self.w_wire * self.wire_length + self.w_area * self.area_cost()
+
+    def area_cost(self):
+        """面积成本：总晶体管数 - 可共享扩散区的邻居对数"""
+        return self.size - self.shared_pairs
+
+    def placement_ids(self, placement=None):
+        """把稠密编号的顺序转换回晶体管id列表"""
+        if placement is None:
+            placement = self.placement
+        ids = self.ids
+        return [ids[t] for t in placement]
+
+    def trial_swap(self, rng=None):
+        """随机交换两个位置并立即撤销，返回成本变化量（用于估计初始温度）"""
+        random_ = rng.random if rng is not None else random.random
+        n = self.size
+        if n < 2:
+            return 0.0
+        i = int(random_() * n)
+        j = (i + 1 + int(random_() * (n - 1))) % n
+        delta = self.swap(i, j)
+        self.undo()
+        return delta
+
+    def anneal(
+        self,
+        iterations,
+        initial_temperature,
+        cooling_rate,
+        min_temperature,
+        rng=None,
+        cost_history=None,
+        schedule=None,
+        deadline=None,
+        cancel=None,
+        target_cost=None,
+    ):
+        """
+        在内核上原地执行模拟退火。
+        移动下标和接受阈值按批预先生成，每次移动不分配新的布局或容器。
+        :param iterations: 迭代次数上限；给出 deadline 或 cancel 时可以为 None。
+        :param rng: random.Random 实例，默认使用全局 random 模块的状态。
+        :param cost_history: 若提供列表，则逐次追加当前成本。
+        :param schedule: 自适应温度调度（cooling.AdaptiveCooling）。提供时忽略
+            initial_temperature、cooling_rate 和 min_temperature，由调度采样确定初始温度，
+            按接受率调整温度并用满全部预算。
+        :param deadline: time.monotonic() 时钟下的截止时间。到时返回当前最优解；
+            未使用自适应调度时，温度按时间进度从 initial_temperature 几何下降到 min_temperature。
+        :param cancel: 取消信号（带 is_set() 的对象），置位后返回当前最优解。
+        :param target_cost: 最优成本达到该值（如 lower_bound.single_row_lower_bound）时立即停止。
+        :return: (最优成本, 最优顺序的晶体管id列表)
+        """
+        n = self.size
+        current_cost = self.cost()
+        best_cost = current_cost
+        best_placement = self.placement[:]
+        # 下界的浮点误差见 lower_bound.meets_lower_bound
+        stop_cost = (
+            target_cost + BOUND_TOLERANCE * max(1.0, abs(target_cost))
+            if target_cost is not None
+            else -math.inf
+        )
+        if n < 2 or best_cost <= stop_cost:
+            return best_cost, self.placement_ids(best_placement)
+
+        budget = Budget(iterations, deadline, cancel=cancel)
+        timed = budget.timed
+        # 检查时钟和取消信号的间隔；只有迭代预算时不需要检查
+        next_check = CLOCK_CHECK_INTERVAL if timed or cancel is not None else -1
+
+        # 启用统计时按温度区间累计尝试/接受次数，未启用时每次移动只多一次判断
+        stats = instrumentation.active()
+        if stats is not None:
+            band_attempts = {}
+            band_accepts = {}
+            improvements = 0
+            temperature_band = instrumentation.temperature_band
+
+        if schedule is not None:
+
+            def trial_move():
+                if stats is not None:
+                    stats.add("cost_evaluations")
+                    stats.add("sampled_moves")
+                return self.trial_swap(rng)
+
+            initial_temperature = schedule.start(iterations, trial_move)
+            window = schedule.window
+            next_update = window
+            accepted = uphill = 0
+        elif timed:
+            temperature_ratio = min_temperature / initial_temperature
+
+        random_ = rng.random if rng is not None else random.random
+        log = math.log
+        swap = self.swap
+        undo = self.undo
+        w_wire = self.w_wire
+        w_area = self.w_area
+        temperature = initial_temperature
+        record = cost_history.append if cost_history is not None else None
+
+        # 短的运行（如并行回火每轮几百次移动）不预先生成用不到的随机数
+        batch_size = (
+            RANDOM_BATCH_SIZE
+            if iterations is None
+            else min(RANDOM_BATCH_SIZE, iterations)
+        )
+        batch_pos = batch_offset = batch_log_u = None
+        cursor = batch_size
+        steps = range(1, iterations + 1) if iterations is not None else count(1)
+        for step in steps:
+            if cursor == batch_size:
+                # 第二个位置用 [1, n) 的偏移量生成，保证与第一个不同
+                batch_pos = [int(random_() * n) for _ in range(batch_size)]
+                batch_offset = [1 + int(random_() * (n - 1)) for _ in range(batch_size)]
+                # 接受条件 u < exp(-delta/T) 等价于 delta < -T*ln(u)，预先取对数
+                batch_log_u = [log(1.0 - random_()) for _ in range(batch_size)]
+                cursor = 0
+
+            pos_a = batch_pos[cursor]
+            pos_b = (pos_a + batch_offset[cursor]) % n
+            threshold = -temperature * batch_log_u[cursor]
+            cursor += 1
+
+            cost_delta = swap(pos_a, pos_b)
+            if stats is not None:
+                band = temperature_band(temperature)
+                band_attempts[band] = band_attempts.get(band, 0) + 1
+            if schedule is not None and cost_delta > 0:
+                uphill += 1
+            if cost_delta < threshold:
+                current_cost = w_wire * self.wire_length + w_area * (
+                    n - self.shared_pairs
+                )
+                if stats is not None:
+                    band_accepts[band] = band_accepts.get(band, 0) + 1
+                if current_cost < best_cost:
+                    best_cost = current_cost
+                    best_placement = self.placement[:]
+                    if stats is not None:
+                        improvements += 1
+                    if best_cost <= stop_cost:
+                        break
+                if schedule is not None and cost_delta > 0:
+                    accepted += 1
+            else:
+                undo()
+
+            if record is not None:
+                record(current_cost)
+
+            if step == next_check:
+                next_check += CLOCK_CHECK_INTERVAL
+                if budget.cancelled():
+                    break
+                if timed:
+                    progress = budget.progress(step)
+                    if progress >= 1.0:
+                        break
+                    if schedule is None:
+                        temperature = initial_temperature * temperature_ratio**progress
+
+            if schedule is None:
+                if not timed:
+                    temperature *= cooling_rate
+                    if temperature < min_temperature:
+                        break
+            elif step == next_update:
+                temperature = schedule.update(budget.progress(step), accepted, uphill)
+                accepted = uphill = 0
+                next_update += window
+
+        if stats is not None:
+            proposed = sum(band_attempts.values())
+            stats.add("cost_evaluations", proposed)
+            stats.add("proposed_moves", proposed)
+            stats.add("accepted_moves", sum(band_accepts.values()))
+            stats.add("best_improvements", improvements)
+            for band, attempted in band_attempts.items():
+                stats.add_band(band, attempted, band_accepts.get(band, 0))
+
+        return best_cost, self.placement_ids(best_placement)
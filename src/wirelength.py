@@ -0,0 +1,211 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+# 支持的线长指标
+METRICS = ("hpwl", "star", "clique")
+
+
+class NetArrays:
+    """
+    网络的CSR数组表示和向量化线长计算。
+    网络编译一次为整数下标数组，坐标保存在 (n, 2) 的浮点数组中，
+    半周线长、星形和全连接曼哈顿线长都只需少量数组归约，不再逐网络循环。
+    """
+
+    def __init__(self, net_ptr, net_pins):
+        """
+        :param net_ptr: 网络偏移数组，长度为网络数 + 1。
+        :param net_pins: 各网络的晶体管下标，net_pins[net_ptr[k]:net_ptr[k + 1]] 为第 k 个网络。
+        """
+        self.net_ptr = np.asarray(net_ptr, dtype=np.int64)
+        self.net_pins = np.asarray(net_pins, dtype=np.int64)
+        self.num_nets = len(self.net_ptr) - 1
+        self.net_of_pin = np.repeat(
+            np.arange(self.num_nets, dtype=np.int64), np.diff(self.net_ptr)
+        )
+        # 所有晶体管都有坐标时使用的分段（只含至少2个引脚的网络）
+        self._full_segments = self._segments(np.ones(len(self.net_pins), dtype=bool))
+
+    @classmethod
+    def from_bdd(cls, bdd):
+        """由BDD缓存的网络CSR构建"""
+        return cls(*bdd.get_net_csr())
+
+    @classmethod
+    def from_nets(cls, nets):
+        """由网络列表（每个网络为下标列表）构建"""
+        counts = [len(net) for net in nets]
+        net_ptr = np.zeros(len(nets) + 1, dtype=np.int64)
+        np.cumsum(counts, out=net_ptr[1:])
+        net_pins = [pin for net in nets for pin in net]
+        return cls(net_ptr, net_pins)
+
+    def _segments(self, pin_mask):
+        """
+        只保留 pin_mask 为真的引脚，并丢弃有效引脚少于2个的网络。
+        :return: (引脚下标, 引脚所属的分段编号, 分段起点, 分段引脚数)
+        """
+        net_of_pin = self.net_of_pin[pin_mask]
+        counts = np.bincount(net_of_pin, minlength=self.num_nets)
+        keep = counts >= 2
+        pin_keep = keep[net_of_pin]
+
+        pins = self.net_pins[pin_mask][pin_keep]
+        segment_of_net = np.cumsum(keep) - 1
+        segment_of_pin = segment_of_net[net_of_pin[pin_keep]]
+        counts = counts[keep]
+        starts = np.zeros(len(counts), dtype=np.int64)
+        np.cumsum(counts[:-1], out=starts[1:])
+        return pins, segment_of_pin, starts, counts
+
+    def _points(self, coords, placed=None):
+        """取出各网络引脚的坐标；placed 为布尔掩码时忽略未放置的晶体管"""
+        if placed is None:
+            pins, segment_of_pin, starts, counts = self._full_segments
+        else:
+            pins, segment_of_pin, starts, counts = self._segments(placed[self.net_pins])
+        return coords[pins], segment_of_pin, starts, counts
+
+    def hpwl(self, coords, placed=None):
+        """半周线长：各网络包围盒的 宽 + 高 之和"""
+        points, _, starts, _ = self._points(coords, placed)
+        if len(starts) == 0:
+            return 0.0
+        span = np.maximum.reduceat(points, starts) - np.minimum.reduceat(points, starts)
+        return float(span.sum())
+
+    def star_manhattan(self, coords, placed=None):
+        """星形曼哈顿线长：各引脚到所在网络质心的曼哈顿距离之和"""
+        points, segment_of_pin, starts, counts = self._points(coords, placed)
+        if len(starts) == 0:
+            return 0.0
+        centers = np.add.reduceat(points, starts) / counts[:, None]
+        return float(np.abs(points - centers[segment_of_pin]).sum())
+
+    def clique_manhattan(self, coords, placed=None):
+        """
+        全连接曼哈顿线长：各网络内所有引脚对的曼哈顿距离之和。
+        每个坐标轴分别计算：网络内坐标升序排列为 x_0..x_{m-1} 时，
+        sum_{i<j} |x_i - x_j| = sum_r (2r - (m - 1)) * x_r，排序为 O(k log k)。
+        """
+        points, segment_of_pin, starts, counts = self._points(coords, placed)
+        if len(starts) == 0:
+            return 0.0
+        rank = np.arange(len(points)) - starts[segment_of_pin]
+        weight = 2 * rank - (counts[segment_of_pin] - 1)
+
+        # 先按网络求和再相加，坐标量级相差很大的网络之间不互相抵消精度
+        total = 0.0
+        for axis in range(points.shape[1]):
+            values = points[:, axis]
+            order = self._segment_order(values, segment_of_pin)
+            total += float(np.add.reduceat(weight * values[order], starts).sum())
+        return total
+
+    @staticmethod
+    def _segment_order(values, segment_of_pin):
+        """
+        按 (分段编号, 坐标) 升序排列的下标。
+        先用 分段编号 + 归一化坐标 的浮点键排序（比 lexsort 快得多），再检查结果；
+        跨度远大于引脚间距时键的浮点分辨率不够，次序可能错乱，此时改用精确的 lexsort。
+        """
+        low = values.min()
+        span = (values.max() - low) * (1.0 + 1e-9) or 1.0
+        order = np.argsort(segment_of_pin + (values - low) / span)
+        sorted_segments = segment_of_pin[order]
+        same_segment = sorted_segments[1:] == sorted_segments[:-1]
+        sorted_values = values[order]
+        if np.all(sorted_segments[1:] >= sorted_segments[:-1]) and not np.any(
+            same_segment & (sorted_values[1:] < sorted_values[:-1])
+        ):
+            return order
+        return np.lexsort((values, segment_of_pin))
+
+    def evaluate(self, metric, coords, placed=None):
+        """按名称计算线长指标: hpwl / star / clique"""
+        if metric == "hpwl":
+            return self.hpwl(coords, placed)
+        if metric == "star":
+            return self.star_manhattan(coords, placed)
+        if metric == "clique":
+            return self.clique_manhattan(coords, placed)
+        raise ValueError(f"未知的线长指标: {metric}，可选 {METRICS}")
+
+
+def evaluate_positions(metric, nets, positions):
+    """
+    对任意键的位置字典计算线长，nets 中不在 positions 里的节点被忽略。
+    供 utils 中按 (nets, positions) 调用的函数使用。
+    """
+    index = {node: k for k, node in enumerate(positions)}
+    coords = np.array(list(positions.values()), dtype=float).reshape(-1, 2)
+    net_arrays = NetArrays.from_nets(
+        [[index[node] for node in net if node in index] for net in nets]
+    )
+    return net_arrays.evaluate(metric, coords)
+
+
+class PositionMap(MutableMapping):
+    """
+    晶体管位置的字典视图，数据保存在 (n, 2) 坐标数组和放置掩码中。
+    支持 dict 的读写接口，供按 transistor_positions[tid] 访问的代码使用。
+    """
+
+    def __init__(self, coords, placed):
+        self.coords = coords
+        self.placed = placed
+
+    @classmethod
+    def empty(cls, size):
+        return cls(np.zeros((size, 2)), np.zeros(size, dtype=bool))
+
+    def load(self, positions):
+        """用另一个位置映射覆盖全部内容"""
+        if isinstance(positions, PositionMap) and len(positions.placed) == len(
+            self.placed
+        ):
+            self.coords[:] = positions.coords
+            self.placed[:] = positions.placed
+            return
+        self.placed[:] = False
+        for tid, pos in positions.items():
+            self[tid] = pos
+
+    def all_placed(self):
+        return bool(self.placed.all())
+
+    def _check(self, tid):
+        if not isinstance(tid, (int, np.integer)) or not 0 <= tid < len(self.placed):
+            raise KeyError(tid)
+
+    def __getitem__(self, tid):
+        self._check(tid)
+        if not self.placed[tid]:
+            raise KeyError(tid)
+        x, y = self.coords[tid]
+        return (float(x), float(y))
+
+    def __setitem__(self, tid, pos):
+        self._check(tid)
+        self.coords[tid] = pos
+        self.placed[tid] = True
+
+    def __delitem__(self, tid):
+        self[tid]  # 不存在时抛出 KeyError
+        self.placed[tid] = False
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self.placed).tolist())
+
+    def __len__(self):
+        return int(self.placed.sum())
+
+    def copy(self):
+        return PositionMap(self.coords.copy(), self.placed.copy())
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __repr__(self):
+        return repr(dict(self.items()))
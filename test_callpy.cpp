@@ -3,6 +3,9 @@
 #include <string>
 #include <iostream>
 #include <stdexcept>
+#include <unistd.h>
+#include <sys/types.h>
+#include <sys/wait.h>
 
 double run_python(const std::string& exe,
                   const std::string& input_file)
@@ -33,6 +36,68 @@ double run_python(const std::string& exe,
     return std::stod(buf);
 }
 
+// 常驻进程模式：启动一次 main_enhanced --worker，之后每个候选只写一行请求、读一行成本
+class PythonWorker {
+public:
+    explicit PythonWorker(const std::string& exe)
+    {
+        int to_child[2];
+        int from_child[2];
+        if (pipe(to_child) != 0 || pipe(from_child) != 0) {
+            throw std::runtime_error("pipe failed");
+        }
+
+        pid_ = fork();
+        if (pid_ < 0) {
+            throw std::runtime_error("fork failed");
+        }
+
+        if (pid_ == 0) {
+            dup2(to_child[0], STDIN_FILENO);
+            dup2(from_child[1], STDOUT_FILENO);
+            close(to_child[0]);
+            close(to_child[1]);
+            close(from_child[0]);
+            close(from_child[1]);
+            execl(exe.c_str(), exe.c_str(), "--worker", (char*)nullptr);
+            _exit(127);
+        }
+
+        close(to_child[0]);
+        close(from_child[1]);
+        in_ = fdopen(to_child[1], "w");
+        out_ = fdopen(from_child[0], "r");
+        if (!in_ || !out_) {
+            throw std::runtime_error("fdopen failed");
+        }
+    }
+
+    ~PythonWorker()
+    {
+        if (in_) fclose(in_);
+        if (out_) fclose(out_);
+        if (pid_ > 0) waitpid(pid_, nullptr, 0);
+    }
+
+    // request: "<bsd路径> [w_wire] [w_area] [iterations] [seed]" 或一行JSON
+    double evaluate(const std::string& request)
+    {
+        fprintf(in_, "%s\n", request.c_str());
+        fflush(in_);
+
+        char buf[512] = {0};
+        if (!fgets(buf, sizeof(buf), out_)) {
+            throw std::runtime_error("worker exited");
+        }
+        return std::stod(buf);
+    }
+
+private:
+    pid_t pid_ = -1;
+    FILE* in_ = nullptr;
+    FILE* out_ = nullptr;
+};
+
 int main()
 {
     try {
@@ -44,6 +109,12 @@ int main()
         );
 
         std::cout << "Result = " << r << std::endl;
+
+        PythonWorker worker("./dist/main_enhanced");
+        for (int seed = 0; seed < 3; ++seed) {
+            double cost = worker.evaluate("sample.bsd 0.5 0.5 5000 " + std::to_string(seed));
+            std::cout << "Worker result (seed " << seed << ") = " << cost << std::endl;
+        }
     }
     catch (const std::exception& e) {
         std::cerr << "[C++] Exception: " << e.what() << std::endl;
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from batch_evaluate import evaluate_bsd_file  # noqa: E402
+from bsd_io import parse_bsd_lines  # noqa: E402
+from bsd_simulation import check_candidate, simulate_bsd  # noqa: E402
+
+MUX2 = "[(0,1)]\n[(-1,0),(-2,0)]\n[(-1,-2)]\n[0,2,1]\n"
+
+
+def test_check_candidate_accepts_valid_bsd():
+    layers, var_sequence = parse_bsd_lines(MUX2.splitlines())
+    check_candidate(layers, var_sequence, reference=(layers, var_sequence))
+
+
+def test_check_candidate_rejects_empty_bsd():
+    # 只有一行的文件被解析为没有层、变量序列为 [(0,1)]
+    layers, var_sequence = parse_bsd_lines(["[(0,1)]"])
+    assert layers == []
+    with pytest.raises(ValueError):
+        check_candidate(layers, var_sequence)
+
+
+def test_check_candidate_rejects_empty_first_layer():
+    with pytest.raises(ValueError):
+        check_candidate([[]], [0])
+
+
+def test_short_var_sequence_rejected_before_simulation():
+    layers, _ = parse_bsd_lines(MUX2.splitlines())
+    with pytest.raises(ValueError, match="变量序列只有 2 个变量"):
+        simulate_bsd(layers, [0, 2])
+
+
+def test_validate_rejects_empty_file_in_batch(tmp_path):
+    path = tmp_path / "empty.bsd"
+    path.write_text("[(0,1)]\n")
+    result = evaluate_bsd_file(str(path), 0.5, 0.5, 100, 1, validate=True)
+    assert result["cost"] is None
+    assert "ValueError" in result["error"]
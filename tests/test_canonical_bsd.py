@@ -0,0 +1,92 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from bsd_io import parse_bsd_lines  # noqa: E402
+from canonical_bsd import canonicalize_bsd  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from layout import SingleRowLayout  # noqa: E402
+
+# 含 [v] 单值叶子和被多个节点共享的下层节点
+SHARED = "[(0,1),(1,2)]\n[(-1,0),[1],(0,-2)]\n[(-2,-1),[0]]\n[[-1]]\n[0,1,2,3]\n"
+
+
+def _permute_within_layers(layers, rng):
+    """每层节点随机重排，上一层的目标随之改编号"""
+    perms = []
+    for layer in layers:
+        perm = list(range(len(layer)))
+        rng.shuffle(perm)
+        perms.append(perm)
+
+    def remap(layer_idx, target):
+        if target < 0 or layer_idx + 1 >= len(perms):
+            return target
+        return perms[layer_idx + 1][target]
+
+    permuted = []
+    for layer_idx, layer in enumerate(layers):
+        new_layer = [None] * len(layer)
+        for old, node in enumerate(layer):
+            if isinstance(node, tuple):
+                new_node = tuple(remap(layer_idx, t) for t in node)
+            elif isinstance(node[0], tuple):
+                new_node = [tuple(remap(layer_idx, t) for t in node[0])]
+            else:
+                new_node = [remap(layer_idx, node[0])]
+            new_layer[perms[layer_idx][old]] = new_node
+        permuted.append(new_layer)
+    return permuted
+
+
+def _bdd(layers, var_sequence):
+    bdd = BDD()
+    bdd.construct_from_layers(layers, var_sequence)
+    return bdd
+
+
+@pytest.mark.parametrize(
+    "bsd_text",
+    [
+        SHARED,
+        generate_bsd(4, 3, sharing=0.5, seed=1),
+        generate_bsd(6, 4, seed=2),
+        generate_bsd(5, 4, terminal_ratio=0.0, sharing=0.0, seed=3),
+    ],
+)
+@pytest.mark.parametrize("seed", range(4))
+def test_fingerprint_invariant_under_within_layer_permutation(bsd_text, seed):
+    layers, var_sequence = parse_bsd_lines(bsd_text.splitlines())
+    permuted = _permute_within_layers(layers, random.Random(seed))
+    original = canonicalize_bsd(layers, var_sequence)
+    renumbered = canonicalize_bsd(permuted, var_sequence)
+    assert renumbered.fingerprint == original.fingerprint
+
+    # 经规范形式翻译的顺序在两个BSD上的成本相同（去重时复用布局的依据）；
+    # 有不可达节点时规范形式去掉了其晶体管，不能直接翻译完整的顺序
+    if original.pruned_nodes:
+        return
+    bdd, permuted_bdd = _bdd(layers, var_sequence), _bdd(permuted, var_sequence)
+    placement = list(range(bdd.get_transistor_count()))
+    random.Random(seed).shuffle(placement)
+    translated = renumbered.to_original(original.to_canonical(placement))
+    assert SingleRowLayout(permuted_bdd, 0.5, 0.5, translated).get_cost() == (
+        SingleRowLayout(bdd, 0.5, 0.5, placement).get_cost()
+    )
+
+
+def test_fingerprint_distinguishes_different_structures():
+    layers, var_sequence = parse_bsd_lines(SHARED.splitlines())
+    changed = [list(layer) for layer in layers]
+    changed[1][0] = (-2, 0)
+    assert (
+        canonicalize_bsd(changed, var_sequence).fingerprint
+        != canonicalize_bsd(layers, var_sequence).fingerprint
+    )
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bsd_io import parse_bsd_lines  # noqa: E402
+from bsd_simulation import InputPatterns, simulate_bsd  # noqa: E402
+from cell_compiler import compile_cell  # noqa: E402
+from liberty import read_liberty  # noqa: E402
+
+LIBRARY = read_liberty(os.path.join(ROOT, "smic_cmoslib.txt"))
+COMBINATIONAL = [name for name, cell in LIBRARY.cells.items() if not cell.is_sequential]
+
+
+@pytest.mark.parametrize("name", COMBINATIONAL)
+def test_compiled_bsd_simulates_to_truth_tables(name):
+    compiled = compile_cell(LIBRARY.cells[name])
+    # 经BSD文本往返，检查写出的文件而不只是内存中的层级结构
+    layers, var_sequence = parse_bsd_lines(compiled.bsd_text().splitlines())
+    function = simulate_bsd(
+        layers, var_sequence, inputs=InputPatterns(len(compiled.inputs))
+    )
+    for output, root in compiled.outputs.items():
+        assert function.outputs[root] == compiled.truth_tables[output], output
+
+    # 与层变量无关的节点应为单晶体管的 [x]，不出现两个分支相同的 (x,x)
+    for layer in compiled.layers:
+        for node in layer:
+            assert not (isinstance(node, tuple) and node[0] == node[1])
+    assert compiled.transistor_count == compiled.build_bdd().get_transistor_count()
+
+
+def test_mux2_uses_a_pass_through_node():
+    compiled = compile_cell(LIBRARY.cells["MUX2_X1"])
+    assert compiled.transistor_count == 7
+    assert (
+        sum(isinstance(node, list) for layer in compiled.layers for node in layer) == 1
+    )
@@ -0,0 +1,41 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from exact_solver import solve_single_row_exact  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from layout import SingleRowLayout  # noqa: E402
+
+CASES = [
+    ("[(0,1)]\n[(-1,0),(-2,0)]\n[(-1,-2)]\n[0,2,1]\n", 0.5, 0.5),
+    (generate_bsd(2, 2, sharing=0.8, seed=1), 0.5, 0.5),
+    (generate_bsd(4, 1, seed=2), 0.2, 0.8),
+    (generate_bsd(1, 3, seed=3), 0.9, 0.1),
+    (generate_bsd(2, 2, terminal_ratio=0.0, seed=4), 0.7, 0.3),
+]
+
+
+@pytest.mark.parametrize("bsd_text, w_wire, w_area", CASES)
+def test_subset_dp_matches_brute_force(bsd_text, w_wire, w_area):
+    bdd = BDD()
+    bdd.construct_from_bsd_text(bsd_text)
+    transistors = list(range(bdd.get_transistor_count()))
+    assert len(transistors) <= 8
+
+    layout = SingleRowLayout(bdd, w_wire, w_area, transistors)
+    brute_force = min(
+        SingleRowLayout(bdd, w_wire, w_area, order).get_cost()
+        for order in itertools.permutations(transistors)
+    )
+    cost, order = solve_single_row_exact(bdd, transistors, w_wire, w_area)
+    assert cost == pytest.approx(brute_force)
+    assert sorted(order) == transistors
+    layout.set_placement(order)
+    assert layout.get_cost() == pytest.approx(cost)
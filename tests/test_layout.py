@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from layout import Layout, SingleRowLayout  # noqa: E402
+
+
+def _bdd(bsd_text):
+    bdd = BDD()
+    bdd.construct_from_bsd_text(bsd_text)
+    return bdd
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_single_row_swap_delta_matches_full_cost(seed):
+    random.seed(seed)
+    layout = SingleRowLayout(_bdd(generate_bsd(6, 5, seed=seed)), 0.7, 0.3)
+    rng = random.Random(seed)
+    n = len(layout.placement)
+    for _ in range(300):
+        i, j = rng.sample(range(n), 2)
+        before = layout.get_cost()
+        delta = layout.swap_delta(i, j)
+        assert layout.get_cost() == pytest.approx(before)
+        trial = layout.copy()
+        trial.placement[i], trial.placement[j] = trial.placement[j], trial.placement[i]
+        trial.pos_map = {t: k for k, t in enumerate(trial.placement)}
+        assert before + delta == pytest.approx(trial.get_cost())
+        if rng.random() < 0.5:
+            layout.apply_swap(i, j)
+            assert layout.get_tracked_cost() == pytest.approx(layout.get_cost())
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_layout_move_and_undo_track_full_hpwl(seed):
+    random.seed(seed)
+    layout = Layout(_bdd(generate_bsd(5, 6, sharing=0.6, seed=seed)), (40, 40))
+    assert layout.get_tracked_cost() == pytest.approx(layout.get_cost())
+    for step in range(300):
+        before = layout.get_tracked_cost()
+        transistor_id, new_pos = layout.propose_move()
+        if step % 7 == 0:
+            # 移到另一个晶体管的位置，使新旧坐标落在包围盒边界上
+            new_pos = tuple(
+                layout.transistor_positions[
+                    random.randrange(len(layout.transistor_positions))
+                ]
+            )
+        delta = layout.move(transistor_id, new_pos)
+        assert layout.get_tracked_cost() == pytest.approx(before + delta)
+        assert layout.get_tracked_cost() == pytest.approx(layout.get_cost())
+        if random.random() < 0.5:
+            layout.undo()
+            assert layout.get_tracked_cost() == pytest.approx(before)
+            assert layout.get_tracked_cost() == pytest.approx(layout.get_cost())
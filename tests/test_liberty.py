@@ -0,0 +1,35 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from liberty import parse_library, read_liberty  # noqa: E402
+from liberty_index import open_liberty  # noqa: E402
+
+SAMPLELIB = os.path.join(ROOT, "samplelib.txt")
+
+
+def test_cells_after_closed_library_are_kept():
+    # samplelib.txt 在 XOR2_X1 之前多了一个 }，XOR2_X1 成为顶层组
+    library = read_liberty(SAMPLELIB)
+    assert list(library.cells) == ["DFFR_X1", "OR2_X1", "XOR2_X1"]
+    assert library.cells["XOR2_X1"].functions == {"Z": "(A ^ B)"}
+
+
+def test_read_liberty_agrees_with_open_liberty():
+    eager = read_liberty(SAMPLELIB)
+    lazy = open_liberty(SAMPLELIB)
+    assert list(eager.cells) == list(lazy.cells)
+    for name, cell in eager.cells.items():
+        assert cell.functions == lazy.cells[name].functions
+        assert cell.is_sequential == lazy.cells[name].is_sequential
+
+
+def test_top_level_groups_other_than_cells_are_ignored():
+    text = (
+        "library (L) { cell (A) { area : 1 ; } }\n"
+        "operating_conditions (typ) { process : 1 ; }\n"
+        "cell (B) { area : 2 ; }\n"
+    )
+    assert list(parse_library(text).cells) == ["A", "B"]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from exact_solver import solve_single_row_exact  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from lower_bound import (  # noqa: E402
+    BOUND_TOLERANCE,
+    max_shared_pairs,
+    single_row_lower_bound,
+    wire_lower_bound,
+)
+
+SHAPES = [(2, 2), (3, 2), (2, 3), (6, 1), (1, 5)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("layers, width", SHAPES)
+def test_lower_bound_never_exceeds_optimum(layers, width, seed):
+    bdd = BDD()
+    bdd.construct_from_bsd_text(
+        generate_bsd(layers, width, sharing=0.3 * (seed % 3), seed=seed)
+    )
+    transistors = list(range(bdd.get_transistor_count()))
+    tolerance = BOUND_TOLERANCE * len(transistors) ** 2
+
+    # 只计线长或只计面积时的最优值分别不小于对应的下界
+    min_wire, _ = solve_single_row_exact(bdd, transistors, 1.0, 0.0)
+    min_area, _ = solve_single_row_exact(bdd, transistors, 0.0, 1.0)
+    assert wire_lower_bound(bdd) <= min_wire + tolerance
+    assert len(transistors) - max_shared_pairs(bdd) <= min_area + tolerance
+
+    for w_wire in (0.2, 0.5, 0.8):
+        optimum, _ = solve_single_row_exact(bdd, transistors, w_wire, 1 - w_wire)
+        bound = single_row_lower_bound(bdd, w_wire, 1 - w_wire)
+        assert bound <= optimum + tolerance
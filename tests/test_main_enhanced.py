@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import main_enhanced  # noqa: E402
+
+SAMPLE = os.path.join(ROOT, "sample.bsd")
+
+
+def _main_fails(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, "argv", ["main_enhanced.py", *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        main_enhanced.main()
+    captured = capsys.readouterr()
+    assert exit_info.value.code == 2
+    assert captured.out == ""
+    assert len(captured.err.splitlines()) == 1
+    return captured.err
+
+
+@pytest.mark.parametrize(
+    "argv, option",
+    [
+        ([SAMPLE, "--seed"], "--seed"),
+        ([SAMPLE, "--seed", "abc"], "--seed"),
+        ([SAMPLE, "--time-budget-ms", "fast"], "--time-budget-ms"),
+        ([SAMPLE, "--time-budget-ms", "-5"], "--time-budget-ms"),
+        ([SAMPLE, "--profile"], "--profile"),
+        ([SAMPLE, "--profile", "--seed", "1"], "--profile"),
+        ([SAMPLE, "0.5", "heavy"], "w_area"),
+        (["--worker", "--profile"], "--profile"),
+        ([SAMPLE, "--engine", "bogus"], "bogus"),
+        ([SAMPLE, "--initial", "greedy"], "greedy"),
+    ],
+)
+def test_invalid_options_exit_with_one_line_error(monkeypatch, capsys, argv, option):
+    assert option in _main_fails(monkeypatch, capsys, *argv)
+
+
+def test_malformed_bsd_fails_with_status_1(monkeypatch, capsys, tmp_path):
+    path = tmp_path / "bad.bsd"
+    path.write_text("[(0,1,2)]\n[(-1,-2)]\n[0,1]\n")
+    monkeypatch.setattr(sys, "argv", ["main_enhanced.py", str(path)])
+    with pytest.raises(SystemExit) as exit_info:
+        main_enhanced.main()
+    captured = capsys.readouterr()
+    assert exit_info.value.code == 1
+    assert captured.out == ""
+    assert "ValueError" in captured.err
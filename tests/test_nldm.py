@@ -0,0 +1,79 @@
+import bisect
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from liberty import parse_liberty  # noqa: E402
+from nldm import TableStack, TimingTable  # noqa: E402
+
+LOAD_FIRST = ("total_output_net_capacitance", "input_net_transition")
+
+
+def _segment(index, x):
+    """逐点的参考实现：所在区间，超出范围时取两端区间外推"""
+    k = min(max(bisect.bisect_right(index, x) - 1, 0), len(index) - 2)
+    return k, (x - index[k]) / (index[k + 1] - index[k])
+
+
+def _reference(index_1, index_2, values, x1, x2):
+    i, t = _segment(index_1, x1)
+    j, u = _segment(index_2, x2)
+    near = values[i][j] + u * (values[i][j + 1] - values[i][j])
+    far = values[i + 1][j] + u * (values[i + 1][j + 1] - values[i + 1][j])
+    return near + t * (far - near)
+
+
+def _random_table(rng, rows=5, cols=6, variables=None):
+    index_1 = sorted(rng.sample(range(1, 100), rows))
+    index_2 = sorted(rng.sample(range(1, 100), cols))
+    values = [[rng.uniform(0, 10) for _ in range(cols)] for _ in range(rows)]
+    table = TimingTable(index_1, index_2, values, variables or LOAD_FIRST[::-1])
+    return table, index_1, index_2, values
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_interpolate_matches_pointwise_reference(seed):
+    rng = random.Random(seed)
+    table, index_1, index_2, values = _random_table(rng)
+    # 网格点、区间内部和两侧外推
+    x1 = [index_1[0], index_1[-1], -20.0, 150.0] + [
+        rng.uniform(0, 110) for _ in range(40)
+    ]
+    x2 = [index_2[0], -5.0, index_2[-1], 130.0] + [
+        rng.uniform(0, 110) for _ in range(40)
+    ]
+    expected = [_reference(index_1, index_2, values, a, b) for a, b in zip(x1, x2)]
+    assert table.interpolate(np.array(x1), np.array(x2)) == pytest.approx(expected)
+    assert table.interpolate(x1[5], x2[5]) == pytest.approx(expected[5])
+
+
+def test_one_dimensional_table_interpolates_linearly():
+    table = TimingTable([1.0, 2.0, 4.0], None, [10.0, 20.0, 0.0])
+    assert table.interpolate(np.array([1.5, 3.0, 0.0, 5.0])) == pytest.approx(
+        [15.0, 10.0, 0.0, -10.0]
+    )
+
+
+def test_table_stack_matches_per_table_lookup():
+    rng = random.Random(4)
+    tables = [
+        _random_table(rng, variables=LOAD_FIRST if k % 2 else None)[0] for k in range(5)
+    ]
+    stack = TableStack(tables)
+    table_ids = np.array([rng.randrange(len(tables)) for _ in range(200)])
+    slew = np.array([rng.uniform(-10, 120) for _ in range(200)])
+    load = np.array([rng.uniform(-10, 120) for _ in range(200)])
+    expected = [float(tables[k].lookup(s, c)) for k, s, c in zip(table_ids, slew, load)]
+    assert stack.lookup(table_ids, slew, load) == pytest.approx(expected)
+
+
+def test_values_without_index_1_rejected():
+    group = parse_liberty('cell_rise (tmpl) { values ("1, 2, 3"); }').groups[0]
+    with pytest.raises(ValueError, match="缺少 index_1"):
+        TimingTable.from_group(group)
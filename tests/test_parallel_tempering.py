@@ -0,0 +1,32 @@
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from layout import SingleRowLayout  # noqa: E402
+from parallel_tempering import ParallelTempering  # noqa: E402
+
+
+def _run(workers):
+    bdd = BDD()
+    bdd.construct_from_bsd_text(generate_bsd(8, 6, seed=3))
+    random.seed(0)
+    initial = SingleRowLayout(bdd)
+    pt = ParallelTempering(initial, num_replicas=5, seed=7, workers=workers)
+    best = pt.optimize(2000)
+    return initial, pt, best
+
+
+def test_worker_processes_match_in_process_run():
+    initial, serial, best = _run(1)
+    _, pooled, pooled_best = _run(2)
+    assert pooled_best.placement == best.placement
+    assert pooled.current_layout.placement == serial.current_layout.placement
+    assert pooled.cost_history == serial.cost_history
+    assert best.get_cost() == serial.cost_history[-1] <= initial.get_cost()
+    assert sorted(best.placement) == sorted(initial.placement)
@@ -0,0 +1,42 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bdd import BDD  # noqa: E402
+from generate_bsd import generate_bsd  # noqa: E402
+from layout import SingleRowLayout  # noqa: E402
+from single_row_kernel import SingleRowKernel  # noqa: E402
+
+
+def _full_cost(layout, kernel):
+    layout.set_placement(kernel.placement_ids())
+    return layout.get_cost()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_kernel_swap_and_undo_track_full_cost(seed):
+    bdd = BDD()
+    bdd.construct_from_bsd_text(generate_bsd(8, 4, sharing=0.6, seed=seed))
+    placement = list(range(bdd.get_transistor_count()))
+    random.Random(seed).shuffle(placement)
+    layout = SingleRowLayout(bdd, 0.4, 0.6, placement)
+    kernel = SingleRowKernel.from_layout(layout)
+    assert kernel.cost() == pytest.approx(layout.get_cost())
+
+    rng = random.Random(seed)
+    for _ in range(300):
+        i, j = rng.sample(range(kernel.size), 2)
+        before = kernel.cost()
+        delta = kernel.swap(i, j)
+        assert kernel.cost() == pytest.approx(before + delta)
+        assert kernel.cost() == pytest.approx(_full_cost(layout, kernel))
+        if rng.random() < 0.5:
+            kernel.undo()
+            assert kernel.cost() == pytest.approx(before)
+            assert kernel.cost() == pytest.approx(_full_cost(layout, kernel))
@@ -0,0 +1,58 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from wirelength import NetArrays  # noqa: E402
+
+
+def _clique_reference(nets, coords, placed=None):
+    total = 0.0
+    for net in nets:
+        pins = [p for p in net if placed is None or placed[p]]
+        for a in range(len(pins)):
+            for b in range(a + 1, len(pins)):
+                total += float(np.abs(coords[pins[a]] - coords[pins[b]]).sum())
+    return total
+
+
+def _random_nets(rng, size, num_nets):
+    return [rng.sample(range(size), rng.randint(1, 8)) for _ in range(num_nets)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_clique_matches_pairwise_sum(seed):
+    rng = random.Random(seed)
+    size = 40
+    nets = _random_nets(rng, size, 25)
+    coords = np.array(
+        [[rng.randint(-50, 50), rng.randint(-50, 50)] for _ in range(size)], dtype=float
+    )
+    net_arrays = NetArrays.from_nets(nets)
+    assert net_arrays.clique_manhattan(coords) == pytest.approx(
+        _clique_reference(nets, coords)
+    )
+
+    placed = np.array([rng.random() < 0.7 for _ in range(size)])
+    assert net_arrays.clique_manhattan(coords, placed) == pytest.approx(
+        _clique_reference(nets, coords, placed)
+    )
+
+
+def test_clique_exact_when_span_exceeds_float_key_resolution():
+    # 一个坐标极大时浮点排序键分辨不出其余引脚的次序，应退回到 lexsort；
+    # 坐标取偶数，1e16 加上其余网络的和仍能精确表示
+    rng = random.Random(7)
+    nets = [rng.sample(range(2, 30), rng.randint(2, 8)) for _ in range(12)]
+    coords = np.array(
+        [[2 * rng.randint(0, 9), 2 * rng.randint(0, 9)] for _ in range(30)],
+        dtype=float,
+    )
+    coords[0] = [1e16, 0]
+    coords[1] = [0, 0]
+    net_arrays = NetArrays.from_nets(nets + [[0, 1]])
+    assert net_arrays.clique_manhattan(coords) == 1e16 + _clique_reference(nets, coords)
@@ -0,0 +1,28 @@
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from main_enhanced import run_worker  # noqa: E402
+
+
+def _run(requests):
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+    stdout = io.StringIO()
+    run_worker(stdin, stdout)
+    return stdout.getvalue().splitlines()
+
+
+def test_malformed_node_replies_nan_without_extra_lines():
+    lines = _run(
+        [
+            {"bsd_text": "[(0,1,2)]\n[(-1,-2)]\n[0,1]\n", "seed": 1},
+            {"bsd": os.path.join(ROOT, "sample.bsd"), "seed": 1, "iterations": 200},
+        ]
+    )
+    assert len(lines) == 2
+    assert lines[0] == "nan"
+    assert float(lines[1]) > 0